@@ -6,8 +6,12 @@ import traceback
 import time
 import threading
 import uuid
+import shutil
+import base64
+import atexit
+import signal
 from pathlib import Path
-from flask import Flask, request, jsonify, render_template_string, render_template, send_from_directory, redirect, url_for
+from flask import Flask, request, jsonify, render_template_string, render_template, redirect, url_for, Response, stream_with_context
 from flask_cors import CORS
 import logging
 from datetime import datetime
@@ -17,6 +21,23 @@ project_root = Path(__file__).parent.absolute()
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+from modules.job_queue import JobQueue, default_worker_count
+from modules.queue_state import create_queue_state
+from modules.workspace import JobWorkspace, VIDEO_EXTENSIONS
+from modules.chunked_upload import ChunkedUpload, UploadError
+from modules.progress import ARTIFACT, LIFECYCLE_STATUSES, WARNING, read_events, last_event
+from modules.task_store import create_task_store, TERMINAL_STATUSES
+from modules.process_control import popen_group, release, kill_process_tree, pipeline_deadline
+from modules.media_probe import probe_duration, probe_media
+from modules.admission import check_admission
+from modules.media_delivery import serve_media
+from modules.master_log import create_master_log
+from modules.manifest import load_manifest, manifest_path, manifest_files
+from modules.metrics import load_metrics
+from modules.config_service import load_master_config
+from modules.cost_model import create_cost_model, expected_flow, load_eta
+from modules.warm_pool import create_warm_pool
+
 app = Flask(__name__)
 
 # Enable CORS for frontend communication
@@ -26,130 +47,127 @@ CORS(app, origins=['http://localhost:3000', 'https://makereels.live', 'http://fr
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global storage for processing status
-processing_status = {}
+# Task status, shared between server processes when backed by Redis (created lazily, see get_task_store)
+task_store = None
+task_store_lock = threading.Lock()
 
-# Global storage for background processing
-background_tasks = {}
+# Serializes admission checks with queue submission so concurrent requests see each other's jobs
+admission_lock = threading.Lock()
 
-# Master log functions
-def log_session_start(session_id, filename, user_phone, device_info=None):
-    """Log session start to master.log"""
+# Processing-time model fitted on finished jobs (created lazily, see get_cost_model)
+cost_model = None
+cost_model_lock = threading.Lock()
+
+# Worker pool that runs queued processing jobs (created lazily, see get_job_queue)
+job_queue = None
+job_queue_lock = threading.Lock()
+
+# Preloaded pipeline processes that run the queued jobs (created with the job queue, see get_warm_pool)
+warm_pool = None
+warm_pool_lock = threading.Lock()
+
+# Background writer for master.log (created lazily, see get_master_log)
+master_log = None
+master_log_lock = threading.Lock()
+
+# Master log functions (records are queued and written by a background thread, see modules/master_log.py)
+def get_master_log_config():
+    """Get master log settings from master_config.json"""
     try:
-        with open("master.log", "a", encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write(f"SESSION: {session_id}\n")
-            f.write(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"User: {user_phone}\n")
-            f.write(f"Device: {device_info or 'Unknown'}\n")
-            f.write(f"Input: {filename}\n")
-            f.write("=" * 80 + "\n\n")
+        return load_master_config().get('master_log', {})
     except Exception as e:
-        logger.warning(f"Could not write to master log: {str(e)}")
+        logger.warning(f"⚠️ Could not read master log config, using defaults: {str(e)}")
+        return {}
+
+def get_master_log():
+    """Create the master log writer on first use"""
+    global master_log
+    with master_log_lock:
+        if master_log is None:
+            master_log = create_master_log(get_master_log_config())
+        return master_log
+
+def log_session_start(session_id, filename, user_phone, device_info=None):
+    """Log session start to master.log"""
+    get_master_log().log(session_id, 'session_start', input=filename, user=user_phone, device=device_info or 'Unknown')
 
 def log_frontend_event(session_id, message):
     """Log frontend event to master.log"""
-    try:
-        with open("master.log", "a", encoding='utf-8') as f:
-            f.write(f"FRONTEND LOG:\n")
-            f.write(f"{datetime.now().strftime('%H:%M:%S')} - {message}\n")
-    except Exception as e:
-        logger.warning(f"Could not write frontend log: {str(e)}")
+    get_master_log().log(session_id, 'frontend', message=message)
 
 def log_backend_event(session_id, message):
     """Log backend event to master.log"""
-    try:
-        with open("master.log", "a", encoding='utf-8') as f:
-            f.write(f"BACKEND LOG:\n")
-            f.write(f"{datetime.now().strftime('%H:%M:%S')} - {message}\n")
-    except Exception as e:
-        logger.warning(f"Could not write backend log: {str(e)}")
+    get_master_log().log(session_id, 'backend', message=message)
 
-def log_pipeline_to_master(session_id):
-    """Copy pipeline.log content to master.log"""
-    try:
-        if os.path.exists("pipeline.log"):
-            with open("pipeline.log", "r", encoding='utf-8') as pipeline_f:
-                pipeline_content = pipeline_f.read()
-            
-            with open("master.log", "a", encoding='utf-8') as master_f:
-                master_f.write(f"PIPELINE LOG:\n")
-                master_f.write(f"{datetime.now().strftime('%H:%M:%S')} - Starting video processing\n")
-                # Clean up the pipeline content for readability
-                lines = pipeline_content.split('\n')
-                for line in lines:
-                    if line.strip():
-                        # Extract timestamp and message for readability
-                        if ' - ' in line:
-                            timestamp_part = line.split(' - ')[0]
-                            message_part = ' - '.join(line.split(' - ')[1:])
-                            master_f.write(f"{timestamp_part} - {message_part}\n")
-                        else:
-                            master_f.write(f"{line}\n")
-                master_f.write(f"{datetime.now().strftime('%H:%M:%S')} - Pipeline processing completed\n\n")
-    except Exception as e:
-        logger.warning(f"Could not copy pipeline log: {str(e)}")
+def log_pipeline_to_master(session_id, pipeline_log="pipeline.log", events_file=None):
+    """Point master.log at the job's pipeline.log (and stage events) instead of copying them"""
+    get_master_log().log(session_id, 'pipeline', pipeline_log=str(pipeline_log),
+                         events=str(events_file) if events_file else None)
 
 def log_session_end(session_id, result, start_time):
     """Log session end to master.log"""
-    try:
-        end_time = datetime.now()
-        processing_time = (end_time - start_time).total_seconds()
-        
-        with open("master.log", "a", encoding='utf-8') as f:
-            f.write(f"RESULT:\n")
-            f.write(f"Status: {result.get('status', 'UNKNOWN')}\n")
-            f.write(f"Processing Time: {processing_time:.1f} seconds\n")
-            
-            if result.get('status') == 'SUCCESS':
-                short_clips = result.get('short_clips', [])
-                f.write(f"Output Files: {len(short_clips)} short clips\n")
-                for clip in short_clips:
-                    f.write(f"- {clip.get('filename', 'unknown')} ({clip.get('size', 0):.1f} MB)\n")
-            else:
-                f.write(f"Error: {result.get('error', 'Unknown error')}\n")
-            
-            f.write(f"Completed: {end_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 80 + "\n\n")
-    except Exception as e:
-        logger.warning(f"Could not write session end log: {str(e)}")
+    processing_time = (datetime.now() - start_time).total_seconds()
+    fields = {'status': result.get('status', 'UNKNOWN'), 'processing_seconds': round(processing_time, 1)}
+    if result.get('status') == 'SUCCESS':
+        fields['outputs'] = [{'filename': clip.get('filename', 'unknown'), 'size_mb': clip.get('size', 0)}
+                             for clip in result.get('short_clips', [])]
+    else:
+        fields['error'] = result.get('error', 'Unknown error')
+    get_master_log().log(session_id, 'session_end', **fields)
+
+def shutdown_master_log():
+    """Write out queued master log records before exiting"""
+    if master_log is not None:
+        master_log.close()
 
-def process_video_background(task_id, filename, user_phone="Unknown"):
-    """Process video in background thread"""
+def process_video_background(task_id, filename, user_phone="Unknown", resume=False):
+    """Process video in background thread (resume: continue from the job journal)"""
     start_time = datetime.now()
     
     try:
+        # Start only if no cancel landed since the job was dequeued, in one atomic step with the check
+        task_info = get_task_store().update(
+            task_id,
+            condition=lambda current: current.get('status') != 'CANCELLED' and not current.get('cancel_requested'),
+            status='PROCESSING',
+            message='Starting video processing...',
+            progress=0
+        )
+        if task_info is None or (get_task_store().get(task_id) or {}).get('cancel_requested'):
+            logger.info(f"⏭️ Not starting task {task_id}: it was cancelled")
+            return
+        
         # Log session start
         log_session_start(task_id, filename, user_phone)
         log_backend_event(task_id, f"Background processing started for task {task_id}: {filename}")
         
-        background_tasks[task_id] = {
-            'status': 'PROCESSING',
-            'message': 'Starting video processing...',
-            'progress': 0
-        }
-        
         logger.info(f"🔍 Starting background processing for task {task_id}: {filename}")
-        result = process_video_direct(filename)
-        
-        # Copy pipeline log to master log
-        log_pipeline_to_master(task_id)
-        
-        if result['status'] == 'SUCCESS':
-            background_tasks[task_id] = {
+        workspace = get_job_workspace(task_id)
+        result = process_video_direct(filename, workspace, resume)
+        
+        # Reference the job's pipeline log from the master log
+        log_pipeline_to_master(task_id, workspace.log_file, workspace.events_file)
+        
+        if result['status'] == 'CANCELLED':
+            get_task_store().update(task_id, status='CANCELLED', message='Processing cancelled',
+                                    progress=100, error=result['error'])
+            log_backend_event(task_id, "Processing cancelled")
+        elif result['status'] == 'SUCCESS':
+            get_task_store().set(task_id, {
                 'status': 'SUCCESS',
                 'message': 'Video processed successfully!',
                 'progress': 100,
                 'result': result
-            }
+            })
             log_backend_event(task_id, f"Processing completed successfully - {len(result.get('short_clips', []))} clips generated")
         else:
-            background_tasks[task_id] = {
+            get_task_store().set(task_id, {
                 'status': 'FAILURE',
                 'message': 'Video processing failed',
                 'progress': 100,
-                'error': result.get('error', 'Unknown error')
-            }
+                'error': result.get('error', 'Unknown error'),
+                'metrics': result.get('metrics')
+            })
             log_backend_event(task_id, f"Processing failed: {result.get('error', 'Unknown error')}")
         
         # Log session end
@@ -157,121 +175,132 @@ def process_video_background(task_id, filename, user_phone="Unknown"):
             
     except Exception as e:
         logger.error(f"❌ Background processing error for task {task_id}: {str(e)}")
-        background_tasks[task_id] = {
+        get_task_store().set(task_id, {
             'status': 'FAILURE',
             'message': 'Processing failed',
             'progress': 100,
             'error': str(e)
-        }
+        })
         log_backend_event(task_id, f"Unexpected error: {str(e)}")
         
         # Log session end with error
         error_result = {'status': 'FAILURE', 'error': str(e)}
         log_session_end(task_id, error_result, start_time)
 
-# Import the video processing function from run_pipeline
-def process_video_direct(filename):
-    """Process video directly without Celery"""
+# Return code reported for a pipeline run stopped by a cancel request
+CANCELLED_RETURN_CODE = -1
+
+# How often a running pipeline checks for a cancel request
+CANCEL_POLL_INTERVAL = 1
+
+def run_warm_pipeline(pool, task_id, file_path, workspace, resume, deadline):
+    """Run one job on a warm worker; the result mirrors a run_pipeline.py process"""
+    job = {'workspace': str(workspace.root), 'video': str(file_path), 'resume': resume}
+    
+    def cancel_requested():
+        return bool((get_task_store().get(task_id) or {}).get('cancel_requested'))
+    
     try:
-        # Clear previous logs and old output files
-        clear_pipeline_logs()
-        
-        # Get paths from config
-        input_folder, output_folder = get_config_paths()
-        
-        # Clean up old output files to avoid confusion
-        output_dir = Path(output_folder)
-        output_dir.mkdir(parents=True, exist_ok=True)
-        for old_file in output_dir.glob('*.mp4'):
+        succeeded = pool.run(job, deadline, cancel_requested, CANCEL_POLL_INTERVAL)
+    except subprocess.TimeoutExpired:
+        logger.error(f"❌ Task {task_id} exceeded its {deadline:.0f}s deadline, stopping its warm worker")
+        raise
+    if succeeded is None:
+        logger.info(f"🛑 Cancelled task {task_id}: its warm worker was stopped")
+        return subprocess.CompletedProcess(pool.command, CANCELLED_RETURN_CODE, '', 'Cancelled')
+    
+    # The job's log stands in for the process output
+    try:
+        output = workspace.log_file.read_text(encoding='utf-8', errors='replace')
+    except FileNotFoundError:
+        output = ''
+    errors = ''.join(line for line in output.splitlines(keepends=True) if ' - ERROR - ' in line)
+    return subprocess.CompletedProcess(pool.command, 0 if succeeded else 1, output, errors)
+
+def run_pipeline_process(task_id, file_path, workspace, resume=False):
+    """Run the pipeline for one job in its own process group.
+
+    A warm worker of the pool runs it when one is available, otherwise a fresh
+    run_pipeline.py process. The run is stopped (with every stage and ffmpeg
+    process below it) when the task is cancelled or when it exceeds the deadline
+    derived from the media duration; TimeoutExpired is raised in the latter case.
+    """
+    deadline = pipeline_deadline(load_master_config(), probe_duration(file_path))
+    pool = get_warm_pool()
+    if pool is not None:
+        try:
+            return run_warm_pipeline(pool, task_id, file_path, workspace, resume, deadline)
+        except RuntimeError as e:
+            logger.warning(f"⚠️ {str(e)}, starting a separate pipeline process")
+    
+    started = time.time()
+    command = ['python', 'run_pipeline.py', str(file_path), '--workspace', str(workspace.root)]
+    if resume:
+        command.append('--resume')
+    process = popen_group(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=Path(__file__).parent  # Run from the automationtool directory
+    )
+    stdout_parts, stderr_parts = [], []
+    try:
+        while True:
             try:
-                old_file.unlink()
-                logger.info(f"🗑️ Removed old output file: {old_file.name}")
-            except Exception as e:
-                logger.warning(f"⚠️ Could not remove old file {old_file.name}: {str(e)}")
-        
-        # Create input directory
-        input_dir = Path(input_folder)
-        input_dir.mkdir(exist_ok=True)
-        
+                stdout, stderr = process.communicate(timeout=CANCEL_POLL_INTERVAL)
+                stdout_parts.append(stdout or '')
+                stderr_parts.append(stderr or '')
+                return subprocess.CompletedProcess(process.args, process.returncode,
+                                                   ''.join(stdout_parts), ''.join(stderr_parts))
+            except subprocess.TimeoutExpired:
+                pass
+            
+            task_info = get_task_store().get(task_id) or {}
+            if task_info.get('cancel_requested'):
+                logger.info(f"🛑 Cancelling task {task_id}: stopping its pipeline processes")
+                kill_process_tree(process)
+                process.communicate()
+                return subprocess.CompletedProcess(process.args, CANCELLED_RETURN_CODE, '', 'Cancelled')
+            
+            if time.time() - started > deadline:
+                logger.error(f"❌ Task {task_id} exceeded its {deadline:.0f}s deadline, stopping its pipeline processes")
+                kill_process_tree(process)
+                stdout, stderr = process.communicate()
+                raise subprocess.TimeoutExpired(process.args, deadline, output=stdout, stderr=stderr)
+    finally:
+        release(process)
+
+# Import the video processing function from run_pipeline
+def process_video_direct(filename, workspace, resume=False):
+    """Process video directly without Celery, inside the job's own workspace"""
+    try:
         # Check if file exists first
-        file_path = input_dir / filename
+        file_path = workspace.input_dir / filename
         if not file_path.exists():
             raise FileNotFoundError(f"Input file not found: {file_path}")
         
         logger.info(f"File found: {file_path}")
         
-        # Clean up old input files (but keep the current one)
-        for old_file in input_dir.glob('*'):
-            if old_file.name != filename:  # Don't delete the current file
-                try:
-                    old_file.unlink()
-                    logger.info(f"🗑️ Removed old input file: {old_file.name}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not remove old file {old_file.name}: {str(e)}")
-        
-        # Run the pipeline
-        result = subprocess.run(
-            ['python', 'run_pipeline.py'],
-            capture_output=True,
-            text=True,
-            timeout=1800,  # 30 minute timeout
-            cwd=Path(__file__).parent  # Run from the automationtool directory
-        )
+        # Run the pipeline for this video only, with every output kept in the workspace
+        result = run_pipeline_process(workspace.job_id, file_path, workspace, resume)
+        
+        # Where the time went, from the pipeline's per-stage report
+        metrics = load_metrics(workspace.root, Path(filename).stem) or {}
+        
+        if result.returncode == CANCELLED_RETURN_CODE:
+            return {
+                'status': 'CANCELLED',
+                'error': 'Processing cancelled'
+            }
         
         if result.returncode == 0:
             # Get video base name (e.g., "test1min" from "test1min.mov")
             video_base_name = Path(filename).stem
             
-            # Scan for short clips that match this video's pattern
-            _, output_folder = get_config_paths()
-            output_dir = Path(output_folder)
-            
-            # DEBUG: Log the paths being searched
-            logger.info(f"🔍 DEBUG: Looking for shorts in output_dir: {output_dir}")
-            logger.info(f"🔍 DEBUG: Video base name: {video_base_name}")
-            logger.info(f"🔍 DEBUG: Pattern: {video_base_name}_short_*.mp4")
-            
-            # Find all short clips for this specific video
-            short_clips = []
-            pattern = f"{video_base_name}_short_*.mp4"
-            
-            # DEBUG: List all files in output directory
-            logger.info(f"🔍 DEBUG: All files in output_dir:")
-            for item in output_dir.rglob("*"):
-                if item.is_file():
-                    logger.info(f"🔍 DEBUG: Found file: {item}")
-            
-            # Look in main output directory first
-            for clip_file in output_dir.glob(pattern):
-                if clip_file.is_file():
-                    short_clips.append({
-                        'filename': clip_file.name,
-                        'size': round(clip_file.stat().st_size / (1024 * 1024), 2)  # Size in MB
-                    })
-                    logger.info(f"🔍 DEBUG: Found short in main dir: {clip_file}")
-            
-            # Also look in shorts subdirectory
-            shorts_dir = output_dir / "shorts"
-            logger.info(f"🔍 DEBUG: Checking shorts subdirectory: {shorts_dir}")
-            if shorts_dir.exists():
-                logger.info(f"🔍 DEBUG: Shorts directory exists, listing contents:")
-                for item in shorts_dir.rglob("*"):
-                    if item.is_file():
-                        logger.info(f"🔍 DEBUG: Found file in shorts dir: {item}")
-                
-                for clip_file in shorts_dir.glob(pattern):
-                    if clip_file.is_file():
-                        short_clips.append({
-                            'filename': clip_file.name,
-                            'size': round(clip_file.stat().st_size / (1024 * 1024), 2)  # Size in MB
-                        })
-                        logger.info(f"🔍 DEBUG: Found short in shorts dir: {clip_file}")
-            else:
-                logger.info(f"🔍 DEBUG: Shorts directory does not exist: {shorts_dir}")
-            
-            # Sort clips by name (short_1, short_2, etc.)
-            short_clips.sort(key=lambda x: x['filename'])
-            
+            # Everything the pipeline produced is listed in the video's result manifest
+            manifest = load_manifest(workspace.root, video_base_name) or {}
+            short_clips, processed_video = manifest_outputs(manifest, workspace.url_for(workspace.root) + "/")
             logger.info(f"🎬 Found {len(short_clips)} short clips for video: {video_base_name}")
             
             # Clean up input file after successful processing
@@ -281,43 +310,16 @@ def process_video_direct(filename):
                     logger.info(f"🗑️ Cleaned up input file after successful processing: {filename}")
             except Exception as e:
                 logger.warning(f"⚠️ Could not clean up input file {filename}: {str(e)}")
-            
-            # Return only short clips with proper URLs
-            short_clips_with_urls = []
-            for clip in short_clips:
-                # Check if clip is in shorts subdirectory
-                clip_path = output_dir / "shorts" / clip['filename']
-                if clip_path.exists():
-                    url = f'/output/shorts/{clip["filename"]}'
-                else:
-                    url = f'/output/{clip["filename"]}'
-                
-                short_clips_with_urls.append({
-                    'filename': clip['filename'],
-                    'url': url,
-                    'size': clip['size']
-                })
-            
-            # Check for processed video in processed directory
-            processed_video = None
-            processed_dir = output_dir / "processed"
-            processed_video_pattern = f"{video_base_name}_with_subs_trimmed.mp4"
-            processed_video_path = processed_dir / processed_video_pattern
-            
-            if processed_video_path.exists():
-                processed_video = {
-                    'filename': processed_video_path.name,
-                    'url': f'/output/processed/{processed_video_path.name}',
-                    'size': round(processed_video_path.stat().st_size / (1024 * 1024), 2)  # Size in MB
-                }
-                logger.info(f"📹 Found processed video: {processed_video_path}")
+            workspace.clean_temp()
             
             return {
                 'status': 'SUCCESS',
                 'message': f'Video processed successfully! Generated {len(short_clips)} short clips.',
-                'short_clips': short_clips_with_urls,
+                'short_clips': short_clips,
                 'processed_video': processed_video,
                 'video_base_name': video_base_name,
+                'job_id': workspace.job_id,
+                'metrics': metrics.get('summary'),
                 'stdout': result.stdout,
                 'file': str(file_path)
             }
@@ -342,6 +344,7 @@ def process_video_direct(filename):
                 'error': error_message,
                 'details': result.stderr,
                 'return_code': result.returncode,
+                'metrics': metrics.get('summary'),
                 'stdout': result.stdout
             }
             
@@ -366,22 +369,52 @@ def process_video_direct(filename):
             'details': str(e)
         }
 
-def clear_pipeline_logs():
-    """Clear pipeline logs before processing a new video"""
-    try:
-        log_file = Path('pipeline.log')
-        if log_file.exists():
-            log_file.unlink()
-            logger.info("🗑️ Cleared previous pipeline logs")
-    except Exception as e:
-        logger.warning(f"⚠️ Could not clear logs: {str(e)}")
+def get_job_workspace(job_id):
+    """Get (creating if needed) the workspace directory of a job"""
+    _, output_folder = get_config_paths()
+    return JobWorkspace.create(output_folder, job_id)
+
+def find_job_workspace(job_id):
+    """Get the workspace of an existing job, or None"""
+    _, output_folder = get_config_paths()
+    return JobWorkspace.open(output_folder, job_id)
+
+def manifest_outputs(manifest, url_prefix="/output/"):
+    """Short clips and processed video listed in a result manifest, as returned to clients"""
+    def describe(entry):
+        # The version in the URL lets browsers cache this exact file for good
+        version = f"?v={entry['version']}" if entry.get('version') else ""
+        described = {
+            'filename': Path(entry['path']).name,
+            'url': f"{url_prefix}{entry['path']}{version}",
+            'size': round(entry['size_bytes'] / (1024 * 1024), 2)  # Size in MB
+        }
+        described.update({key: entry[key] for key in ('duration', 'score', 'title') if key in entry})
+        return described
+    
+    short_clips = [describe(clip) for clip in manifest.get('clips', [])]
+    processed_video = manifest.get('processed_video')
+    return short_clips, describe(processed_video) if processed_video else None
+
+def adopt_legacy_upload():
+    """Move the newest video from the shared input folder into a new workspace"""
+    input_folder, _ = get_config_paths()
+    input_dir = Path(input_folder)
+    if not input_dir.exists():
+        return None
+    video_files = [f for f in input_dir.iterdir() if f.is_file() and f.suffix.lower() in VIDEO_EXTENSIONS]
+    if not video_files:
+        return None
+    video_file = max(video_files, key=lambda f: f.stat().st_mtime)
+    workspace = get_job_workspace(str(uuid.uuid4()))
+    shutil.move(str(video_file), str(workspace.input_dir / video_file.name))
+    logger.info(f"📦 Moved {video_file.name} into workspace {workspace.job_id}")
+    return workspace
 
 def get_config_paths():
     """Get input and output paths from config file"""
     try:
-        config_path = Path(__file__).parent / "config" / "master_config.json"
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        config = load_master_config()
         
         input_folder = config.get('input_folder', './input')
         output_folder = config.get('output_folder', './output')
@@ -390,7 +423,7 @@ def get_config_paths():
         input_folder = os.path.normpath(input_folder)
         output_folder = os.path.normpath(output_folder)
         
-        logger.info(f"📁 Using configured paths - Input: {input_folder}, Output: {output_folder}")
+        logger.debug(f"📁 Using configured paths - Input: {input_folder}, Output: {output_folder}")
         
         return input_folder, output_folder
     except Exception as e:
@@ -398,6 +431,168 @@ def get_config_paths():
         # Use local development default paths
         return './input', './output'
 
+def get_job_queue_config():
+    """Get job queue settings from master_config.json"""
+    defaults = {
+        'max_workers': 1,
+        'encoder_threads': 4,
+        'drain_timeout': 600,
+        'state_file': 'job_queue.json'
+    }
+    try:
+        defaults.update(load_master_config().get('job_queue', {}))
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read job queue config, using defaults: {str(e)}")
+    return defaults
+
+def get_upload_config():
+    """Get resumable upload settings from master_config.json"""
+    defaults = {
+        'max_size_mb': 4096,
+        'chunk_size_mb': 8
+    }
+    try:
+        defaults.update(load_master_config().get('uploads', {}))
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read upload config, using defaults: {str(e)}")
+    return defaults
+
+def get_task_store_config():
+    """Get task store settings from master_config.json"""
+    try:
+        return load_master_config().get('task_store', {})
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read task store config, using defaults: {str(e)}")
+        return {}
+
+def get_task_store():
+    """Create the task store on first use"""
+    global task_store
+    with task_store_lock:
+        if task_store is None:
+            task_store = create_task_store(get_task_store_config())
+        return task_store
+
+def get_admission_config():
+    """Get admission control settings from master_config.json"""
+    try:
+        return load_master_config().get('admission', {})
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read admission config, using defaults: {str(e)}")
+        return {}
+
+def get_cost_model():
+    """Create the processing-time model on first use"""
+    global cost_model
+    with cost_model_lock:
+        if cost_model is None:
+            try:
+                config = load_master_config()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not read cost model config, using defaults: {str(e)}")
+                config = {}
+            cost_model = create_cost_model(config.get('cost_model'), config.get('admission'), base_dir=project_root)
+        return cost_model
+
+def predict_job(media):
+    """Predicted processing time of a video, for the flow its orientation will take"""
+    try:
+        config = load_master_config()
+    except Exception:
+        config = {}
+    return get_cost_model().predict(media, expected_flow(media, config))
+
+def admit_job(media, prediction=None):
+    """Check a new job against the estimated backlog of the shared job queue"""
+    queue = get_job_queue()
+    snapshot = queue.snapshot()
+    running = [{'estimated_seconds': job['payload'].get('estimated_seconds', 0), 'started_at': job['started_at']}
+               for job in snapshot['running']]
+    pending = [{'estimated_seconds': job['payload'].get('estimated_seconds', 0)} for job in snapshot['pending']]
+    return check_admission(media, running, pending, queue.max_workers, get_admission_config(),
+                           estimated_seconds=prediction.total_seconds if prediction else None)
+
+def run_queued_job(task_id, payload):
+    """Entry point for job queue workers"""
+    task_info = get_task_store().get(task_id) or {}
+    if task_info.get('status') == 'CANCELLED':
+        logger.info(f"⏭️ Skipping cancelled task {task_id}")
+        return
+    process_video_background(task_id, payload['filename'], payload.get('user_phone', 'Unknown'),
+                             resume=payload.get('resume', False))
+
+def restore_queued_job(task_id, payload):
+    """Recreate task status for a job reloaded from the persisted queue"""
+    info = {
+        'status': 'QUEUED',
+        'message': 'Waiting for a free worker...',
+        'progress': 0,
+        'filename': payload.get('filename')
+    }
+    store = get_task_store()
+    # Keep the fields already stored (e.g. a cancel request); cancelled tasks stay cancelled and are skipped
+    if not store.create(task_id, info):
+        store.update(task_id, condition=lambda current: current.get('status') not in TERMINAL_STATUSES, **info)
+
+def get_job_queue():
+    """Create and start the job queue on first use.
+    
+    Every server process shares the queue's state (Redis with a Redis task store,
+    else the state file), so any of them can queue jobs; the one holding the
+    owner lease runs them, with the warm worker pool.
+    """
+    global job_queue
+    with job_queue_lock:
+        if job_queue is None:
+            queue_config = get_job_queue_config()
+            max_workers = queue_config['max_workers']
+            if max_workers == 'auto':
+                max_workers = default_worker_count(queue_config['encoder_threads'])
+            state = create_queue_state(Path(__file__).parent / queue_config['state_file'], get_task_store(), queue_config)
+            job_queue = JobQueue(
+                handler=run_queued_job,
+                max_workers=max_workers,
+                state=state,
+                on_restore=restore_queued_job,
+                on_owner=lambda: start_warm_pool(max_workers)
+            )
+            job_queue.start()
+        return job_queue
+
+def get_warm_pool_config():
+    """Get warm worker settings from master_config.json"""
+    try:
+        return load_master_config().get('warm_workers', {})
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read warm worker config, using defaults: {str(e)}")
+        return {}
+
+def start_warm_pool(size):
+    """Create the warm worker pool (one worker per job queue worker) and start preloading"""
+    global warm_pool
+    with warm_pool_lock:
+        if warm_pool is None:
+            warm_pool = create_warm_pool(get_warm_pool_config(), size, Path(__file__).parent)
+            if warm_pool is not None:
+                warm_pool.start()
+        return warm_pool
+
+def get_warm_pool():
+    """The warm worker pool, or None when warm workers are disabled"""
+    with warm_pool_lock:
+        return warm_pool
+
+def shutdown_job_queue():
+    """Stop admitting jobs and let running ones finish before exiting"""
+    if job_queue is not None:
+        job_queue.shutdown(timeout=get_job_queue_config()['drain_timeout'])
+    if warm_pool is not None:
+        warm_pool.shutdown()
+
+# Registered first so it runs last, after the job queue has drained
+atexit.register(shutdown_master_log)
+atexit.register(shutdown_job_queue)
+
 def validate_environment():
     """Validate that required environment variables and dependencies are available"""
     logger.info("🔍 Validating environment...")
@@ -491,6 +686,7 @@ UPLOAD_TEMPLATE = """
     
     <script>
         let currentTaskId = null;
+        let uploadedTaskId = null;
         let statusCheckInterval = null;
         
         document.getElementById('uploadForm').addEventListener('submit', async function(e) {
@@ -518,6 +714,7 @@ UPLOAD_TEMPLATE = """
                 
                 if (response.ok) {
                     if (result.status === 'UPLOADED') {
+                        uploadedTaskId = result.task_id;
                         statusDiv.innerHTML = '<div class="success">✅ Video uploaded successfully!</div>';
                         
                         // Hide upload form and show phone form
@@ -565,14 +762,15 @@ UPLOAD_TEMPLATE = """
                         'Content-Type': 'application/json',
                     },
                     body: JSON.stringify({
-                        phone_number: phoneNumber
+                        phone_number: phoneNumber,
+                        task_id: uploadedTaskId
                     })
                 });
                 
                 const result = await response.json();
                 
                 if (response.ok) {
-                    if (result.status === 'PROCESSING') {
+                    if (result.status === 'QUEUED' || result.status === 'PROCESSING') {
                         currentTaskId = result.task_id;
                         statusDiv.innerHTML = '<div class="info">✅ Video processing started! This may take a few minutes...</div>';
                         
@@ -629,7 +827,7 @@ UPLOAD_TEMPLATE = """
             const statusDiv = document.getElementById('status');
             const submitBtn = document.getElementById('submitBtn');
             
-            if (result.status === 'PROCESSING') {
+            if (result.status === 'QUEUED' || result.status === 'PROCESSING') {
                 statusDiv.innerHTML = `<div class="info">⏳ ${result.message || 'Processing video...'}</div>`;
             } else if (result.status === 'SUCCESS') {
                 statusDiv.innerHTML = '<div class="success">✅ Video processed successfully! Redirecting to result page...</div>';
@@ -670,6 +868,126 @@ def index():
     """Main page with file upload form"""
     return render_template_string(UPLOAD_TEMPLATE)
 
+TUS_VERSION = '1.0.0'
+
+def tus_headers(extra=None):
+    """Headers sent with every resumable upload response"""
+    upload_config = get_upload_config()
+    headers = {
+        'Tus-Resumable': TUS_VERSION,
+        'Tus-Version': TUS_VERSION,
+        'Tus-Extension': 'creation',
+        'Tus-Max-Size': str(int(upload_config['max_size_mb']) * 1024 * 1024),
+        'Cache-Control': 'no-store'
+    }
+    if extra:
+        headers.update(extra)
+    return headers
+
+def parse_upload_metadata(header):
+    """Decode a tus Upload-Metadata header ("key base64value, ...")"""
+    metadata = {}
+    for pair in filter(None, (item.strip() for item in (header or '').split(','))):
+        key, _, value = pair.partition(' ')
+        try:
+            metadata[key] = base64.b64decode(value).decode('utf-8') if value else ''
+        except Exception:
+            raise UploadError(f"Invalid Upload-Metadata value for {key}")
+    return metadata
+
+def find_chunked_upload(upload_id):
+    """Get the resumable upload with this ID, or None"""
+    workspace = find_job_workspace(upload_id)
+    if workspace is None:
+        return None
+    return ChunkedUpload.load(workspace)
+
+@app.route('/api/uploads', methods=['OPTIONS'])
+def api_upload_options():
+    """Advertise resumable upload capabilities"""
+    return ('', 204, tus_headers())
+
+@app.route('/api/uploads', methods=['POST'])
+def api_create_upload():
+    """Create a resumable upload and its job workspace"""
+    try:
+        data = request.get_json(silent=True) or {}
+        metadata = parse_upload_metadata(request.headers.get('Upload-Metadata'))
+        filename = Path(data.get('filename') or metadata.get('filename') or '').name
+        length = request.headers.get('Upload-Length', data.get('size'))
+        
+        if not filename:
+            return jsonify({'error': 'Filename is required'}), 400, tus_headers()
+        try:
+            length = int(length)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Upload-Length is required'}), 400, tus_headers()
+        
+        file_ext = Path(filename).suffix.lower()
+        if file_ext not in VIDEO_EXTENSIONS:
+            return jsonify({'error': f'Unsupported file type: {file_ext}. Supported types: {", ".join(sorted(VIDEO_EXTENSIONS))}'}), 400, tus_headers()
+        
+        upload_config = get_upload_config()
+        max_size_mb = int(upload_config['max_size_mb'])
+        if length > max_size_mb * 1024 * 1024:
+            return jsonify({'error': f'File too large. Maximum size: {max_size_mb}MB, your file: {length / (1024*1024):.1f}MB'}), 413, tus_headers()
+        
+        workspace = get_job_workspace(str(uuid.uuid4()))
+        upload = ChunkedUpload.create(workspace, filename, length)
+        upload_url = url_for('api_upload_chunk', upload_id=upload.upload_id)
+        logger.info(f"📤 Created resumable upload {upload.upload_id}: {filename} ({length / (1024*1024):.1f}MB)")
+        
+        return jsonify({
+            'task_id': upload.upload_id,
+            'upload_url': upload_url,
+            'filename': upload.filename,
+            'offset': upload.offset,
+            'length': upload.length,
+            'chunk_size': int(upload_config['chunk_size_mb']) * 1024 * 1024
+        }), 201, tus_headers({'Location': upload_url, 'Upload-Offset': str(upload.offset)})
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status, tus_headers()
+    except Exception as e:
+        logger.error(f"❌ Error creating upload: {str(e)}")
+        return jsonify({'error': 'Failed to create upload', 'details': str(e)}), 500, tus_headers()
+
+@app.route('/api/uploads/<upload_id>', methods=['HEAD'])
+def api_upload_offset(upload_id):
+    """Report how many bytes of an upload have been received"""
+    upload = find_chunked_upload(upload_id)
+    if upload is None:
+        return ('', 404, tus_headers())
+    return ('', 200, tus_headers({
+        'Upload-Offset': str(upload.offset),
+        'Upload-Length': str(upload.length)
+    }))
+
+@app.route('/api/uploads/<upload_id>', methods=['PATCH'])
+def api_upload_chunk(upload_id):
+    """Stream one chunk of an upload to disk"""
+    upload = find_chunked_upload(upload_id)
+    if upload is None:
+        return jsonify({'error': 'Upload not found'}), 404, tus_headers()
+    
+    if request.mimetype != 'application/offset+octet-stream':
+        return jsonify({'error': 'Content-Type must be application/offset+octet-stream'}), 415, tus_headers()
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Upload-Offset header is required'}), 400, tus_headers()
+    
+    try:
+        new_offset = upload.write_chunk(request.stream, offset)
+    except UploadError as e:
+        return jsonify({'error': str(e), 'offset': upload.offset}), e.status, tus_headers({'Upload-Offset': str(upload.offset)})
+    except Exception as e:
+        logger.warning(f"⚠️ Upload {upload_id} chunk interrupted at offset {upload.offset}: {str(e)}")
+        return jsonify({'error': 'Chunk interrupted', 'offset': upload.offset}), 500, tus_headers({'Upload-Offset': str(upload.offset)})
+    
+    if new_offset == upload.length:
+        logger.info(f"✅ Resumable upload {upload_id} complete: {upload.filename}")
+    return ('', 204, tus_headers({'Upload-Offset': str(new_offset)}))
+
 @app.route('/api/upload', methods=['POST'])
 def api_upload_file():
     """Handle file upload from frontend and process video directly"""
@@ -696,48 +1014,20 @@ def api_upload_file():
         if file_size > max_size:
             return jsonify({'error': f'File too large. Maximum size: 100MB, your file: {file_size / (1024*1024):.1f}MB'}), 400
         
-        # Get paths from config
-        input_folder, output_folder = get_config_paths()
-        
-        # Clean up old output files to avoid confusion
-        output_dir = Path(output_folder)
-        output_dir.mkdir(parents=True, exist_ok=True)
-        for old_file in output_dir.glob('*.mp4'):
-            try:
-                old_file.unlink()
-                logger.info(f"🗑️ Removed old output file: {old_file.name}")
-            except Exception as e:
-                logger.warning(f"⚠️ Could not remove old file {old_file.name}: {str(e)}")
-        
-        # Create input directory
-        input_dir = Path(input_folder)
-        input_dir.mkdir(exist_ok=True)
-        
-        # Clean up old input files (but keep the current upload)
-        for old_file in input_dir.glob('*'):
-            if old_file.name != file.filename:  # Don't delete the file we're about to save
-                try:
-                    old_file.unlink()
-                    logger.info(f"🗑️ Removed old input file: {old_file.name}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not remove old file {old_file.name}: {str(e)}")
-        
-        # Save uploaded file
-        file_path = input_dir / file.filename
+        # Save the upload into a fresh workspace for this job
+        workspace = get_job_workspace(str(uuid.uuid4()))
+        filename = Path(file.filename).name
+        file_path = workspace.input_dir / filename
         file.save(file_path)
         
         logger.info(f"File uploaded: {file_path}")
         
-        # Small delay to ensure file is fully written
-        import time
-        time.sleep(1)
-        
         # File uploaded successfully - wait for phone number before processing
         response_data = {
             'message': 'Video uploaded successfully! Please provide your phone number to start processing.',
             'status': 'UPLOADED',
-            'filename': file.filename,
-            'task_id': str(uuid.uuid4())  # Generate a task ID for the frontend
+            'filename': filename,
+            'task_id': workspace.job_id  # Processing reuses this ID and workspace
         }
         logger.info(f"✅ File uploaded successfully: {file.filename}")
         return jsonify(response_data)
@@ -767,48 +1057,20 @@ def upload_file():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Get paths from config
-        input_folder, output_folder = get_config_paths()
-        
-        # Clean up old output files to avoid confusion
-        output_dir = Path(output_folder)
-        output_dir.mkdir(parents=True, exist_ok=True)
-        for old_file in output_dir.glob('*.mp4'):
-            try:
-                old_file.unlink()
-                logger.info(f"🗑️ Removed old output file: {old_file.name}")
-            except Exception as e:
-                logger.warning(f"⚠️ Could not remove old file {old_file.name}: {str(e)}")
-        
-        # Create input directory
-        input_dir = Path(input_folder)
-        input_dir.mkdir(exist_ok=True)
-        
-        # Clean up old input files (but keep the current upload)
-        for old_file in input_dir.glob('*'):
-            if old_file.name != file.filename:  # Don't delete the file we're about to save
-                try:
-                    old_file.unlink()
-                    logger.info(f"🗑️ Removed old input file: {old_file.name}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not remove old file {old_file.name}: {str(e)}")
-        
-        # Save uploaded file
-        file_path = input_dir / file.filename
+        # Save the upload into a fresh workspace for this job
+        workspace = get_job_workspace(str(uuid.uuid4()))
+        filename = Path(file.filename).name
+        file_path = workspace.input_dir / filename
         file.save(file_path)
         
         logger.info(f"File uploaded: {file_path}")
         
-        # Small delay to ensure file is fully written
-        import time
-        time.sleep(1)
-        
         # File uploaded successfully - wait for phone number before processing
         response_data = {
             'message': 'Video uploaded successfully! Please provide your phone number to start processing.',
             'status': 'UPLOADED',
-            'filename': file.filename,
-            'task_id': str(uuid.uuid4())  # Generate a task ID for the frontend
+            'filename': filename,
+            'task_id': workspace.job_id  # Processing reuses this ID and workspace
         }
         logger.info(f"✅ File uploaded successfully: {file.filename}")
         return jsonify(response_data)
@@ -830,6 +1092,18 @@ def upload_file():
 def manual_cleanup(video_base_name):
     """Manually trigger cleanup for a specific video"""
     try:
+        # A job ID removes that job's whole workspace
+        workspace = find_job_workspace(video_base_name)
+        if workspace is not None:
+            workspace.remove()
+            get_task_store().delete(video_base_name)
+            logger.info(f"✅ Manual cleanup completed for job {video_base_name}: workspace removed")
+            return jsonify({
+                'message': f'Manual cleanup completed for job {video_base_name}: workspace removed',
+                'deleted_files': 1,
+                'video_base_name': video_base_name
+            })
+        
         # Get paths from config
         input_folder, output_folder = get_config_paths()
         output_dir = Path(output_folder)
@@ -837,38 +1111,46 @@ def manual_cleanup(video_base_name):
         # Find all files related to this video
         files_to_delete = []
         
-        # Main processed video
-        main_video_pattern = f"{video_base_name}_with_subs.mp4"
-        for file in output_dir.glob(main_video_pattern):
-            if file.is_file():
-                files_to_delete.append(file)
-        
-        # Short clips
-        short_clips_pattern = f"{video_base_name}_short_*.mp4"
-        for file in output_dir.glob(short_clips_pattern):
-            if file.is_file():
-                files_to_delete.append(file)
-        
-        # Trimmed video
-        trimmed_pattern = f"{video_base_name}_with_subs_trimmed.mp4"
-        trimmed_dir = output_dir / "processed"
-        if trimmed_dir.exists():
-            for file in trimmed_dir.glob(trimmed_pattern):
+        # Outputs listed in the video's result manifest, when the pipeline wrote one
+        manifest = load_manifest(output_dir, video_base_name)
+        if manifest is not None:
+            files_to_delete = manifest_files(output_dir, manifest) + [manifest_path(output_dir, video_base_name)]
+        else:
+            # Older outputs without a manifest are found by name
+            # Main processed video
+            main_video_pattern = f"{video_base_name}_with_subs.mp4"
+            for file in output_dir.glob(main_video_pattern):
                 if file.is_file():
                     files_to_delete.append(file)
         
-        # Subtitle files
-        subtitle_dir = output_dir / "subtitles"
-        if subtitle_dir.exists():
-            subtitle_pattern = f"{video_base_name}.srt"
-            for file in subtitle_dir.glob(subtitle_pattern):
+            # Short clips
+            short_clips_pattern = f"{video_base_name}_short_*.mp4"
+            for file in output_dir.glob(short_clips_pattern):
                 if file.is_file():
                     files_to_delete.append(file)
         
+            # Trimmed video
+            trimmed_pattern = f"{video_base_name}_with_subs_trimmed.mp4"
+            trimmed_dir = output_dir / "processed"
+            if trimmed_dir.exists():
+                for file in trimmed_dir.glob(trimmed_pattern):
+                    if file.is_file():
+                        files_to_delete.append(file)
+        
+            # Subtitle files
+            subtitle_dir = output_dir / "subtitles"
+            if subtitle_dir.exists():
+                subtitle_pattern = f"{video_base_name}.srt"
+                for file in subtitle_dir.glob(subtitle_pattern):
+                    if file.is_file():
+                        files_to_delete.append(file)
+        
         # Delete all found files
         deleted_count = 0
         for file_path in files_to_delete:
             try:
+                if not file_path.is_file():
+                    continue
                 file_path.unlink()
                 deleted_count += 1
                 logger.info(f"🗑️ Deleted: {file_path.name}")
@@ -887,6 +1169,21 @@ def manual_cleanup(video_base_name):
         logger.error(f"Error starting manual cleanup: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def reject_job(task_id, decision):
+    """Response for a job turned away by admission control"""
+    log_backend_event(task_id, f"Admission rejected: {decision.reason}")
+    logger.warning(f"⚠️ Rejected task {task_id}: {decision.reason} (wait {decision.wait_seconds:.0f}s)")
+    if decision.retry_after is None:
+        return jsonify({'error': decision.reason}), 413
+    response = jsonify({
+        'error': f'{decision.reason}, please try again later',
+        'retry_after': decision.retry_after,
+        'wait_seconds': round(decision.wait_seconds),
+        'eta_seconds': round(decision.eta_seconds)
+    })
+    response.headers['Retry-After'] = str(decision.retry_after)
+    return response, 429
+
 @app.route('/api/start-processing', methods=['POST'])
 def api_start_processing():
     """Start video processing after phone number is provided"""
@@ -897,52 +1194,84 @@ def api_start_processing():
         if not phone_number:
             return jsonify({'error': 'Phone number is required'}), 400
         
-        # Get paths from config
-        input_folder, output_folder = get_config_paths()
-        input_dir = Path(input_folder)
-        
-        # Find the uploaded video file (case-insensitive)
-        video_files = (list(input_dir.glob('*.mp4')) + list(input_dir.glob('*.MP4')) + 
-                      list(input_dir.glob('*.mov')) + list(input_dir.glob('*.MOV')) + 
-                      list(input_dir.glob('*.avi')) + list(input_dir.glob('*.AVI')) + 
-                      list(input_dir.glob('*.mkv')) + list(input_dir.glob('*.MKV')))
-        
-        # Debug logging
-        logger.info(f"🔍 Looking for video files in: {input_dir}")
-        logger.info(f"🔍 Found files: {list(input_dir.glob('*'))}")
-        logger.info(f"🔍 Video files found: {video_files}")
-        
-        if not video_files:
+        # Pick up the workspace created by the upload
+        task_id = data.get('task_id') or data.get('upload_id')
+        if task_id:
+            workspace = find_job_workspace(task_id)
+            if workspace is None:
+                return jsonify({'error': 'Upload not found. Please upload the video again.'}), 404
+        else:
+            # Legacy clients: adopt the newest video left in the shared input folder
+            workspace = adopt_legacy_upload()
+            if workspace is None:
+                return jsonify({'error': 'No video file found. Please upload a video first.'}), 400
+            task_id = workspace.job_id
+        
+        chunked_upload = ChunkedUpload.load(workspace)
+        if chunked_upload is not None and not chunked_upload.is_complete:
+            return jsonify({
+                'error': 'Upload is not complete yet',
+                'offset': chunked_upload.offset,
+                'length': chunked_upload.length
+            }), 409
+        
+        video_file = workspace.find_input_video()
+        logger.info(f"🔍 Video file found in workspace {task_id}: {video_file}")
+        if video_file is None:
             return jsonify({'error': 'No video file found. Please upload a video first.'}), 400
         
-        # Use the first (and should be only) video file
-        video_file = video_files[0]
         filename = video_file.name
-        
-        # Clear previous pipeline logs
-        clear_pipeline_logs()
-        
-        # Start background processing
-        task_id = str(uuid.uuid4())
-        logger.info(f"🔍 Starting background processing for: {filename} with task ID: {task_id} (Phone: {phone_number})")
+        media = probe_media(video_file)
         
         # Log backend events
         log_backend_event(task_id, f"API: POST /api/start-processing received")
         log_backend_event(task_id, f"Phone validation: SUCCESS")
         log_backend_event(task_id, f"Video file found: {filename}")
-        log_backend_event(task_id, f"Background task started")
         
-        # Start background thread
-        thread = threading.Thread(target=process_video_background, args=(task_id, filename, phone_number))
-        thread.daemon = True
-        thread.start()
+        with admission_lock:
+            # Turn the job away if the backlog would keep it waiting too long
+            prediction = predict_job(media)
+            decision = admit_job(media, prediction)
+            if not decision.admitted:
+                return reject_job(task_id, decision)
+            
+            # Queue the job for the worker pool
+            logger.info(f"🔍 Queueing background processing for: {filename} with task ID: {task_id} (Phone: {phone_number})")
+            
+            # Claim the task atomically so a double submit cannot queue it twice
+            created = get_task_store().create(task_id, {
+                'status': 'QUEUED',
+                'message': 'Waiting for a free worker...',
+                'progress': 0,
+                'filename': filename,
+                'estimated_seconds': round(decision.estimated_seconds),
+                'eta': time.time() + decision.eta_seconds,
+                'prediction': prediction.to_dict()
+            })
+            if not created:
+                return jsonify({'error': 'Processing already started for this upload', 'task_id': task_id}), 409
+            try:
+                queue_position = get_job_queue().submit(task_id, {
+                    'filename': filename,
+                    'user_phone': phone_number,
+                    'estimated_seconds': decision.estimated_seconds
+                })
+            except RuntimeError as e:
+                get_task_store().delete(task_id)
+                return jsonify({'error': 'Server is shutting down, please retry shortly', 'details': str(e)}), 503
+        
+        log_backend_event(task_id, f"Background task queued at position {queue_position} (ETA {decision.eta_seconds:.0f}s)")
         
         # Return task ID immediately
         response_data = {
-            'message': 'Video processing started! This may take a few minutes.',
+            'message': 'Video queued for processing! This may take a few minutes.',
             'task_id': task_id,
-            'status': 'PROCESSING',
-            'filename': filename
+            'status': 'QUEUED',
+            'queue_position': queue_position,
+            'filename': filename,
+            'estimated_seconds': round(decision.estimated_seconds),
+            'eta_seconds': round(decision.eta_seconds),
+            'prediction': prediction.to_dict()
         }
         logger.info(f"🔍 Returning task ID: {task_id}")
         return jsonify(response_data)
@@ -975,32 +1304,256 @@ def api_log_frontend():
 @app.route('/api/task/<task_id>')
 def api_get_task_status(task_id):
     """Get status of background task (API endpoint for frontend)"""
-    if task_id not in background_tasks:
+    task_info = get_task_store().get(task_id)
+    if task_info is None:
         return jsonify({'error': 'Task not found'}), 404
     
-    task_info = background_tasks[task_id]
+    task_info = with_stage_progress(task_id, with_queue_position(task_id, task_info))
+    return jsonify(task_info)
+
+@app.route('/api/task/<task_id>', methods=['DELETE'])
+def api_cancel_task(task_id):
+    """Cancel a queued or running task, stopping all of its processes"""
+    store = get_task_store()
+    task_info = store.get(task_id)
+    if task_info is None:
+        return jsonify({'error': 'Task not found'}), 404
+    if task_info.get('status') in TERMINAL_STATUSES:
+        return jsonify({'error': f"Task already finished with status {task_info['status']}", 'status': task_info['status']}), 409
     
-    # Log backend polling
-    log_backend_event(task_id, f"API: GET /task/{task_id} - Status: {task_info.get('status', 'UNKNOWN')}")
+    if task_info.get('status') == 'QUEUED':
+        # Not started yet: drop it from the shared queue (a worker that already took it skips it)
+        get_job_queue().cancel(task_id)
+        task_info = store.update(task_id, status='CANCELLED', message='Processing cancelled', cancel_requested=True)
+    else:
+        # Running: the worker watching this flag kills the pipeline's process group
+        task_info = store.update(task_id, cancel_requested=True, message='Cancelling...')
     
-    return jsonify(task_info)
+    log_backend_event(task_id, "API: DELETE /api/task - cancel requested")
+    logger.info(f"🛑 Cancel requested for task {task_id}")
+    return jsonify({'task_id': task_id, 'status': task_info.get('status') if task_info else 'CANCELLED',
+                    'message': 'Cancellation requested'}), 202
+
+# Statuses a task cannot be resumed from
+UNRESUMABLE_STATUSES = {'QUEUED', 'PROCESSING', 'SUCCESS'}
+
+@app.route('/api/task/<task_id>/resume', methods=['POST'])
+def api_resume_task(task_id):
+    """Re-queue a failed or cancelled task, continuing from the first stage it did not complete"""
+    workspace = find_job_workspace(task_id)
+    if workspace is None:
+        return jsonify({'error': 'Task not found'}), 404
+    
+    store = get_task_store()
+    task_info = store.get(task_id) or {}
+    status = task_info.get('status')
+    if status in ('QUEUED', 'PROCESSING'):
+        return jsonify({'error': 'Task is still running', 'status': status}), 409
+    if status == 'SUCCESS':
+        return jsonify({'error': 'Task already completed', 'status': status}), 409
+    
+    video_file = workspace.find_input_video()
+    if video_file is None:
+        return jsonify({'error': 'The source video of this task is no longer available'}), 410
+    
+    data = request.get_json(silent=True) or {}
+    media = probe_media(video_file)
+    with admission_lock:
+        decision = admit_job(media, predict_job(media))
+        if not decision.admitted:
+            return reject_job(task_id, decision)
+        
+        queued = {
+            'status': 'QUEUED',
+            'message': 'Waiting for a free worker to resume...',
+            'progress': 0,
+            'filename': video_file.name,
+            'estimated_seconds': round(decision.estimated_seconds),
+            'eta': time.time() + decision.eta_seconds,
+            'cancel_requested': False,
+            'error': None
+        }
+        # Checked and claimed in one step, so concurrent resume requests queue the job only once
+        if task_info:
+            claimed = store.update(task_id, condition=lambda current: current.get('status') not in UNRESUMABLE_STATUSES,
+                                   **queued) is not None
+        else:
+            claimed = store.create(task_id, queued)
+        if not claimed:
+            current = store.get(task_id) or {}
+            return jsonify({'error': 'Task is already being resumed', 'status': current.get('status')}), 409
+        try:
+            queue_position = get_job_queue().submit(task_id, {
+                'filename': video_file.name,
+                'user_phone': data.get('phone_number', 'Unknown'),
+                'estimated_seconds': decision.estimated_seconds,
+                'resume': True
+            })
+        except RuntimeError as e:
+            if task_info:
+                store.set(task_id, task_info)
+            else:
+                store.delete(task_id)
+            return jsonify({'error': 'Server is shutting down, please retry shortly', 'details': str(e)}), 503
+    
+    log_backend_event(task_id, f"API: POST /api/task/resume - queued at position {queue_position}")
+    logger.info(f"⏯️ Resuming task {task_id}")
+    return jsonify({
+        'message': 'Task queued to resume',
+        'task_id': task_id,
+        'status': 'QUEUED',
+        'queue_position': queue_position,
+        'estimated_seconds': round(decision.estimated_seconds),
+        'eta_seconds': round(decision.eta_seconds)
+    }), 202
+
+@app.route('/api/task/<task_id>/prediction')
+def api_task_prediction(task_id):
+    """Predicted processing time of a task, its live ETA and, once done, the actual time"""
+    task_info = get_task_store().get(task_id)
+    workspace = find_job_workspace(task_id)
+    if task_info is None and workspace is None:
+        return jsonify({'error': 'Task not found'}), 404
+    
+    task_info = task_info or {}
+    eta = load_eta(workspace.root) if workspace is not None else None
+    response = {
+        'task_id': task_id,
+        'status': task_info.get('status'),
+        'prediction': (eta or {}).get('prediction') or task_info.get('prediction')
+    }
+    if eta:
+        response.update({key: eta[key] for key in ('eta', 'remaining_seconds', 'elapsed_seconds', 'pace', 'completed_stages')})
+    
+    filename = task_info.get('filename')
+    metrics = load_metrics(workspace.root, Path(filename).stem) if workspace is not None and filename else None
+    if metrics and task_info.get('status') in TERMINAL_STATUSES:
+        actual = metrics['summary']
+        response['actual'] = {'wall_seconds': actual['wall_seconds'], 'stages': actual['stages']}
+        predicted = (response['prediction'] or {}).get('total_seconds')
+        if predicted:
+            response['ratio'] = round(actual['wall_seconds'] / predicted, 2)
+    return jsonify(response)
+
+@app.route('/api/predictions')
+def api_predictions():
+    """Predicted vs actual processing time of recent jobs, with outliers flagged"""
+    limit = request.args.get('limit', 50, type=int)
+    samples = get_cost_model().accuracy(max(1, min(limit, 500)))
+    if request.args.get('outliers'):
+        samples = [sample for sample in samples if sample['outlier']]
+    return jsonify({'count': len(samples), 'samples': samples})
 
 @app.route('/task/<task_id>')
 def get_task_status(task_id):
     """Get status of background task (legacy endpoint)"""
-    if task_id not in background_tasks:
+    task_info = get_task_store().get(task_id)
+    if task_info is None:
         return jsonify({'error': 'Task not found'}), 404
     
-    task_info = background_tasks[task_id]
+    task_info = with_stage_progress(task_id, with_queue_position(task_id, task_info))
     return jsonify(task_info)
 
+def with_queue_position(task_id, task_info):
+    """Add the live queue position to a queued task's status"""
+    if task_info.get('status') != 'QUEUED':
+        return task_info
+    task_info = dict(task_info)
+    position = get_job_queue().position(task_id)
+    if position:
+        task_info['queue_position'] = position
+        task_info['message'] = f'Waiting for a free worker ({position} in queue)...'
+    return task_info
+
+def with_stage_progress(task_id, task_info):
+    """Add the latest pipeline stage and progress to a running task's status"""
+    if task_info.get('status') != 'PROCESSING':
+        return task_info
+    workspace = find_job_workspace(task_id)
+    event = last_event(workspace.events_file, LIFECYCLE_STATUSES) if workspace is not None else None
+    if event is None:
+        return task_info
+    task_info = dict(task_info)
+    task_info['stage'] = event.get('stage')
+    task_info['progress'] = event.get('progress', task_info.get('progress', 0))
+    if event.get('message'):
+        task_info['message'] = event['message']
+    # Completion time refined by the pipeline as stages finish
+    eta = load_eta(workspace.root)
+    if eta:
+        task_info['eta'] = eta['eta']
+        task_info['remaining_seconds'] = eta['remaining_seconds']
+    return task_info
+
+SSE_POLL_INTERVAL = 0.5
+SSE_HEARTBEAT_INTERVAL = 15
+
+def format_sse(event, data, event_id=None):
+    """Encode one Server-Sent Event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+@app.route('/api/task/<task_id>/events')
+def api_task_events(task_id):
+    """Stream queue position, stage transitions, clip progress, produced files and warnings as Server-Sent Events"""
+    if task_id not in get_task_store():
+        return jsonify({'error': 'Task not found'}), 404
+    
+    try:
+        offset = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0)
+    except ValueError:
+        offset = 0
+    
+    def generate():
+        nonlocal offset
+        last_status = None
+        last_sent = time.time()
+        # The workspace is resolved once; only looked up again while it does not exist yet
+        workspace = find_job_workspace(task_id)
+        yield "retry: 3000\n\n"
+        while True:
+            task_info = with_queue_position(task_id, get_task_store().get(task_id) or {'status': 'UNKNOWN'})
+            if workspace is None:
+                workspace = find_job_workspace(task_id)
+            
+            if workspace is not None:
+                events, offset = read_events(workspace.events_file, offset)
+                for event_offset, event in events:
+                    # Produced files and warnings have their own event names; 'stage' drives the progress bar
+                    name = event.get('status') if event.get('status') in (ARTIFACT, WARNING) else 'stage'
+                    yield format_sse(name, event, event_offset)
+                    last_sent = time.time()
+            
+            status = (task_info.get('status'), task_info.get('queue_position'))
+            if status != last_status:
+                last_status = status
+                terminal = task_info.get('status') in TERMINAL_STATUSES or task_info.get('status') == 'UNKNOWN'
+                yield format_sse('done' if terminal else 'status', task_info)
+                last_sent = time.time()
+                if terminal:
+                    return
+            
+            if time.time() - last_sent >= SSE_HEARTBEAT_INTERVAL:
+                yield ": keep-alive\n\n"
+                last_sent = time.time()
+            time.sleep(SSE_POLL_INTERVAL)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Let nginx pass events through unbuffered
+    })
+
 @app.route('/api/task/<task_id>/result')
 def api_get_task_result(task_id):
     """Get result of completed task (API endpoint for frontend)"""
-    if task_id not in background_tasks:
+    task_info = get_task_store().get(task_id)
+    if task_info is None:
         return jsonify({'error': 'Task not found'}), 404
     
-    task_info = background_tasks[task_id]
     if task_info['status'] == 'SUCCESS':
         result = task_info.get('result', {})
         return jsonify({
@@ -1018,15 +1571,15 @@ def api_get_task_result(task_id):
 @app.route('/task/<task_id>/result')
 def get_task_result(task_id):
     """Get result of completed task (legacy endpoint)"""
-    if task_id not in background_tasks:
+    task_info = get_task_store().get(task_id)
+    if task_info is None:
         return jsonify({'error': 'Task not found'}), 404
     
-    task_info = background_tasks[task_id]
     if task_info['status'] == 'SUCCESS':
         result = task_info.get('result', {})
         video_base_name = result.get('video_base_name')
         if video_base_name:
-            return redirect(url_for('show_result', video_base_name=video_base_name))
+            return redirect(url_for('show_result', video_base_name=video_base_name, task_id=task_id))
         else:
             return jsonify({'error': 'No result available'}), 400
     else:
@@ -1035,7 +1588,12 @@ def get_task_result(task_id):
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'message': 'Video automation pipeline is running'})
+    return jsonify({
+        'status': 'healthy',
+        'message': 'Video automation pipeline is running',
+        'queue': job_queue.stats() if job_queue is not None else None,
+        'task_store': type(get_task_store()).__name__
+    })
 
 @app.route('/debug')
 def debug_info():
@@ -1072,9 +1630,10 @@ def debug_info():
 
 @app.route('/logs')
 def get_logs():
-    """Get recent logs"""
+    """Get recent logs (of one job when task_id is given)"""
     try:
-        log_file = Path('pipeline.log')
+        workspace = find_job_workspace(request.args.get('task_id'))
+        log_file = workspace.log_file if workspace is not None else Path('pipeline.log')
         if log_file.exists():
             with open(log_file, 'r', encoding='utf-8') as f:
                 logs = f.read()
@@ -1084,6 +1643,33 @@ def get_logs():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def show_manifest_result(manifest, video_base_name, log_file, url_prefix="/output/"):
+    """Render the result page from a video's result manifest"""
+    short_clips, main_video = manifest_outputs(manifest, url_prefix)
+    for output in short_clips + ([main_video] if main_video else []):
+        output['size'] = f"{output['size']} MB"
+    
+    logs = "No logs available yet."
+    if log_file.exists():
+        try:
+            with open(log_file, 'r', encoding='utf-8') as f:
+                logs = f.read()
+        except Exception as e:
+            logs = f"Error reading logs: {str(e)}"
+    
+    return render_template('result.html',
+                         main_video=main_video,
+                         short_clips=short_clips,
+                         video_base_name=video_base_name,
+                         timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                         logs=logs)
+
+def show_workspace_result(workspace, video_base_name):
+    """Render the result page for a job workspace"""
+    manifest = load_manifest(workspace.root, video_base_name) or {}
+    return show_manifest_result(manifest, video_base_name, workspace.log_file,
+                                workspace.url_for(workspace.root) + "/")
+
 @app.route('/result')
 def show_result():
     """Display processed video with download and logs"""
@@ -1093,11 +1679,18 @@ def show_result():
         if not video_base_name:
             return jsonify({'error': 'No video base name specified'}), 400
         
+        workspace = find_job_workspace(request.args.get('task_id'))
+        if workspace is not None:
+            return show_workspace_result(workspace, video_base_name)
         
         _, output_folder = get_config_paths()
         output_dir = Path(output_folder)
         
-        # Look for short clips
+        manifest = load_manifest(output_dir, video_base_name)
+        if manifest is not None:
+            return show_manifest_result(manifest, video_base_name, Path('pipeline.log'))
+        
+        # Older outputs without a manifest: look for short clips by name
         short_clips = []
         pattern = f"{video_base_name}_short_*.mp4"
         
@@ -1162,37 +1755,31 @@ def show_result():
         logger.error(f"Error in show_result: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def get_media_delivery_config():
+    """Get media delivery settings from master_config.json"""
+    try:
+        return load_master_config().get('media_delivery', {})
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read media delivery config, using defaults: {str(e)}")
+        return {}
+
 @app.route('/output/<path:filename>')
 def serve_video(filename):
     """Serve output video files"""
-    try:
-        _, output_folder = get_config_paths()
-        return send_from_directory(output_folder, filename)
-    except Exception as e:
-        logger.error(f"Error serving video {filename}: {str(e)}")
-        return jsonify({'error': f'File not found: {filename}'}), 404
+    _, output_folder = get_config_paths()
+    return serve_media(output_folder, filename, get_media_delivery_config())
 
 @app.route('/output/shorts/<path:filename>')
 def serve_short_video(filename):
     """Serve short video files from shorts subdirectory"""
-    try:
-        _, output_folder = get_config_paths()
-        shorts_dir = Path(output_folder) / "shorts"
-        return send_from_directory(shorts_dir, filename)
-    except Exception as e:
-        logger.error(f"Error serving short video {filename}: {str(e)}")
-        return jsonify({'error': f'File not found: {filename}'}), 404
+    _, output_folder = get_config_paths()
+    return serve_media(output_folder, f"shorts/{filename}", get_media_delivery_config())
 
 @app.route('/output/processed/<path:filename>')
 def serve_processed_video(filename):
     """Serve processed video files from processed subdirectory"""
-    try:
-        _, output_folder = get_config_paths()
-        processed_dir = Path(output_folder) / "processed"
-        return send_from_directory(processed_dir, filename)
-    except Exception as e:
-        logger.error(f"Error serving processed video {filename}: {str(e)}")
-        return jsonify({'error': f'File not found: {filename}'}), 404
+    _, output_folder = get_config_paths()
+    return serve_media(output_folder, f"processed/{filename}", get_media_delivery_config())
 
 if __name__ == '__main__':
     # Validate environment before starting
@@ -1201,7 +1788,11 @@ if __name__ == '__main__':
     # Get port from environment (Railway sets this)
     port = int(os.environ.get('PORT', 8000))
     
+    # Join the job queue (running its workers and resuming persisted jobs if no other server does) before accepting requests
+    get_job_queue()
+    
+    # Exit through atexit on SIGTERM so running jobs can drain
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
     logger.info(f"🚀 Starting web server on port {port}")
-    # Increase timeout for video processing
-    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
     app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
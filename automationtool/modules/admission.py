@@ -0,0 +1,102 @@
+"""
+Admission control for processing jobs.
+
+Every new job gets a processing-cost estimate from its probed duration and
+resolution. Together with the estimates of the jobs already queued or running,
+that gives the time the new job would wait for a worker. Jobs that would wait
+longer than the configured limit are turned away with a retry time, so the jobs
+that are accepted finish on schedule instead of all slowing down together.
+"""
+
+import heapq
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# 1080p, the resolution the per-second cost is calibrated for
+REFERENCE_PIXELS = 1920 * 1080
+
+DEFAULT_ADMISSION_CONFIG = {
+    'enabled': True,
+    'base_seconds': 60,
+    'seconds_per_media_second': 3.0,
+    'resolution_exponent': 0.5,
+    'default_media_seconds': 600,
+    'max_wait_seconds': 1800,
+    'max_media_seconds': 3 * 3600
+}
+
+
+@dataclass
+class AdmissionDecision:
+    """Outcome of an admission check"""
+    admitted: bool
+    estimated_seconds: float
+    wait_seconds: float
+    eta_seconds: float
+    retry_after: Optional[int] = None
+    reason: Optional[str] = None
+
+
+def estimate_processing_seconds(media: Optional[Dict], config: Dict) -> float:
+    """Estimated wall-clock seconds to process a video
+
+    Cost grows linearly with duration and sub-linearly with pixel count (most of
+    the time goes to transcription and fixed-size short encodes, not decoding).
+    """
+    media = media or {}
+    duration = media.get('duration') or config['default_media_seconds']
+    width, height = media.get('width'), media.get('height')
+    resolution_factor = 1.0
+    if width and height:
+        resolution_factor = ((width * height) / REFERENCE_PIXELS) ** config['resolution_exponent']
+    return config['base_seconds'] + config['seconds_per_media_second'] * duration * resolution_factor
+
+
+def worker_free_times(running: List[Dict], pending: List[Dict], max_workers: int, now: float) -> List[float]:
+    """Seconds from now until each worker is free, after the current backlog is served FIFO"""
+    free = [0.0] * max_workers
+    for index, job in enumerate(running[:max_workers]):
+        remaining = job['estimated_seconds'] - (now - job['started_at'])
+        free[index] = max(0.0, remaining)
+    heapq.heapify(free)
+    for job in pending:
+        start = heapq.heappop(free)
+        heapq.heappush(free, start + job['estimated_seconds'])
+    return sorted(free)
+
+
+def check_admission(media: Optional[Dict], running: List[Dict], pending: List[Dict],
+                    max_workers: int, config: Optional[Dict] = None,
+                    estimated_seconds: Optional[float] = None) -> AdmissionDecision:
+    """Decide whether a new job can be accepted
+
+    Args:
+        media: Probe result of the new video (duration, width, height)
+        running: Running jobs as dicts with estimated_seconds and started_at
+        pending: Queued jobs as dicts with estimated_seconds, in queue order
+        max_workers: Number of jobs processed in parallel
+        config: ``admission`` config section
+        estimated_seconds: Processing time of the new job from the cost model (default: static estimate)
+    """
+    config = dict(DEFAULT_ADMISSION_CONFIG, **(config or {}))
+    estimated = estimated_seconds if estimated_seconds is not None else estimate_processing_seconds(media, config)
+    free = worker_free_times(running, pending, max(1, max_workers), time.time())
+    wait = free[0]
+    decision = AdmissionDecision(True, estimated, wait, wait + estimated)
+
+    if not config['enabled']:
+        return decision
+
+    duration = (media or {}).get('duration')
+    if duration and duration > config['max_media_seconds']:
+        decision.admitted = False
+        decision.reason = (f"Video is too long ({duration / 60:.0f} min); "
+                           f"the limit is {config['max_media_seconds'] / 60:.0f} min")
+        return decision
+
+    if wait > config['max_wait_seconds']:
+        decision.admitted = False
+        decision.retry_after = int(wait - config['max_wait_seconds']) + 1
+        decision.reason = "Server is at capacity"
+    return decision
@@ -0,0 +1,244 @@
+"""
+Content-addressed cache of stage outputs.
+
+A stage's outputs are stored under a key that hashes everything they were made
+from: the content of the input files, the settings the stage reads and the
+stage's version. Running the same video again therefore skips transcription,
+trimming, subtitle burning and every clip encode whose inputs did not change,
+even in a different job workspace.
+
+Inputs that are themselves cached outputs are identified by the key they were
+made under, so only the source video is ever hashed. Entries are evicted least
+recently used first once the cache grows past its size cap. Files are copied
+in and out (never linked), so later steps that rewrite an output in place cannot
+corrupt the cache.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARTIFACT_CACHE_CONFIG = {
+    'enabled': True,
+    'path': 'artifact_cache',
+    'max_size_mb': 20480
+}
+
+# Bump to invalidate every entry, e.g. when the entry layout changes
+CACHE_FORMAT_VERSION = 1
+
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _stat_signature(path: Path):
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ArtifactCache:
+    """Stage outputs stored by the hash of their inputs"""
+
+    def __init__(self, root, max_size_bytes: int, enabled: bool = True):
+        """
+        Args:
+            root: Cache directory, shared by all jobs
+            max_size_bytes: Total size above which least recently used entries are evicted
+            enabled: A disabled cache never hits and stores nothing
+        """
+        self.root = Path(root)
+        self.max_size_bytes = int(max_size_bytes)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # File digests of this process, keyed by path and validated by size and mtime
+        self._digests: Dict[str, tuple] = {}
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def file_digest(self, path) -> str:
+        """Content digest of an input file, or the key it was produced under"""
+        path = Path(path).expanduser().resolve()
+        signature = _stat_signature(path)
+        with self._lock:
+            known = self._digests.get(str(path))
+        if known and known[0] == signature:
+            return known[1]
+
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        self._remember(path, digest)
+        return digest
+
+    def _remember(self, path: Path, digest: str):
+        with self._lock:
+            self._digests[str(path)] = (_stat_signature(path), digest)
+
+    def key(self, stage: str, version: int, inputs: Sequence = (), params: Optional[Dict] = None) -> Optional[str]:
+        """Key of a stage run, or None if the cache is off or an input cannot be read
+
+        Args:
+            stage: Stage name
+            version: Stage version; bump it when the stage's output changes for the same inputs
+            inputs: Input files
+            params: Settings that affect the output (must be JSON-serializable)
+        """
+        if not self.enabled:
+            return None
+        try:
+            description = {
+                'format': CACHE_FORMAT_VERSION,
+                'stage': stage,
+                'version': version,
+                'inputs': [self.file_digest(path) for path in inputs],
+                'params': params or {}
+            }
+        except OSError as e:
+            logger.warning(f"⚠️ Not caching {stage}: {str(e)}")
+            return None
+        encoded = json.dumps(description, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def fetch(self, key: Optional[str], outputs: List[Path]) -> bool:
+        """Copy a cached entry's files to the output paths; False on a miss"""
+        if not key:
+            return False
+        entry = self._entry_dir(key)
+        try:
+            with open(entry / "meta.json", 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('files') != len(outputs):
+                return False
+            for index, output in enumerate(outputs):
+                output = Path(output)
+                output.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = output.with_name(f".{output.name}.{uuid.uuid4().hex}.tmp")
+                shutil.copyfile(entry / str(index), temp_path)
+                os.replace(temp_path, output)
+                self._remember(output.resolve(), f"{key}:{index}")
+            # Entry directory mtime is the last-used time for eviction
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"⚠️ Could not restore cached {key[:12]}: {str(e)}")
+            return False
+        logger.info(f"♻️ Reused cached {meta.get('stage', 'artifact')} ({key[:12]})")
+        return True
+
+    def store(self, key: Optional[str], stage: str, outputs: List[Path]):
+        """Copy a stage's output files into the cache"""
+        if not key:
+            return
+        outputs = [Path(output) for output in outputs]
+        entry = self._entry_dir(key)
+        staging = self.root / "tmp" / f"{key}.{uuid.uuid4().hex}"
+        try:
+            staging.mkdir(parents=True, exist_ok=True)
+            size = 0
+            for index, output in enumerate(outputs):
+                shutil.copyfile(output, staging / str(index))
+                size += output.stat().st_size
+            with open(staging / "meta.json", 'w', encoding='utf-8') as f:
+                json.dump({'stage': stage, 'files': len(outputs), 'size_bytes': size,
+                           'names': [output.name for output in outputs], 'created': time.time()}, f)
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                # Another job stored the same entry first
+                shutil.rmtree(staging, ignore_errors=True)
+        except Exception as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            logger.warning(f"⚠️ Could not cache {stage} output: {str(e)}")
+            return
+        for index, output in enumerate(outputs):
+            self._remember(output.resolve(), f"{key}:{index}")
+        self.evict()
+
+    def fetch_json(self, key: Optional[str]) -> Optional[Dict]:
+        """Document stored with store_json, or None on a miss"""
+        if not key:
+            return None
+        entry = self._entry_dir(key)
+        try:
+            with open(entry / "meta.json", 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('files') != 1:
+                return None
+            with open(entry / "0", 'r', encoding='utf-8') as f:
+                document = json.load(f)
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read cached {key[:12]}: {str(e)}")
+            return None
+        logger.info(f"♻️ Reused cached {meta.get('stage', 'artifact')} ({key[:12]})")
+        return document
+
+    def store_json(self, key: Optional[str], stage: str, document: Dict):
+        """Store a JSON-serializable document as a one-file entry"""
+        if not key:
+            return
+        path = self.root / "tmp" / f"{key}.{uuid.uuid4().hex}.json"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(document, f, ensure_ascii=False)
+        except Exception as e:
+            path.unlink(missing_ok=True)
+            logger.warning(f"⚠️ Could not cache {stage} output: {str(e)}")
+            return
+        try:
+            self.store(key, stage, [path])
+        finally:
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self._digests.pop(str(path.resolve()), None)
+
+    def entries(self) -> List[Dict]:
+        """Cached entries with path, size and last-used time"""
+        entries = []
+        for meta_file in self.root.glob("??/*/meta.json"):
+            try:
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                entries.append({'path': meta_file.parent, 'size_bytes': meta.get('size_bytes', 0),
+                                'last_used': meta_file.parent.stat().st_mtime})
+            except Exception:
+                continue
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its size cap"""
+        entries = self.entries()
+        total = sum(entry['size_bytes'] for entry in entries)
+        if total <= self.max_size_bytes:
+            return
+        for entry in sorted(entries, key=lambda e: e['last_used']):
+            if total <= self.max_size_bytes:
+                break
+            shutil.rmtree(entry['path'], ignore_errors=True)
+            total -= entry['size_bytes']
+            logger.info(f"🧹 Evicted cached artifact {entry['path'].name[:12]}")
+
+
+def create_artifact_cache(config: Optional[Dict] = None, base_dir=None) -> ArtifactCache:
+    """Build the cache described by the ``artifact_cache`` config section (relative paths resolve against base_dir)"""
+    config = dict(DEFAULT_ARTIFACT_CACHE_CONFIG, **(config or {}))
+    path = Path(config['path']).expanduser()
+    if base_dir is not None and not path.is_absolute():
+        path = Path(base_dir) / path
+    return ArtifactCache(path, float(config['max_size_mb']) * 1024 * 1024, enabled=bool(config['enabled']))
@@ -0,0 +1,129 @@
+"""
+Compressed audio piped from ffmpeg straight into a transcription upload.
+
+Before, the audio track was written to a temp file as 16 kHz mono PCM WAV and
+then uploaded in full. That is about 1.9 MB per minute. Now ffmpeg encodes it
+to Opus (or FLAC) on its stdout, and the request body is read from that pipe.
+The upload starts while the audio is still being encoded, nothing is written
+to disk, and Opus at 32 kbit/s is about 0.24 MB per minute.
+"""
+
+import io
+import time
+import logging
+import tempfile
+import subprocess
+from typing import Dict, Iterator, List, Optional
+
+from modules.config_service import load_master_config
+from modules.metrics import wait_measured
+from modules.process_control import kill_process_tree, popen_group, release
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUDIO_UPLOAD_CONFIG = {
+    'audio_codec': 'opus',
+    'audio_bitrate': '32k'
+}
+
+# Encoder options and upload content type per codec
+AUDIO_CODECS = {
+    'opus': (['-c:a', 'libopus', '-application', 'voip', '-f', 'ogg'], 'audio/ogg'),
+    'flac': (['-c:a', 'flac', '-f', 'flac'], 'audio/flac')
+}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def get_audio_upload_config() -> Dict:
+    """Audio upload settings from the transcription section of master_config.json"""
+    config = dict(DEFAULT_AUDIO_UPLOAD_CONFIG)
+    try:
+        config.update(load_master_config().get('transcription', {}))
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read transcription config, using defaults: {str(e)}")
+    return config
+
+
+def audio_command(video_path, codec: str = 'opus', bitrate: Optional[str] = '32k',
+                  start: Optional[float] = None, duration: Optional[float] = None) -> List[str]:
+    """ffmpeg command writing a video's audio track, 16 kHz mono, to stdout (optionally only an excerpt)"""
+    options, _ = AUDIO_CODECS[codec]
+    command = ['ffmpeg', '-nostdin', '-loglevel', 'error']
+    if start:
+        command += ['-ss', f'{start:.3f}']
+    command += ['-i', str(video_path), '-vn', '-ac', '1', '-ar', '16000']
+    if duration:
+        command += ['-t', f'{duration:.3f}']
+    command += options
+    if codec == 'opus' and bitrate:
+        command += ['-b:a', str(bitrate)]
+    return command + ['pipe:1']
+
+
+class AudioStream(io.RawIOBase):
+    """Encoded audio of a video, readable while ffmpeg produces it
+
+    Use as a context manager. Pass the stream itself as a file-like request body
+    (it has no length, so it is sent chunked), or iterate ``chunks()``. Each
+    stream can be read once; open a new one to retry an upload. ``start`` and
+    ``duration`` (seconds) stream only an excerpt.
+    """
+
+    def __init__(self, video_path, codec: Optional[str] = None, bitrate: Optional[str] = None,
+                 start: Optional[float] = None, duration: Optional[float] = None):
+        super().__init__()
+        if codec is None:
+            config = get_audio_upload_config()
+            codec, bitrate = config['audio_codec'], config['audio_bitrate']
+        if codec not in AUDIO_CODECS:
+            raise ValueError(f"Unsupported audio codec '{codec}' (use one of: {', '.join(AUDIO_CODECS)})")
+        self.codec = codec
+        self.command = audio_command(video_path, codec, bitrate, start, duration)
+        self.mimetype = AUDIO_CODECS[codec][1]
+        self.bytes_read = 0
+        self.process = None
+        self._stderr = None
+        self._started = None
+
+    def __enter__(self) -> "AudioStream":
+        self._started = time.perf_counter()
+        self._stderr = tempfile.TemporaryFile()
+        self.process = popen_group(self.command, stdout=subprocess.PIPE, stderr=self._stderr)
+        return self
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.process.stdout.read(len(buffer))
+        buffer[:len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+    def chunks(self) -> Iterator[bytes]:
+        """Upload body as a generator of encoded chunks"""
+        while True:
+            data = self.read(CHUNK_SIZE)
+            if not data:
+                return
+            yield data
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None and self.process.poll() is None:
+            # The upload failed mid-way; nobody will read the rest
+            kill_process_tree(self.process)
+        self.process.stdout.close()
+        try:
+            return_code = wait_measured(self.process, "Stream audio for transcription", self._started)
+        finally:
+            release(self.process)
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode('utf-8', errors='replace').strip()
+        self._stderr.close()
+        self.close()
+        if exc_type is None:
+            if return_code != 0:
+                raise RuntimeError(f"ffmpeg could not extract the audio: {stderr[-2000:]}")
+            logger.info(f"Uploaded {self.bytes_read / (1024 * 1024):.1f} MB of {self.codec} audio")
+        return False
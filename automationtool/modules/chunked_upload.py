@@ -0,0 +1,146 @@
+"""
+Resumable chunked uploads (tus-style) into a job workspace.
+
+A client creates an upload with the total size, then sends the file in PATCH
+chunks, each carrying the byte offset it starts at. Chunks are streamed straight
+to ``input/<filename>.part``; the size of that file is the authoritative offset,
+so after a dropped connection the client asks for the current offset (HEAD) and
+continues from there. When the last byte arrives the file is fsynced and renamed
+to its final name, which is what makes it visible to the pipeline. Chunks are
+applied under a file lock in the workspace, so two server processes never
+write the same upload at once.
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+from modules.file_lock import file_lock
+
+STATE_FILENAME = "upload.json"
+PART_SUFFIX = ".part"
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    """Upload request that cannot be applied; carries the HTTP status to return"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _fsync_directory(directory: Path):
+    """Persist a rename on filesystems that need the directory synced too"""
+    if os.name != 'posix':
+        return
+    fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ChunkedUpload:
+    """State of one resumable upload stored in a job workspace"""
+
+    def __init__(self, workspace, filename: str, length: int, created_at: float):
+        self.workspace = workspace
+        self.filename = filename
+        self.length = length
+        self.created_at = created_at
+
+    @property
+    def upload_id(self) -> str:
+        return self.workspace.job_id
+
+    @property
+    def part_path(self) -> Path:
+        return self.workspace.input_dir / f"{self.filename}{PART_SUFFIX}"
+
+    @property
+    def final_path(self) -> Path:
+        return self.workspace.input_dir / self.filename
+
+    @property
+    def offset(self) -> int:
+        """Number of bytes received so far"""
+        if self.final_path.exists():
+            return self.length
+        if self.part_path.exists():
+            return self.part_path.stat().st_size
+        return 0
+
+    @property
+    def is_complete(self) -> bool:
+        return self.final_path.exists()
+
+    @classmethod
+    def create(cls, workspace, filename: str, length: int) -> "ChunkedUpload":
+        """Start a new upload in an (empty) workspace"""
+        filename = Path(filename).name
+        if not filename:
+            raise UploadError("Filename is required")
+        if length < 0:
+            raise UploadError("Upload length must not be negative")
+
+        upload = cls(workspace, filename, int(length), time.time())
+        state_path = workspace.root / STATE_FILENAME
+        tmp_path = state_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'filename': upload.filename, 'length': upload.length,
+                       'created_at': upload.created_at}, f)
+        os.replace(tmp_path, state_path)
+        upload.part_path.touch()
+        if upload.length == 0:
+            upload._finish()
+        return upload
+
+    @classmethod
+    def load(cls, workspace) -> Optional["ChunkedUpload"]:
+        """Return the upload stored in a workspace, if any"""
+        state_path = workspace.root / STATE_FILENAME
+        if not state_path.exists():
+            return None
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return cls(workspace, state['filename'], int(state['length']), state.get('created_at', 0))
+
+    def write_chunk(self, stream, offset: int) -> int:
+        """Append a chunk read from ``stream`` at ``offset`` and return the new offset.
+
+        Whatever arrives before the stream breaks is kept, so the client can resume
+        from the offset reported afterwards.
+        """
+        with file_lock(self.workspace.root / STATE_FILENAME):
+            if self.is_complete:
+                raise UploadError("Upload is already complete", 409)
+            current = self.offset
+            if offset != current:
+                raise UploadError(f"Upload-Offset {offset} does not match current offset {current}", 409)
+
+            with open(self.part_path, 'r+b') as f:
+                f.seek(current)
+                while True:
+                    block = stream.read(COPY_BUFFER_SIZE)
+                    if not block:
+                        break
+                    if current + len(block) > self.length:
+                        f.truncate(current)
+                        raise UploadError("Chunk exceeds the declared upload length", 413)
+                    f.write(block)
+                    current += len(block)
+
+            if current == self.length:
+                self._finish()
+            return current
+
+    def _finish(self):
+        """Flush the completed file to disk and publish it under its final name"""
+        with open(self.part_path, 'r+b') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.part_path, self.final_path)
+        _fsync_directory(self.final_path.parent)
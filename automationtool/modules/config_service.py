@@ -0,0 +1,173 @@
+"""
+Configuration loaded once and shared read-only.
+
+master_config.json is parsed and validated the first time it is needed, then
+served from memory until its modification time changes, so request handlers and
+stages never re-parse it. The file is never rewritten.
+
+Each job gets a frozen snapshot (``snapshot``) that is passed to its stages.
+The snapshot is also written to ``config.json`` in the job workspace, and the
+pipeline points ``PIPELINE_CONFIG_FILE`` at it. Everything else in that process
+that calls ``load_master_config`` then reads the job's settings too. A job
+therefore keeps the settings it started with, even if the shared file is edited
+while it runs.
+"""
+
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+CONFIG_PATH = PROJECT_ROOT / "config" / "master_config.json"
+CONFIG_ENV_VAR = "PIPELINE_CONFIG_FILE"
+JOB_CONFIG_FILENAME = "config.json"
+
+# Top-level keys whose value must be a section (an object)
+SECTION_KEYS = ('pipeline_steps', 'admission', 'master_log', 'job_queue', 'uploads', 'task_store',
+                'stage_deadlines', 'media_delivery', 'artifact_cache', 'scheduler', 'batch', 'cost_model',
+                'warm_workers', 'transcription', 'face_tracking', 'orientation_detection',
+                'language_settings', 'schedule', 'schedule_config')
+
+
+class ConfigError(ValueError):
+    """The configuration file cannot be parsed or is invalid"""
+
+
+class FrozenConfig(dict):
+    """Read-only dict; nested sections are FrozenConfig and lists are tuples"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Configuration snapshots are read-only; use thaw() for a mutable copy")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __reduce__(self):
+        # Picklable for spawned batch workers
+        return FrozenConfig, (dict(self),)
+
+
+def freeze(value: Any) -> Any:
+    """Deep read-only copy of a parsed JSON value"""
+    if isinstance(value, dict):
+        return FrozenConfig((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Deep mutable copy of a (frozen) configuration value"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+def parse_config(content: str) -> Dict:
+    """Parse config JSON, tolerating unescaped Windows backslashes in paths"""
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        try:
+            return json.loads(content.replace('\\\\', '\\').replace('\\', '\\\\'))
+        except json.JSONDecodeError as e:
+            raise ConfigError(f"Invalid JSON: {str(e)}") from e
+
+
+def validate_config(config: Any):
+    """Check the structure the pipeline relies on
+
+    Raises:
+        ConfigError: The configuration is not usable
+    """
+    if not isinstance(config, dict):
+        raise ConfigError("The configuration must be a JSON object")
+    for key in ('input_folder', 'output_folder'):
+        if key in config and not isinstance(config[key], str):
+            raise ConfigError(f"'{key}' must be a path string")
+    for key in SECTION_KEYS:
+        if key in config and not isinstance(config[key], dict):
+            raise ConfigError(f"'{key}' must be an object")
+    for step, enabled in config.get('pipeline_steps', {}).items():
+        if not isinstance(enabled, bool):
+            raise ConfigError(f"pipeline_steps.{step} must be true or false")
+
+
+class ConfigService:
+    """Parsed and validated configuration file, reloaded only when it changes"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._config: Optional[FrozenConfig] = None
+        self._signature = None
+
+    def current(self) -> FrozenConfig:
+        """The configuration as of the file's last modification
+
+        An edit that breaks the file keeps the last valid configuration in use.
+
+        Raises:
+            ConfigError: The file has never been loaded successfully
+            FileNotFoundError: The file does not exist
+        """
+        stat = self.path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._config is not None and self._signature == signature:
+                return self._config
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    config = parse_config(f.read())
+                validate_config(config)
+            except ConfigError as e:
+                if self._config is None:
+                    raise ConfigError(f"{self.path}: {str(e)}") from e
+                logger.warning(f"⚠️ Ignoring invalid edit of {self.path.name}, keeping the previous settings: {str(e)}")
+                self._signature = signature
+                return self._config
+            self._config, self._signature = freeze(config), signature
+            logger.debug(f"Loaded configuration from {self.path}")
+            return self._config
+
+    def snapshot(self, **overrides) -> FrozenConfig:
+        """Frozen copy of the current configuration with top-level keys replaced, for one job"""
+        config = thaw(self.current())
+        config.update(overrides)
+        validate_config(config)
+        return freeze(config)
+
+
+_services: Dict[str, ConfigService] = {}
+_services_lock = threading.Lock()
+
+
+def get_config_service(path=None) -> ConfigService:
+    """Service for a config file: the job snapshot named by PIPELINE_CONFIG_FILE, else master_config.json"""
+    path = Path(path or os.environ.get(CONFIG_ENV_VAR) or CONFIG_PATH).expanduser().resolve()
+    with _services_lock:
+        service = _services.get(str(path))
+        if service is None:
+            service = _services[str(path)] = ConfigService(path)
+        return service
+
+
+def load_master_config() -> FrozenConfig:
+    """Current configuration of this process (read-only; see thaw for a mutable copy)"""
+    return get_config_service().current()
+
+
+def write_snapshot(config: Dict, output_root) -> Path:
+    """Write a job's configuration snapshot to its workspace, returning the file"""
+    path = Path(output_root) / JOB_CONFIG_FILENAME
+    temp_path = path.with_suffix('.json.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+    return path
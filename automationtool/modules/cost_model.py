@@ -0,0 +1,302 @@
+"""
+Processing-time predictor learned from finished jobs.
+
+Every successful run appends a sample to a shared JSONL file: the probed
+duration, resolution, fps and flow of the source, the wall time of each stage
+and of the whole run, and what was predicted for it. Predictions fit, per flow
+and per stage, ``seconds = a + b × scaled duration``. Scaled duration is the
+duration weighted by resolution and frame rate. Horizontal videos go through
+face tracking and are fitted separately. Until a flow has enough samples,
+the static cost of the admission settings is applied to the scaled duration,
+multiplied by ``horizontal_factor`` for the horizontal flow.
+
+While a job runs, EtaTracker refines the prediction each time a stage
+finishes. The remaining share of the predicted time is scaled by how fast the
+job has gone so far. The result is written to ``eta/<video>.json``, one file
+per video so parallel batch workers sharing an output folder never mix them up.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from modules.admission import DEFAULT_ADMISSION_CONFIG, REFERENCE_PIXELS
+from modules.file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COST_MODEL_CONFIG = {
+    'samples_file': 'cost_model.jsonl',
+    'min_samples': 5,
+    'max_samples': 500,
+    'horizontal_factor': 2.5,
+    'fps_exponent': 0.5,
+    'outlier_ratio': 2.0
+}
+
+# Frame rate the per-second cost is calibrated for
+REFERENCE_FPS = 30
+
+ETA_DIRNAME = "eta"
+
+# Share of the run each stage takes, used to split the static estimate
+DEFAULT_STAGE_SHARES = {
+    'vertical': {'transcribe': 0.2, 'add_subtitles': 0.25, 'trim_silence': 0.15, 'select_clips': 0.02,
+                 'create_shorts': 0.25, 'generate_titles': 0.05, 'upload_shorts': 0.08},
+    'horizontal': {'transcribe': 0.1, 'trim_silence': 0.1, 'create_shorts': 0.15, 'crop': 0.45,
+                   'add_subtitles': 0.2}
+}
+
+
+@dataclass
+class Prediction:
+    """Predicted wall time of a run, in total and per stage"""
+    flow: str
+    total_seconds: float
+    stages: Dict[str, float] = field(default_factory=dict)
+    source: str = 'default'  # 'fitted' once enough samples exist for the flow
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data['total_seconds'] = round(self.total_seconds, 1)
+        data['stages'] = {stage: round(seconds, 1) for stage, seconds in self.stages.items()}
+        return data
+
+
+def expected_flow(media: Optional[Dict], config: Dict) -> str:
+    """Flow a video will take, from its probed dimensions and the orientation detection settings"""
+    media = media or {}
+    orientation = config.get('orientation_detection', {})
+    width, height = media.get('width'), media.get('height')
+    if orientation.get('enabled', False) and width and height:
+        if width / height > orientation.get('horizontal_threshold', 1.0):
+            return 'horizontal'
+    return 'vertical'
+
+
+def _fit_line(points: List[tuple]):
+    """Least-squares a, b for y = a + b·x, never predicting negative time"""
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance > 0:
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+        intercept = mean_y - slope * mean_x
+        if slope >= 0 and intercept >= 0:
+            return intercept, slope
+    # Degenerate or negative fit: plain proportional cost
+    total_x = sum(x for x, _ in points)
+    return 0.0, (sum(y for _, y in points) / total_x) if total_x else 0.0
+
+
+class CostModel:
+    """Processing-time model fitted on the samples of finished jobs"""
+
+    def __init__(self, samples_file, config: Optional[Dict] = None, admission_config: Optional[Dict] = None):
+        self.samples_file = Path(samples_file)
+        self.config = dict(DEFAULT_COST_MODEL_CONFIG, **(config or {}))
+        self.admission_config = dict(DEFAULT_ADMISSION_CONFIG, **(admission_config or {}))
+        self._lock = threading.Lock()
+        self._fitted = None
+        self._fitted_signature = None
+
+    def scaled_duration(self, media: Optional[Dict]) -> float:
+        """Duration weighted by resolution and frame rate (seconds of 1080p30-equivalent media)"""
+        media = media or {}
+        duration = media.get('duration') or self.admission_config['default_media_seconds']
+        factor = 1.0
+        if media.get('width') and media.get('height'):
+            pixels = media['width'] * media['height']
+            factor *= (pixels / REFERENCE_PIXELS) ** self.admission_config['resolution_exponent']
+        if media.get('fps'):
+            factor *= (media['fps'] / REFERENCE_FPS) ** self.config['fps_exponent']
+        return duration * factor
+
+    def samples(self, limit: Optional[int] = None) -> List[Dict]:
+        """Most recent samples, oldest first"""
+        try:
+            with open(self.samples_file, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        samples = []
+        for line in lines[-(limit or self.config['max_samples']):]:
+            try:
+                samples.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return samples
+
+    def record(self, media: Optional[Dict], flow: str, wall_seconds: float, stage_seconds: Dict[str, float],
+               predicted_seconds: Optional[float] = None, job: Optional[str] = None):
+        """Add a finished run to the samples"""
+        media = media or {}
+        sample = {
+            'ts': datetime.now().isoformat(timespec='seconds'),
+            'job': job,
+            'flow': flow,
+            'duration': media.get('duration'),
+            'width': media.get('width'),
+            'height': media.get('height'),
+            'fps': media.get('fps'),
+            'wall_seconds': round(wall_seconds, 1),
+            'predicted_seconds': round(predicted_seconds, 1) if predicted_seconds else None,
+            'stages': {stage: round(seconds, 1) for stage, seconds in stage_seconds.items()}
+        }
+        try:
+            self.samples_file.parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(self.samples_file):
+                with open(self.samples_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(sample, ensure_ascii=False) + '\n')
+        except Exception as e:
+            logger.warning(f"⚠️ Could not record cost model sample: {str(e)}")
+
+    def _fit(self) -> Dict[str, Dict[str, tuple]]:
+        """Per flow: stage (and 'total') → (a, b), refitted when the samples file changes"""
+        try:
+            stat = self.samples_file.stat()
+            signature = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            signature = None
+        with self._lock:
+            if self._fitted is not None and self._fitted_signature == signature:
+                return self._fitted
+
+        by_flow: Dict[str, List[Dict]] = {}
+        for sample in self.samples() if signature else []:
+            if sample.get('duration'):
+                by_flow.setdefault(sample.get('flow', 'vertical'), []).append(sample)
+
+        fitted = {}
+        for flow, samples in by_flow.items():
+            if len(samples) < self.config['min_samples']:
+                continue
+            xs = [self.scaled_duration(sample) for sample in samples]
+            lines = {'total': _fit_line([(x, s['wall_seconds']) for x, s in zip(xs, samples)])}
+            stages = {stage for sample in samples for stage in sample.get('stages', {})}
+            for stage in stages:
+                points = [(x, s['stages'][stage]) for x, s in zip(xs, samples) if stage in s.get('stages', {})]
+                if len(points) >= self.config['min_samples']:
+                    lines[stage] = _fit_line(points)
+            fitted[flow] = lines
+
+        with self._lock:
+            self._fitted, self._fitted_signature = fitted, signature
+        return fitted
+
+    def predict(self, media: Optional[Dict], flow: str = 'vertical') -> Prediction:
+        """Predicted wall time of processing a video through a flow"""
+        x = self.scaled_duration(media)
+        lines = self._fit().get(flow)
+        if lines:
+            stages = {stage: a + b * x for stage, (a, b) in lines.items() if stage != 'total'}
+            a, b = lines['total']
+            return Prediction(flow, a + b * x, stages, 'fitted')
+
+        total = self.admission_config['base_seconds'] + self.admission_config['seconds_per_media_second'] * x
+        if flow == 'horizontal':
+            total *= self.config['horizontal_factor']
+        shares = DEFAULT_STAGE_SHARES.get(flow, DEFAULT_STAGE_SHARES['vertical'])
+        return Prediction(flow, total, {stage: total * share for stage, share in shares.items()})
+
+    def accuracy(self, limit: int = 50) -> List[Dict]:
+        """Recent samples with predicted vs actual time; outliers are off by more than outlier_ratio"""
+        ratio_limit = self.config['outlier_ratio']
+        rows = []
+        for sample in reversed(self.samples(limit)):
+            predicted, actual = sample.get('predicted_seconds'), sample.get('wall_seconds')
+            ratio = round(actual / predicted, 2) if predicted and actual else None
+            rows.append(dict(sample, ratio=ratio,
+                             outlier=bool(ratio and (ratio > ratio_limit or ratio < 1 / ratio_limit))))
+        return rows
+
+
+def create_cost_model(config: Optional[Dict] = None, admission_config: Optional[Dict] = None,
+                      base_dir=None) -> CostModel:
+    """Build the model described by the ``cost_model`` config section (relative paths resolve against base_dir)"""
+    config = dict(DEFAULT_COST_MODEL_CONFIG, **(config or {}))
+    path = Path(config['samples_file']).expanduser()
+    if base_dir is not None and not path.is_absolute():
+        path = Path(base_dir) / path
+    return CostModel(path, config, admission_config)
+
+
+class EtaTracker:
+    """Remaining time of a running job, refined each time a stage finishes"""
+
+    def __init__(self, prediction: Prediction, eta_file):
+        self.prediction = prediction
+        self.eta_file = Path(eta_file)
+        self.started = time.time()
+        self.completed = set()
+        self._lock = threading.Lock()
+        self._write(prediction.total_seconds, 1.0)
+
+    def stage_finished(self, entry: Dict):
+        """JobMetrics listener: account for a finished stage and rewrite the ETA"""
+        if entry.get('status') != 'completed':
+            return
+        with self._lock:
+            self.completed.add(entry['stage'])
+            predicted = self.prediction.stages
+            total_share = sum(predicted.values())
+            done_share = sum(predicted.get(stage, 0) for stage in self.completed) / total_share if total_share else 0
+            elapsed = time.time() - self.started
+            expected_elapsed = self.prediction.total_seconds * done_share
+            # Jobs that ran slower (or faster) than predicted so far keep that pace
+            pace = min(3.0, max(0.5, elapsed / expected_elapsed)) if expected_elapsed > 0 else 1.0
+            remaining = self.prediction.total_seconds * (1 - done_share) * pace
+            self._write(remaining, pace)
+
+    def _write(self, remaining: float, pace: float):
+        now = time.time()
+        data = {
+            'prediction': self.prediction.to_dict(),
+            'started_at': self.started,
+            'updated_at': now,
+            'elapsed_seconds': round(now - self.started, 1),
+            'remaining_seconds': round(max(0.0, remaining), 1),
+            'eta': now + max(0.0, remaining),
+            'pace': round(pace, 2),
+            'completed_stages': sorted(self.completed)
+        }
+        try:
+            self.eta_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.eta_file.with_suffix('.json.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.eta_file)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write ETA: {str(e)}")
+
+
+def eta_path(output_root, video_base_name: str) -> Path:
+    """Location of the live ETA of a video (one per video, so batch workers never share it)"""
+    return Path(output_root) / ETA_DIRNAME / f"{video_base_name}.json"
+
+
+def load_eta(output_root, video_base_name: Optional[str] = None) -> Optional[Dict]:
+    """Latest ETA written for a video, or None
+
+    Without a video name, the most recently updated ETA under output_root is
+    returned (a job workspace processes a single video).
+    """
+    if video_base_name is not None:
+        path = eta_path(output_root, video_base_name)
+    else:
+        candidates = list((Path(output_root) / ETA_DIRNAME).glob("*.json"))
+        if not candidates:
+            return None
+        path = max(candidates, key=lambda candidate: candidate.stat().st_mtime)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
@@ -0,0 +1,191 @@
+"""
+Dependency-graph scheduler for the stages of one pipeline run.
+
+Stages are nodes with explicit dependencies. A node starts as soon as all of
+its dependencies have finished, so independent stages overlap. For example,
+titles are generated from the transcript while the clips are still encoding.
+CPU-heavy work (ffmpeg encodes) takes slots from a shared CPU budget, so the
+overlap never oversubscribes the cores given to this job.
+
+A disabled node does not stop the run. It passes the result of its first
+dependency through, so a later stage works on the previous artifact. A failed
+node blocks only the nodes that depend on it.
+"""
+
+import logging
+import threading
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class CpuBudget:
+    """Weighted semaphore over the CPU slots of one job (or of a whole batch, see shared)"""
+
+    def __init__(self, slots: int, condition=None, available=None):
+        self.slots = max(1, int(slots))
+        self._condition = condition or threading.Condition()
+        self._available = available if available is not None else _Counter(self.slots)
+
+    @classmethod
+    def shared(cls, slots: int) -> "CpuBudget":
+        """Budget that worker processes share when it is passed to them at start"""
+        import multiprocessing
+        slots = max(1, int(slots))
+        return cls(slots, multiprocessing.Condition(), multiprocessing.RawValue('i', slots))
+
+    def acquire(self, weight: int = 1):
+        # A task heavier than the whole budget still runs, alone
+        weight = min(max(0, int(weight)), self.slots)
+        with self._condition:
+            self._condition.wait_for(lambda: self._available.value >= weight)
+            self._available.value -= weight
+        return weight
+
+    def release(self, weight: int):
+        with self._condition:
+            self._available.value += weight
+            self._condition.notify_all()
+
+
+class _Counter:
+    """Stand-in for a multiprocessing value within one process"""
+
+    def __init__(self, value: int):
+        self.value = value
+
+
+@dataclass
+class Node:
+    """One stage of the graph
+
+    Attributes:
+        func: Called with the results of all finished nodes, keyed by node name
+        deps: Names of the nodes that must finish first
+        cpu: CPU slots held while the node runs (0 for I/O-bound or network work)
+        enabled: Disabled nodes pass the result of their first dependency through
+    """
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    deps: List[str] = field(default_factory=list)
+    cpu: int = 0
+    enabled: bool = True
+
+
+class DagScheduler:
+    """Runs nodes concurrently as soon as their dependencies are done"""
+
+    def __init__(self, cpu_budget: Union[int, CpuBudget] = 1):
+        self.budget = cpu_budget if isinstance(cpu_budget, CpuBudget) else CpuBudget(cpu_budget)
+        self.nodes: Dict[str, Node] = {}
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], deps: Iterable[str] = (),
+            cpu: int = 0, enabled: bool = True) -> Node:
+        if name in self.nodes:
+            raise ValueError(f"Duplicate node: {name}")
+        node = Node(name, func, list(deps), cpu, enabled)
+        self.nodes[name] = node
+        return node
+
+    def order(self) -> List[str]:
+        """Node names in dependency order; raises ValueError on unknown dependencies or cycles"""
+        for node in self.nodes.values():
+            missing = [dep for dep in node.deps if dep not in self.nodes]
+            if missing:
+                raise ValueError(f"Node {node.name} depends on unknown nodes: {', '.join(missing)}")
+        remaining = {name: set(node.deps) for name, node in self.nodes.items()}
+        ordered = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+            for name in ready:
+                ordered.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return ordered
+
+    def map(self, func: Callable[[Any], Any], items: Iterable[Any], cpu: int = 1) -> List[Any]:
+        """Run func over items concurrently from inside a node, each call holding cpu slots
+
+        Results keep the order of items. Exceptions propagate after all calls finish.
+        The calling node should hold no CPU slots itself, or it may wait on its own budget.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        def run(item):
+            weight = self.budget.acquire(cpu)
+            try:
+                return func(item)
+            finally:
+                self.budget.release(weight)
+
+        with ThreadPoolExecutor(max_workers=min(len(items), self.budget.slots),
+                                thread_name_prefix="dag-map") as pool:
+            # Each call keeps the caller's context (e.g. the stage its metrics belong to)
+            futures = [pool.submit(contextvars.copy_context().run, run, item) for item in items]
+            wait(futures)
+        return [future.result() for future in futures]
+
+    def _run_node(self, node: Node, results: Dict[str, Any]):
+        weight = self.budget.acquire(node.cpu)
+        try:
+            return node.func(results)
+        finally:
+            self.budget.release(weight)
+
+    def run(self) -> Tuple[Dict[str, Any], Dict[str, BaseException]]:
+        """Run the graph
+
+        Returns:
+            Results of the finished nodes and exceptions of the failed ones, both keyed by node name
+        """
+        self.order()
+        results: Dict[str, Any] = {}
+        errors: Dict[str, BaseException] = {}
+        blocked = set()
+        done = set()
+        running = {}
+
+        def ready(node: Node) -> bool:
+            return all(dep in done for dep in node.deps)
+
+        with ThreadPoolExecutor(max_workers=max(1, len(self.nodes)), thread_name_prefix="dag") as pool:
+            while len(done) + len(blocked) + len(errors) < len(self.nodes):
+                progressed = False
+                for name, node in self.nodes.items():
+                    if name in done or name in blocked or name in errors or name in running.values():
+                        continue
+                    failed = [dep for dep in node.deps if dep in errors or dep in blocked]
+                    if failed:
+                        logger.warning(f"⏭️ Skipping {name}: {', '.join(failed)} did not complete")
+                        blocked.add(name)
+                        progressed = True
+                    elif ready(node) and not node.enabled:
+                        results[name] = results.get(node.deps[0]) if node.deps else None
+                        done.add(name)
+                        progressed = True
+                    elif ready(node):
+                        running[pool.submit(self._run_node, node, dict(results))] = name
+                        progressed = True
+                if progressed:
+                    continue
+                if not running:
+                    break
+
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                        done.add(name)
+                    except BaseException as e:
+                        logger.error(f"❌ Stage {name} failed: {str(e)}")
+                        errors[name] = e
+        return results, errors
@@ -3,41 +3,61 @@ import numpy as np
 from moviepy.editor import *
 import os
 import warnings
-import json
+import sys
+import threading
 from pathlib import Path
 
+# Project root, for modules.* imports when this file is loaded from the modules folder
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.config_service import load_master_config
+
 # Suppress MoviePy warnings about FFmpeg
 warnings.filterwarnings("ignore", category=UserWarning, module="moviepy")
 
 def get_face_tracking_config():
-    """Get face tracking configuration from master_config.json with Docker-optimized paths"""
-    # Docker-optimized path resolution
-    project_root = Path(__file__).parent.parent
-    config_path = project_root / "config" / "master_config.json"
-    
-    # Fallback paths for different deployment scenarios
-    fallback_paths = [
-        config_path,
-        Path("/app/config/master_config.json"),  # Docker container path
-        Path("config/master_config.json"),     # Relative path
-        Path("./config/master_config.json")     # Current directory relative
-    ]
-    
-    for path in fallback_paths:
-        try:
-            if path.exists():
-                with open(path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    return config.get('face_tracking', {
-                        'enabled': False,
-                        'debug_overlay': False
-                    })
-        except Exception as e:
-            print(f"Warning: Could not load face tracking config from {path}: {e}")
-            continue
-    
-    print("Warning: Could not load face tracking config from any path, using defaults")
-    return {'enabled': False, 'debug_overlay': False}
+    """Get face tracking configuration from master_config.json (or the job's config snapshot)"""
+    try:
+        return load_master_config().get('face_tracking', {
+            'enabled': False,
+            'debug_overlay': False
+        })
+    except Exception as e:
+        print(f"Warning: Could not load face tracking config, using defaults: {e}")
+        return {'enabled': False, 'debug_overlay': False}
+
+# Face detector, loaded once per process and reused for every clip
+_face_cascade = None
+_face_cascade_lock = threading.Lock()
+
+def load_face_cascade():
+    """Haar face cascade, or None if the XML cannot be found"""
+    global _face_cascade
+    with _face_cascade_lock:
+        if _face_cascade is not None:
+            return _face_cascade
+        # Docker-optimized path resolution
+        cascade_paths = [
+            Path(__file__).parent / "haarcascade_frontalface_default.xml",  # Local modules directory
+            Path("/app/modules/haarcascade_frontalface_default.xml"),       # Docker container path
+            Path("modules/haarcascade_frontalface_default.xml"),             # Relative path
+            Path("./modules/haarcascade_frontalface_default.xml"),          # Current directory relative
+            Path(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')  # OpenCV default
+        ]
+        for cascade_path in cascade_paths:
+            try:
+                if cascade_path.exists():
+                    cascade = cv2.CascadeClassifier(str(cascade_path))
+                    if not cascade.empty():
+                        print(f"Using haarcascade from: {cascade_path}")
+                        _face_cascade = cascade
+                        return _face_cascade
+            except Exception as e:
+                print(f"Warning: Could not load cascade from {cascade_path}: {e}")
+                continue
+        return None
 
 def crop_to_vertical(input_video_path, output_video_path, debug_overlay=None):
     """
@@ -75,26 +95,7 @@ def crop_to_vertical(input_video_path, output_video_path, debug_overlay=None):
         print("Error: Original video width is less than the desired vertical width.")
         return
 
-    # Load face cascade - Docker-optimized path resolution
-    cascade_paths = [
-        Path(__file__).parent / "haarcascade_frontalface_default.xml",  # Local modules directory
-        Path("/app/modules/haarcascade_frontalface_default.xml"),       # Docker container path
-        Path("modules/haarcascade_frontalface_default.xml"),             # Relative path
-        Path("./modules/haarcascade_frontalface_default.xml"),          # Current directory relative
-        Path(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')  # OpenCV default
-    ]
-    
-    face_cascade = None
-    for cascade_path in cascade_paths:
-        try:
-            if cascade_path.exists():
-                face_cascade = cv2.CascadeClassifier(str(cascade_path))
-                print(f"Using haarcascade from: {cascade_path}")
-                break
-        except Exception as e:
-            print(f"Warning: Could not load cascade from {cascade_path}: {e}")
-            continue
-    
+    face_cascade = load_face_cascade()
     if face_cascade is None:
         print("Error: Could not find haarcascade file in any location")
         return
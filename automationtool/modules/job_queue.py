@@ -0,0 +1,221 @@
+"""
+Bounded worker pool with FIFO admission for video processing jobs.
+
+Jobs are kept in a persisted queue (see queue_state) that every server process
+shares, so any of them can accept a job, and anything still waiting (or
+interrupted mid-run) when the server stops is picked up again. Workers run in
+the process holding the queue's owner lease; the others take it over when that
+process goes away.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from modules.queue_state import MemoryQueueState, QueueState, queue_entry
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the shared queue for jobs submitted by other processes
+POLL_INTERVAL = 1.0
+# Seconds between owner lease renewals (or takeover attempts when another process owns the queue)
+LEASE_INTERVAL = 10.0
+
+
+def default_worker_count(encoder_threads: int = 4) -> int:
+    """Size the pool so that parallel encodes do not oversubscribe the CPU"""
+    cpu_count = os.cpu_count() or 1
+    return max(1, cpu_count // max(1, int(encoder_threads)))
+
+
+class JobQueue:
+    """FIFO job queue served by a fixed number of worker threads in the owning process"""
+
+    def __init__(self, handler: Callable[[str, Dict], None], max_workers: int = 1,
+                 state: Optional[QueueState] = None,
+                 on_restore: Optional[Callable[[str, Dict], None]] = None,
+                 on_owner: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            handler: Called as handler(job_id, payload) on a worker thread
+            max_workers: Number of jobs allowed to run at the same time
+            state: Shared queue state (in-memory if not given)
+            on_restore: Called for every job found queued or interrupted when this process becomes the owner
+            on_owner: Called once this process becomes the owner, before its workers start
+        """
+        self.handler = handler
+        self.max_workers = max(1, int(max_workers))
+        self.state = state or MemoryQueueState()
+        self.on_restore = on_restore
+        self.on_owner = on_owner
+
+        self._running = set()  # Jobs run by this process
+        self._cond = threading.Condition()
+        self._accepting = True
+        self._owner = False
+        self._workers: List[threading.Thread] = []
+        self._lease_thread = None
+
+    @property
+    def is_owner(self) -> bool:
+        return self._owner
+
+    def start(self):
+        """Run the queue's workers here if no other process does, and keep trying to take over otherwise"""
+        self._claim()
+        if not self._owner:
+            logger.info("🧵 Job queue is run by another server process; jobs are queued for it")
+        self._lease_thread = threading.Thread(target=self._lease_loop, name="job-queue-lease", daemon=True)
+        self._lease_thread.start()
+
+    def _claim(self):
+        """Take or renew the owner lease, starting the workers when it is first taken"""
+        try:
+            owner = self.state.acquire_owner()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not renew the job queue lease: {str(e)}")
+            owner = False
+        with self._cond:
+            if not self._accepting:
+                return
+            was_owner, self._owner = self._owner, owner
+            if was_owner and not owner:
+                logger.warning("⚠️ Lost the job queue lease, no longer starting jobs")
+            self._cond.notify_all()
+        if owner and not was_owner:
+            self._take_over()
+
+    def _take_over(self):
+        """Resume the jobs left by the previous owner and start the worker threads"""
+        interrupted = self.state.requeue_running()
+        pending = self.state.snapshot()['pending']
+        if self.on_restore:
+            for entry in pending:
+                try:
+                    self.on_restore(entry['job_id'], entry['payload'])
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not restore job {entry['job_id']}: {str(e)}")
+        if pending:
+            logger.info(f"♻️ Restored {len(pending)} queued job(s), {len(interrupted)} of them interrupted")
+        if self.on_owner:
+            self.on_owner()
+        if not self._workers:
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i + 1}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        logger.info(f"🧵 Job queue started with {self.max_workers} worker(s)")
+
+    def _lease_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait(LEASE_INTERVAL)
+                if not self._accepting:
+                    return
+            self._claim()
+
+    def submit(self, job_id: str, payload: Dict) -> int:
+        """Queue a job and return its 1-based position in the queue"""
+        with self._cond:
+            if not self._accepting:
+                raise RuntimeError("Job queue is shutting down")
+        position = self.state.push(queue_entry(job_id, payload))
+        with self._cond:
+            self._cond.notify()
+        logger.info(f"📥 Queued job {job_id} at position {position}")
+        return position
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Return 0 if the job is running, its 1-based queue position if waiting, else None"""
+        return self.state.position(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Remove a job that has not started yet; returns False if it is not queued"""
+        if not self.state.remove(job_id):
+            return False
+        logger.info(f"🗑️ Removed job {job_id} from the queue")
+        return True
+
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        """Running and queued jobs (with their payloads), queued ones in FIFO order"""
+        return self.state.snapshot()
+
+    def stats(self) -> Dict:
+        """Snapshot of queue occupancy"""
+        snapshot = self.state.snapshot()
+        with self._cond:
+            return {
+                'max_workers': self.max_workers,
+                'running': len(snapshot['running']),
+                'queued': len(snapshot['pending']),
+                'accepting': self._accepting,
+                'owner': self._owner
+            }
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """Stop admitting jobs and wait for this process's running jobs to finish.
+
+        Jobs that are still queued stay in the shared state and are run by the
+        next owner (another server process, or this one after a restart).
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            if not self._accepting:
+                return
+            self._accepting = False
+            self._cond.notify_all()
+            logger.info(f"🛑 Draining job queue: {len(self._running)} running here")
+            while self._running:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    logger.warning(f"⚠️ Drain timeout reached with {len(self._running)} job(s) still running")
+                    break
+                self._cond.wait(remaining)
+            drained = not self._running
+            was_owner, self._owner = self._owner, False
+        if was_owner and drained:
+            # Hand the queue over at once; jobs still running here are resumed by the next owner
+            self.state.release_owner()
+
+    def _next_job(self) -> Optional[Dict]:
+        """Wait for a job this process may start; None once the queue shuts down"""
+        while True:
+            with self._cond:
+                if not self._accepting:
+                    return None
+                if not self._owner:
+                    self._cond.wait(POLL_INTERVAL)
+                    continue
+            try:
+                entry = self.state.pop()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not read the job queue: {str(e)}")
+                entry = None
+            if entry is not None:
+                with self._cond:
+                    self._running.add(entry['job_id'])
+                return entry
+            with self._cond:
+                if self._accepting:
+                    self._cond.wait(POLL_INTERVAL)
+
+    def _worker_loop(self):
+        while True:
+            entry = self._next_job()
+            if entry is None:
+                return
+            job_id, payload = entry['job_id'], entry['payload']
+            try:
+                self.handler(job_id, payload)
+            except Exception as e:
+                logger.error(f"❌ Job {job_id} raised an unhandled error: {str(e)}")
+            finally:
+                try:
+                    self.state.finish(job_id)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not mark job {job_id} finished: {str(e)}")
+                with self._cond:
+                    self._running.discard(job_id)
+                    self._cond.notify_all()
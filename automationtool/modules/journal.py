@@ -0,0 +1,124 @@
+"""
+Durable journal of completed pipeline stages.
+
+Every stage that finishes appends one JSON line to
+``journals/<video_base_name>.jsonl`` in the output folder (or job workspace),
+describing the artifact it produced. The line is flushed and fsynced before the
+next stage starts. A resumed run reads the journal and skips every stage whose
+artifact is still on disk, so a failure in title generation or upload, or a
+restart of the server, does not repeat transcription and encoding.
+
+Artifact paths are stored relative to the output root, so a workspace can be
+moved without invalidating its journal.
+"""
+
+import os
+import json
+import logging
+import threading
+from dataclasses import fields, is_dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+JOURNALS_DIRNAME = "journals"
+
+
+def journal_path(output_root, video_base_name: str) -> Path:
+    """Location of the journal for a video"""
+    return Path(output_root) / JOURNALS_DIRNAME / f"{video_base_name}.jsonl"
+
+
+def dump_artifact(artifact: Any, output_root) -> Any:
+    """JSON form of a stage artifact (a dataclass of paths, numbers and nested artifacts)"""
+    if is_dataclass(artifact):
+        return {'type': type(artifact).__name__,
+                'fields': {f.name: dump_artifact(getattr(artifact, f.name), output_root) for f in fields(artifact)}}
+    if isinstance(artifact, Path):
+        path = artifact.expanduser().resolve()
+        try:
+            return {'path': path.relative_to(Path(output_root).resolve()).as_posix()}
+        except ValueError:
+            return {'path': path.as_posix()}
+    if isinstance(artifact, (list, tuple)):
+        return [dump_artifact(item, output_root) for item in artifact]
+    if isinstance(artifact, dict):
+        return {key: dump_artifact(value, output_root) for key, value in artifact.items()}
+    return artifact
+
+
+def load_artifact(data: Any, output_root, types: Dict[str, type]) -> Any:
+    """Rebuild an artifact written by dump_artifact
+
+    Raises:
+        FileNotFoundError: A file the artifact refers to no longer exists
+    """
+    if isinstance(data, dict) and set(data) == {'type', 'fields'}:
+        cls = types[data['type']]
+        return cls(**{name: load_artifact(value, output_root, types) for name, value in data['fields'].items()})
+    if isinstance(data, dict) and set(data) == {'path'}:
+        path = Path(output_root) / data['path']
+        if not path.exists():
+            raise FileNotFoundError(path)
+        return path
+    if isinstance(data, list):
+        return [load_artifact(item, output_root, types) for item in data]
+    if isinstance(data, dict):
+        return {key: load_artifact(value, output_root, types) for key, value in data.items()}
+    return data
+
+
+class JobJournal:
+    """Append-only record of the stages completed for one video"""
+
+    def __init__(self, output_root, video_base_name: str):
+        self.output_root = Path(output_root).expanduser().resolve()
+        self.path = journal_path(self.output_root, video_base_name)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, artifact: Any):
+        """Durably note that a stage completed with the given artifact"""
+        entry = {'ts': datetime.now().isoformat(timespec='seconds'), 'stage': stage,
+                 'artifact': dump_artifact(artifact, self.output_root)}
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def completed(self, types: Dict[str, type], stages: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Artifacts of completed stages whose files still exist, keyed by stage
+
+        A truncated last line (a crash mid-write) is ignored.
+        """
+        wanted = set(stages) if stages is not None else None
+        entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if wanted is None or entry.get('stage') in wanted:
+                        entries[entry['stage']] = entry['artifact']
+        except FileNotFoundError:
+            return {}
+
+        artifacts = {}
+        for stage, data in entries.items():
+            try:
+                artifacts[stage] = load_artifact(data, self.output_root, types)
+            except (FileNotFoundError, KeyError, TypeError) as e:
+                logger.warning(f"⚠️ Not resuming {stage}: its output is gone ({str(e)})")
+        return artifacts
+
+    def reset(self):
+        """Forget all completed stages, for a fresh run"""
+        with self._lock:
+            if self.path.exists():
+                self.path.unlink()
@@ -0,0 +1,131 @@
+"""
+Choosing a speech-dense excerpt of a video for language identification.
+
+Language used to be detected by transcribing the whole audio. If detection
+was weak, the whole audio was transcribed again for each of up to six
+languages, one after another. Now ffmpeg's silencedetect filter acts as a
+voice activity detector. It finds the window of the audio with the most
+speech, and only that window, about 30 seconds by default, is sent for
+detection and for any fallback probes. The fallback probes run concurrently.
+The full audio is then transcribed once, in the chosen language. Media too
+short for an excerpt (or whose audio cannot be scanned) is transcribed with
+detection directly, so the detection request is the transcription.
+
+The same decode also hashes the 16 kHz mono audio. That fingerprint keys the
+cached Deepgram responses, so the audio is decoded once before any upload.
+"""
+
+import re
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from modules.config_service import load_master_config
+from modules.media_probe import probe_duration
+from modules.metrics import run_measured
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE_PROBE_CONFIG = {
+    'language_excerpt_seconds': 30,
+    'probe_languages': ['en', 'es', 'fr', 'de', 'it', 'pt'],
+    'probe_concurrency': 6
+}
+
+DEFAULT_LANGUAGE_SETTINGS = {
+    'transcription_language': 'auto',
+    'hindi_fallback': 'hi-Latn'
+}
+
+# Quieter than this for at least SILENCE_SECONDS counts as no speech
+SILENCE_NOISE = '-30dB'
+SILENCE_SECONDS = 0.5
+
+_SILENCE_START = re.compile(r'silence_start:\s*(-?[\d.]+)')
+_SILENCE_END = re.compile(r'silence_end:\s*(-?[\d.]+)')
+
+
+def get_language_probe_config() -> Dict:
+    """Excerpt and probe settings from the transcription section, plus the language_settings section"""
+    config = dict(DEFAULT_LANGUAGE_PROBE_CONFIG, **DEFAULT_LANGUAGE_SETTINGS)
+    try:
+        master_config = load_master_config()
+        config.update({key: value for key, value in master_config.get('transcription', {}).items()
+                       if key in DEFAULT_LANGUAGE_PROBE_CONFIG})
+        config.update({key: value for key, value in master_config.get('language_settings', {}).items()
+                       if key in DEFAULT_LANGUAGE_SETTINGS})
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read language config, using defaults: {str(e)}")
+    return config
+
+
+def _speech_spans(stderr: str, duration: float) -> List[Tuple[float, float]]:
+    """Spans that are not silence, from silencedetect's log lines"""
+    spans = []
+    current = 0.0
+    for line in stderr.splitlines():
+        start = _SILENCE_START.search(line)
+        if start:
+            silence_start = max(0.0, float(start.group(1)))
+            if silence_start > current:
+                spans.append((current, silence_start))
+            current = duration
+            continue
+        end = _SILENCE_END.search(line)
+        if end:
+            current = float(end.group(1))
+    if current < duration:
+        spans.append((current, duration))
+    return spans
+
+
+def scan_audio(video_path, detect_speech: bool = True) -> Dict:
+    """Decode a video's audio once: its duration, fingerprint and (optionally) speech spans
+
+    The fingerprint is the SHA-256 of the 16 kHz mono audio (the signal that is
+    uploaded). It is None, like the spans, if the audio cannot be decoded.
+    """
+    duration = probe_duration(video_path)
+    command = ['ffmpeg', '-nostdin', '-hide_banner', '-i', str(video_path)]
+    detect_speech = bool(detect_speech and duration)
+    if detect_speech:
+        command += ['-map', '0:a:0', '-af', f'silencedetect=noise={SILENCE_NOISE}:d={SILENCE_SECONDS}', '-f', 'null', '-']
+    command += ['-map', '0:a:0', '-ac', '1', '-ar', '16000', '-f', 'hash', '-hash', 'sha256', 'pipe:1']
+    result = run_measured(command, "Scan audio", text=True)
+    scan = {'duration': duration, 'fingerprint': None, 'spans': None}
+    if result.returncode != 0:
+        logger.warning(f"⚠️ Could not scan the audio: {result.stderr.strip()[-500:]}")
+        return scan
+    for line in result.stdout.splitlines():
+        algorithm, _, digest = line.strip().partition('=')
+        if algorithm == 'SHA256' and digest:
+            scan['fingerprint'] = digest
+    if detect_speech:
+        scan['spans'] = _speech_spans(result.stderr, duration)
+    return scan
+
+
+def densest_window(spans: List[Tuple[float, float]], duration: float, length: float) -> Tuple[float, float]:
+    """(start, length) of the window of the given length holding the most speech"""
+    if duration <= length or not spans:
+        return 0.0, min(duration, length)
+
+    def speech_in(start: float) -> float:
+        end = start + length
+        return sum(max(0.0, min(end, span_end) - max(start, span_start)) for span_start, span_end in spans)
+
+    # The best window can always be moved to start where some speech starts
+    candidates = [min(span_start, duration - length) for span_start, _ in spans]
+    best = max(candidates, key=speech_in)
+    return round(best, 3), length
+
+
+def find_excerpt(scan: Dict, length: float) -> Optional[Tuple[float, float]]:
+    """(start, length) of the most speech-dense excerpt of a scanned video, or None if the whole audio is short enough to use"""
+    duration = scan.get('duration')
+    spans = scan.get('spans')
+    if not duration or duration <= length * 1.5 or spans is None:
+        return None
+    start, length = densest_window(spans, duration, length)
+    speech = sum(max(0.0, min(start + length, e) - max(start, s)) for s, e in spans)
+    logger.info(f"🔍 Language probe excerpt: {length:.0f}s from {start:.1f}s ({speech:.0f}s of speech)")
+    return start, length
@@ -0,0 +1,170 @@
+"""
+Result manifest of a processed video.
+
+The pipeline records what it produced in ``manifests/<video_base_name>.json``
+inside the output folder (or job workspace). This covers the short clips with
+size, duration, time range, score and generated title, plus the processed
+video, the subtitles and the titles file. The web layer reads this one file
+instead of globbing and stat-ing output directories, and cleanup deletes
+exactly the files it lists.
+
+All paths are relative to the output root, with forward slashes.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFESTS_DIRNAME = "manifests"
+MANIFEST_VERSION = 1
+
+
+def manifest_path(output_root, video_base_name: str) -> Path:
+    """Location of the manifest for a video"""
+    return Path(output_root) / MANIFESTS_DIRNAME / f"{video_base_name}.json"
+
+
+def load_manifest(output_root, video_base_name: str) -> Optional[Dict]:
+    """Read a manifest, or None if the video has none (yet)"""
+    path = manifest_path(output_root, video_base_name)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read manifest {path}: {str(e)}")
+        return None
+
+
+def save_manifest(output_root, video_base_name: str, manifest: Dict):
+    """Write a manifest atomically, so readers never see a partial file"""
+    path = manifest_path(output_root, video_base_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix('.json.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def relative_path(path, output_root) -> str:
+    """Path of a file relative to the output root"""
+    path = Path(path).expanduser().resolve()
+    try:
+        return path.relative_to(Path(output_root).expanduser().resolve()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def file_version(stat: os.stat_result) -> str:
+    """Version of a file from its stat; changes whenever the file is rewritten or replaced"""
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}-{stat.st_ino:x}"
+
+
+def file_entry(path, output_root, **fields) -> Optional[Dict]:
+    """Manifest entry for an output file, or None if it does not exist"""
+    if not path:
+        return None
+    path = Path(path)
+    if not path.is_file():
+        return None
+    stat = path.stat()
+    entry = {'path': relative_path(path, output_root), 'size_bytes': stat.st_size, 'version': file_version(stat)}
+    entry.update(fields)
+    return entry
+
+
+def record_clips(output_root, video_base_name: str, clips: List[Dict]):
+    """Store the clips selected and encoded for a video
+
+    Args:
+        clips: Dicts with path, start, end and score of each encoded clip
+    """
+    manifest = load_manifest(output_root, video_base_name) or {}
+    entries = []
+    for clip in clips:
+        entry = file_entry(clip['path'], output_root,
+                           start=round(clip['start'], 3), end=round(clip['end'], 3),
+                           duration=round(clip['end'] - clip['start'], 3),
+                           score=round(clip['score'], 4))
+        if entry:
+            entries.append(entry)
+    manifest['clips'] = entries
+    save_manifest(output_root, video_base_name, manifest)
+
+
+def load_titles(output_root) -> Dict:
+    """Generated titles keyed by clip path relative to the output root"""
+    titles_file = Path(output_root) / "shorts_titles.json"
+    if not titles_file.exists():
+        return {}
+    try:
+        with open(titles_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read {titles_file}: {str(e)}")
+        return {}
+
+
+def finalize_manifest(output_root, video_base_name: str, source, flow: str,
+                      processed_video=None, subtitled_video=None,
+                      renamed_clips: Optional[Dict[str, str]] = None) -> Dict:
+    """Complete a video's manifest once the pipeline has finished with it
+
+    Args:
+        source: Source video path
+        flow: 'vertical' or 'horizontal'
+        processed_video: Full-length processed video, if one was produced
+        subtitled_video: Full-length subtitled video, if one was produced
+        renamed_clips: Recorded clip path → final clip path, for flows that post-process clips
+    """
+    output_root = Path(output_root).expanduser().resolve()
+    manifest = load_manifest(output_root, video_base_name) or {}
+    titles = load_titles(output_root)
+    renamed = {relative_path(old, output_root): relative_path(new, output_root)
+               for old, new in (renamed_clips or {}).items()}
+
+    clips = []
+    for clip in manifest.get('clips', []):
+        path = output_root / renamed.get(clip['path'], clip['path'])
+        entry = file_entry(path, output_root, **{k: v for k, v in clip.items() if k not in ('path', 'size_bytes')})
+        if entry is None:
+            continue
+        title = titles.get(entry['path'])
+        if title:
+            entry.update({k: title.get(k) for k in ('title', 'hashtags', 'description')})
+        clips.append(entry)
+    clips.sort(key=lambda c: c['path'])
+
+    subtitles_dir = output_root / "subtitles"
+    manifest.update({
+        'version': MANIFEST_VERSION,
+        'video_base_name': video_base_name,
+        'source': Path(source).name,
+        'flow': flow,
+        'completed_at': datetime.now().isoformat(timespec='seconds'),
+        'clips': clips,
+        'processed_video': file_entry(processed_video, output_root),
+        'subtitled_video': file_entry(subtitled_video, output_root),
+        'subtitles': {
+            'srt': file_entry(subtitles_dir / f"{video_base_name}.srt", output_root),
+            'ass': file_entry(subtitles_dir / f"{video_base_name}.ass", output_root)
+        },
+        'titles': file_entry(output_root / "shorts_titles.json", output_root)
+    })
+    save_manifest(output_root, video_base_name, manifest)
+    return manifest
+
+
+def manifest_files(output_root, manifest: Dict) -> List[Path]:
+    """Per-video output files listed in a manifest (shared files like the titles file excluded)"""
+    output_root = Path(output_root)
+    entries = list(manifest.get('clips', []))
+    entries += [manifest.get('processed_video'), manifest.get('subtitled_video')]
+    entries += list((manifest.get('subtitles') or {}).values())
+    return [output_root / entry['path'] for entry in entries if entry]
@@ -0,0 +1,132 @@
+"""
+Asynchronous writer for master.log.
+
+Request handlers and worker threads used to open master.log in append mode for
+every event, unlocked and on the request path. Now they only put a record on a
+bounded queue. One background thread drains the queue in batches, writes them
+as JSON lines and rotates the file by size. Pipeline output is not copied in;
+records point at the job's own pipeline.log and events.jsonl instead.
+If the queue is full, records are dropped and counted rather than blocking
+the caller.
+"""
+
+import os
+import json
+import queue
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MASTER_LOG_CONFIG = {
+    'path': 'master.log',
+    'max_queue': 10000,
+    'batch_size': 256,
+    'flush_interval': 1.0,
+    'max_bytes': 50 * 1024 * 1024,
+    'backup_count': 5
+}
+
+
+class MasterLogWriter:
+    """Single background thread that owns master.log"""
+
+    def __init__(self, path, max_queue: int = 10000, batch_size: int = 256,
+                 flush_interval: float = 1.0, max_bytes: int = 50 * 1024 * 1024, backup_count: int = 5):
+        """
+        Args:
+            path: Log file path
+            max_queue: Records buffered before new ones are dropped
+            batch_size: Records written per batch
+            flush_interval: Seconds the writer waits for more records before flushing
+            max_bytes: Size at which the file is rotated (0 disables rotation)
+            backup_count: Rotated files kept (master.log.1 … master.log.N)
+        """
+        self.path = Path(path)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.max_bytes = int(max_bytes)
+        self.backup_count = int(backup_count)
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="master-log-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, session_id: Optional[str], event: str, **fields):
+        """Queue a record; never blocks and never raises"""
+        record = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'session': session_id, 'event': event}
+        record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _take_batch(self) -> List[Dict]:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Dict]):
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            batch.append({'ts': datetime.now().isoformat(timespec='milliseconds'), 'session': None,
+                          'event': 'dropped', 'count': dropped})
+        data = ''.join(json.dumps(record, default=str, ensure_ascii=False) + '\n' for record in batch)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(data)
+                size = f.tell()
+            if self.max_bytes and size >= self.max_bytes:
+                self._rotate()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write to master log: {str(e)}")
+
+    def _rotate(self):
+        """Shift master.log.N-1 → master.log.N … master.log → master.log.1"""
+        if self.backup_count <= 0:
+            self.path.unlink()
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                os.replace(source, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+    def close(self, timeout: float = 5):
+        """Write out everything queued and stop the writer thread"""
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+def create_master_log(config: Optional[Dict] = None, base_dir=None) -> MasterLogWriter:
+    """Build the writer described by the ``master_log`` config section (relative paths resolve against base_dir)"""
+    config = dict(DEFAULT_MASTER_LOG_CONFIG, **(config or {}))
+    path = Path(config['path'])
+    if base_dir is not None and not path.is_absolute():
+        path = Path(base_dir) / path
+    return MasterLogWriter(
+        path,
+        max_queue=config['max_queue'],
+        batch_size=config['batch_size'],
+        flush_interval=config['flush_interval'],
+        max_bytes=config['max_bytes'],
+        backup_count=config['backup_count']
+    )
@@ -0,0 +1,73 @@
+"""
+Delivery of generated media files.
+
+Two modes:
+- ``direct``: Flask streams the file itself, with conditional requests (ETag /
+  If-None-Match) and byte ranges handled, so seeking in a player only fetches
+  the requested part.
+- ``x-accel``: Flask only answers with an ``X-Accel-Redirect`` header and the
+  nginx container sends the file from an internal location, keeping Python
+  workers free.
+
+ETags come from the file's size, mtime and inode, so serving never reads the
+file to validate it. Result URLs carry the file's version (``?v=...``, recorded
+in the result manifest when the file is written). Only a request whose version
+matches the file on disk is marked immutable; anything else must be revalidated,
+so a re-run or resume that rewrites a file at the same path is picked up.
+"""
+
+import os
+import mimetypes
+from pathlib import Path
+from typing import Dict, Optional
+
+from flask import Response, abort, request, send_file
+from werkzeug.security import safe_join
+
+from modules.manifest import file_version
+
+IMMUTABLE_MAX_AGE = 31536000  # One year
+
+
+def cache_control_for(version: str, requested_version: Optional[str]) -> Dict:
+    """Caching policy: immutable only when the URL names the version being served"""
+    if requested_version and requested_version == version:
+        return {'public': True, 'max_age': IMMUTABLE_MAX_AGE, 'immutable': True}
+    return {'public': True, 'no_cache': True}
+
+
+def get_delivery_mode(config: Optional[Dict] = None) -> str:
+    """'direct' or 'x-accel' (MEDIA_DELIVERY_MODE in the environment wins)"""
+    mode = os.environ.get('MEDIA_DELIVERY_MODE') or (config or {}).get('mode', 'direct')
+    return 'x-accel' if mode.lower() in ('x-accel', 'x_accel', 'nginx') else 'direct'
+
+
+def serve_media(output_folder, relative_path: str, config: Optional[Dict] = None) -> Response:
+    """Serve a file below the output folder in the configured delivery mode"""
+    config = config or {}
+    output_root = Path(output_folder).expanduser().resolve()
+    joined = safe_join(str(output_root), relative_path)
+    if joined is None:
+        abort(404)
+    path = Path(joined)
+    if not path.is_file():
+        abort(404)
+
+    relative = path.relative_to(output_root).as_posix()
+    etag = file_version(path.stat())
+    cache_control = cache_control_for(etag, request.args.get('v'))
+
+    if get_delivery_mode(config) == 'x-accel':
+        prefix = config.get('x_accel_prefix', '/protected-output/')
+        response = Response(status=200)
+        response.headers['X-Accel-Redirect'] = f"{prefix.rstrip('/')}/{relative}"
+        response.headers['Content-Type'] = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        response.set_etag(etag)
+    else:
+        # conditional=True answers If-None-Match with 304 and Range with 206
+        response = send_file(path, conditional=True, etag=etag, max_age=cache_control.get('max_age'))
+
+    for directive, value in cache_control.items():
+        setattr(response.cache_control, directive, value)
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
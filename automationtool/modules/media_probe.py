@@ -0,0 +1,54 @@
+"""
+Media probing helpers built on ffprobe.
+"""
+
+import json
+import logging
+import subprocess
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_rate(rate: Optional[str]) -> Optional[float]:
+    """Parse an ffprobe frame rate such as 30000/1001"""
+    try:
+        numerator, _, denominator = (rate or '').partition('/')
+        value = float(numerator) / float(denominator or 1)
+        return round(value, 3) if value > 0 else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def probe_media(video_path, timeout: float = 30) -> Optional[Dict]:
+    """Return duration (seconds), width, height and fps of a media file, or None if it cannot be probed"""
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'format=duration:stream=width,height,r_frame_rate',
+        '-of', 'json',
+        str(video_path)
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0:
+            logger.warning(f"⚠️ ffprobe failed for {video_path}: {result.stderr.strip()}")
+            return None
+        data = json.loads(result.stdout)
+        duration = data.get('format', {}).get('duration')
+        streams = data.get('streams') or [{}]
+        return {
+            'duration': float(duration) if duration else None,
+            'width': streams[0].get('width'),
+            'height': streams[0].get('height'),
+            'fps': _frame_rate(streams[0].get('r_frame_rate'))
+        }
+    except Exception as e:
+        logger.warning(f"⚠️ Could not probe {video_path}: {str(e)}")
+        return None
+
+
+def probe_duration(video_path, timeout: float = 30) -> Optional[float]:
+    """Return the duration of a media file in seconds, or None if it cannot be probed"""
+    info = probe_media(video_path, timeout)
+    return info['duration'] if info else None
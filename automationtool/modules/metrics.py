@@ -0,0 +1,266 @@
+"""
+Timing and resource report of a pipeline run.
+
+Every stage records its wall time and the CPU time of its own thread. Every
+external command it runs (ffmpeg) records its wall time, user/sys CPU time, peak
+RSS and block I/O, taken from the child's rusage when it is reaped. Every
+external API call records its latency. The report is written to
+``metrics/<video_base_name>.json`` in the output folder (or job workspace). Its
+summary is added to the API result, so a slow job shows whether the time went
+to Deepgram, the subtitle burn or the clip encodes.
+
+Commands and API calls are attributed to the stage running in the current
+context (see stage), including in threads that copy the context.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import threading
+import contextvars
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from modules.process_control import kill_process_tree, popen_group, release
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIRNAME = "metrics"
+
+# Stage that commands and API calls of the current context belong to
+_current_stage = contextvars.ContextVar('metrics_stage', default=None)
+
+
+def metrics_path(output_root, video_base_name: str) -> Path:
+    """Location of the metrics report for a video"""
+    return Path(output_root) / METRICS_DIRNAME / f"{video_base_name}.json"
+
+
+def _max_rss_mb(rusage) -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(rusage.ru_maxrss / divisor, 1)
+
+
+class JobMetrics:
+    """Stage, command and API call measurements of one video"""
+
+    def __init__(self, video=None):
+        self.video = str(video) if video else None
+        self.started = time.time()
+        self.stages: List[Dict] = []
+        self.commands: List[Dict] = []
+        self.api_calls: List[Dict] = []
+        # Called with each stage entry as it finishes (e.g. to refine the ETA)
+        self.listeners: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, stage: str, name: Optional[str] = None):
+        """Measure a stage; commands and API calls inside it are attributed to it"""
+        token = _current_stage.set(stage)
+        started = time.time()
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        status = 'failed'
+        try:
+            yield
+            status = 'completed'
+        finally:
+            _current_stage.reset(token)
+            entry = {
+                'stage': stage,
+                'name': name or stage,
+                'status': status,
+                'started_at': datetime.fromtimestamp(started).isoformat(timespec='milliseconds'),
+                'wall_seconds': round(time.perf_counter() - wall_start, 3),
+                'cpu_seconds': round(time.thread_time() - cpu_start, 3)
+            }
+            with self._lock:
+                self.stages.append(entry)
+            for listener in list(self.listeners):
+                try:
+                    listener(entry)
+                except Exception as e:
+                    logger.warning(f"⚠️ Stage listener failed: {str(e)}")
+
+    @contextmanager
+    def api_call(self, service: str, operation: str):
+        """Measure the latency of an external API call"""
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            entry = {'stage': _current_stage.get(), 'service': service, 'operation': operation,
+                     'seconds': round(time.perf_counter() - started, 3), 'ok': ok}
+            with self._lock:
+                self.api_calls.append(entry)
+
+    def add_command(self, entry: Dict):
+        entry = dict(entry, stage=_current_stage.get())
+        with self._lock:
+            self.commands.append(entry)
+
+    def stage_totals(self) -> List[Dict]:
+        """Stages with the resources of their commands and API calls added up
+
+        Repeated runs of a stage (e.g. subtitles for every clip) are combined into one entry.
+        """
+        with self._lock:
+            stages, commands, api_calls = list(self.stages), list(self.commands), list(self.api_calls)
+        grouped = {}
+        for stage in stages:
+            entry = grouped.get(stage['stage'])
+            if entry is None:
+                grouped[stage['stage']] = dict(stage, runs=1)
+            else:
+                entry['runs'] += 1
+                entry['wall_seconds'] = round(entry['wall_seconds'] + stage['wall_seconds'], 3)
+                entry['cpu_seconds'] = round(entry['cpu_seconds'] + stage['cpu_seconds'], 3)
+                if stage['status'] == 'failed':
+                    entry['status'] = 'failed'
+
+        totals = []
+        for key, stage in grouped.items():
+            own_commands = [c for c in commands if c['stage'] == key]
+            own_calls = [c for c in api_calls if c['stage'] == key]
+            totals.append(dict(
+                stage,
+                commands=len(own_commands),
+                command_seconds=round(sum(c['wall_seconds'] for c in own_commands), 3),
+                child_user_seconds=round(sum(c.get('user_seconds') or 0 for c in own_commands), 3),
+                child_sys_seconds=round(sum(c.get('sys_seconds') or 0 for c in own_commands), 3),
+                peak_child_rss_mb=max((c.get('max_rss_mb') or 0 for c in own_commands), default=0),
+                read_bytes=sum(c.get('read_bytes') or 0 for c in own_commands),
+                write_bytes=sum(c.get('write_bytes') or 0 for c in own_commands),
+                api_calls=len(own_calls),
+                api_seconds=round(sum(c['seconds'] for c in own_calls), 3)
+            ))
+        return totals
+
+    def summary(self) -> Dict:
+        """Short form for the API result: wall time per stage and where the time went"""
+        totals = self.stage_totals()
+        slowest = max(totals, key=lambda s: s['wall_seconds'], default=None)
+        return {
+            'wall_seconds': round(time.time() - self.started, 1),
+            'stages': {s['stage']: round(s['wall_seconds'], 1) for s in totals},
+            'slowest_stage': slowest['stage'] if slowest else None,
+            'command_seconds': round(sum(s['command_seconds'] for s in totals), 1),
+            'api_seconds': round(sum(s['api_seconds'] for s in totals), 1),
+            'peak_child_rss_mb': max((s['peak_child_rss_mb'] for s in totals), default=0)
+        }
+
+    def report(self) -> Dict:
+        with self._lock:
+            commands, api_calls = list(self.commands), list(self.api_calls)
+        return {
+            'video': self.video,
+            'started_at': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'summary': self.summary(),
+            'stages': self.stage_totals(),
+            'commands': commands,
+            'api_calls': api_calls
+        }
+
+    def write(self, output_root, video_base_name: str) -> Optional[Path]:
+        """Write the report, returning its path (None if it could not be written)"""
+        path = metrics_path(output_root, video_base_name)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix('.json.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.report(), f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, path)
+            return path
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write metrics report {path}: {str(e)}")
+            return None
+
+
+def load_metrics(output_root, video_base_name: str) -> Optional[Dict]:
+    """Read a video's metrics report, or None if it has none"""
+    try:
+        with open(metrics_path(output_root, video_base_name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read metrics report for {video_base_name}: {str(e)}")
+        return None
+
+
+_metrics = JobMetrics()
+_metrics_lock = threading.Lock()
+
+
+def start_job_metrics(video=None) -> JobMetrics:
+    """Start collecting for a new video in this process"""
+    global _metrics
+    with _metrics_lock:
+        _metrics = JobMetrics(video)
+        return _metrics
+
+
+def get_metrics() -> JobMetrics:
+    """Collector of the video being processed in this process"""
+    return _metrics
+
+
+def measure_api(service: str, operation: str):
+    """Context manager measuring an external API call of the current stage"""
+    return get_metrics().api_call(service, operation)
+
+
+def wait_measured(process: subprocess.Popen, step: str, started: float) -> int:
+    """Reap a finished child, recording its resource usage; returns its return code
+
+    Call once the child's output has been read; replaces process.wait().
+    """
+    entry = {'step': step, 'command': Path(str(process.args[0])).name if process.args else None}
+    if process.returncode is None and hasattr(os, 'wait4'):
+        try:
+            _, status, rusage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            # Reaped by a stage deadline that killed the process group; its usage is gone
+            process.wait()
+        else:
+            process.returncode = os.waitstatus_to_exitcode(status)
+            entry.update(user_seconds=round(rusage.ru_utime, 3), sys_seconds=round(rusage.ru_stime, 3),
+                         max_rss_mb=_max_rss_mb(rusage),
+                         read_bytes=rusage.ru_inblock * 512, write_bytes=rusage.ru_oublock * 512)
+    else:
+        process.wait()
+    entry.update(wall_seconds=round(time.perf_counter() - started, 3), returncode=process.returncode)
+    get_metrics().add_command(entry)
+    return process.returncode
+
+
+def run_measured(command: List[str], step: str, check: bool = False, text: bool = False,
+                 cwd=None) -> subprocess.CompletedProcess:
+    """Like subprocess.run(command, capture_output=True), recording the command's resource usage"""
+    started = time.perf_counter()
+    with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+        process = popen_group(command, stdout=stdout_file, stderr=stderr_file, cwd=cwd)
+        try:
+            return_code = wait_measured(process, step, started)
+        except BaseException:
+            kill_process_tree(process)
+            raise
+        finally:
+            release(process)
+        stdout_file.seek(0)
+        stderr_file.seek(0)
+        stdout, stderr = stdout_file.read(), stderr_file.read()
+    if text:
+        stdout, stderr = stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace')
+    if check and return_code != 0:
+        raise subprocess.CalledProcessError(return_code, command, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(command, return_code, stdout, stderr)
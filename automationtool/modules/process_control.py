@@ -0,0 +1,264 @@
+"""
+Process-tree control for pipeline stages.
+
+Stages run inside the pipeline process (or a warm worker) and start ffmpeg and
+other tools as child processes. Killing only the direct child can leave the
+rest running, so every child is started as the leader of its own process group
+(a new session on POSIX, a new process group on Windows) and stopped by
+signalling the whole group. A stage that overruns its deadline has the groups
+it started killed and gets DeadlineExceeded raised in its thread, so the
+process running it survives. Per-stage deadlines are derived from the probed
+media duration.
+"""
+
+import os
+import ctypes
+import signal
+import logging
+import threading
+import contextvars
+import subprocess
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds a process group gets between SIGTERM and SIGKILL
+KILL_GRACE_PERIOD = 5
+
+# Fallback deadlines per pipeline step: base seconds + seconds per second of media
+DEFAULT_STAGE_DEADLINES = {
+    'transcribe': {'base': 120, 'per_media_second': 0.5},
+    'add_subtitles': {'base': 180, 'per_media_second': 1.5},
+    'trim_silence': {'base': 120, 'per_media_second': 1.0},
+    'select_clips': {'base': 60, 'per_media_second': 0.1},
+    'create_shorts': {'base': 180, 'per_media_second': 2.0},
+    'generate_titles': {'base': 180, 'per_media_second': 0.2},
+    'upload_shorts': {'base': 600, 'per_media_second': 0.5},
+    'horizontal': {'base': 300, 'per_media_second': 6.0},
+}
+
+# Media duration assumed when probing fails
+DEFAULT_MEDIA_SECONDS = 600
+
+# Process groups started by this process that may still be running
+_active_processes = set()
+_active_lock = threading.Lock()
+
+# Process groups started by each stage deadline that encloses the current context (innermost last)
+_stage_processes = contextvars.ContextVar('stage_processes', default=())
+
+
+class DeadlineExceeded(Exception):
+    """A stage running inside this process overran its deadline"""
+
+
+def new_group_kwargs() -> Dict:
+    """Popen arguments that start the child as leader of a new process group"""
+    if os.name == 'nt':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+def popen_group(command, **kwargs) -> subprocess.Popen:
+    """Start a command in its own process group (tracked until release() is called)"""
+    kwargs.update(new_group_kwargs())
+    process = subprocess.Popen(command, **kwargs)
+    with _active_lock:
+        _active_processes.add(process)
+        for started in _stage_processes.get():
+            started.add(process)
+    return process
+
+
+def release(process: subprocess.Popen):
+    """Stop tracking a finished process group"""
+    with _active_lock:
+        _active_processes.discard(process)
+
+
+def kill_active_process_groups():
+    """Kill every process group this process started that is still tracked"""
+    with _active_lock:
+        processes = list(_active_processes)
+        _active_processes.clear()
+    for process in processes:
+        kill_process_tree(process)
+
+
+def kill_process_groups(processes: Iterable[subprocess.Popen]):
+    """Kill those of the given process groups that are still tracked"""
+    with _active_lock:
+        running = [process for process in processes if process in _active_processes]
+        _active_processes.difference_update(running)
+    for process in running:
+        kill_process_tree(process)
+
+
+def kill_process_tree(process: subprocess.Popen, grace: float = KILL_GRACE_PERIOD):
+    """Terminate a process started with popen_group and everything it spawned"""
+    if process.poll() is not None and os.name == 'nt':
+        return
+    try:
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)], capture_output=True)
+            return
+        # The group may outlive its leader, so signal it even if the leader already exited
+        os.killpg(process.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+    except Exception as e:
+        logger.warning(f"⚠️ Could not terminate process group {process.pid}: {str(e)}")
+        return
+
+    try:
+        process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class Deadline:
+    """Kills a process group if it is still running when the deadline passes"""
+
+    def __init__(self, process: subprocess.Popen, timeout: Optional[float]):
+        self.process = process
+        self.expired = False
+        self._timer = None
+        if timeout:
+            self._timer = threading.Timer(timeout, self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _expire(self):
+        if self.process.poll() is None:
+            self.expired = True
+            kill_process_tree(self.process)
+
+    def cancel(self):
+        if self._timer:
+            self._timer.cancel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cancel()
+        return False
+
+
+def _raise_in_thread(thread_id: int, exception: Optional[type]) -> bool:
+    """Schedule an exception in another thread of this process (None clears a pending one)"""
+    exception = ctypes.py_object(exception) if exception is not None else None
+    return ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), exception) == 1
+
+
+class StageDeadline:
+    """Deadline for a stage that runs inside this process
+
+    Use as a context manager around the stage, in the thread that runs it.
+    When the deadline passes, the process groups started inside the block
+    (including from threads that copied its context) are killed and
+    DeadlineExceeded is raised in the stage's thread. Python code cannot be
+    interrupted while it waits in a system call, so a stage blocked on
+    something other than its children notices the deadline once that returns.
+    """
+
+    def __init__(self, name: str, timeout: Optional[float], on_expire=None):
+        self.name = name
+        self.timeout = timeout
+        self.on_expire = on_expire
+        self.expired = False
+        self.processes = set()
+        self._thread_id = None
+        self._token = None
+        self._finished = False
+        self._lock = threading.Lock()
+        self._timer = None
+        if timeout:
+            self._timer = threading.Timer(timeout, self._expire)
+            self._timer.daemon = True
+
+    def _expire(self):
+        with self._lock:
+            if self._finished:
+                return
+            self.expired = True
+            logger.error(f"❌ {self.name} exceeded its deadline of {self.timeout:.0f}s, stopping it")
+            if self.on_expire:
+                try:
+                    self.on_expire()
+                except Exception as e:
+                    logger.warning(f"⚠️ Deadline callback failed: {str(e)}")
+            kill_process_groups(list(self.processes))
+            _raise_in_thread(self._thread_id, DeadlineExceeded)
+
+    def cancel(self):
+        if self._timer:
+            self._timer.cancel()
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        self._token = _stage_processes.set(_stage_processes.get() + (self.processes,))
+        if self._timer:
+            self._timer.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _stage_processes.reset(self._token)
+        with self._lock:
+            self._finished = True
+        self.cancel()
+        if self.expired:
+            # The stage may have finished before the scheduled exception was delivered
+            _raise_in_thread(self._thread_id, None)
+            raise DeadlineExceeded(f"{self.name} exceeded its deadline of {self.timeout:.0f}s") from exc
+        return False
+
+
+def run_with_deadline(command, timeout: Optional[float] = None, **kwargs) -> subprocess.CompletedProcess:
+    """Like subprocess.run(command, capture_output=True, ...) but kills the whole tree on timeout.
+
+    Raises subprocess.TimeoutExpired once the process group has been killed.
+    """
+    kwargs.setdefault('stdout', subprocess.PIPE)
+    kwargs.setdefault('stderr', subprocess.PIPE)
+    process = popen_group(command, **kwargs)
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_tree(process)
+        stdout, stderr = process.communicate()
+        raise subprocess.TimeoutExpired(command, timeout, output=stdout, stderr=stderr)
+    except BaseException:
+        kill_process_tree(process)
+        raise
+    finally:
+        release(process)
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+
+def stage_deadline(config: Dict, step_key: str, media_seconds: Optional[float]) -> float:
+    """Seconds a pipeline step may run for a source of the given duration"""
+    deadlines = config.get('stage_deadlines', {})
+    settings = dict(DEFAULT_STAGE_DEADLINES.get(step_key, {'base': 300, 'per_media_second': 1.0}))
+    settings.update(deadlines.get(step_key, {}))
+    if not media_seconds:
+        media_seconds = deadlines.get('default_media_seconds', DEFAULT_MEDIA_SECONDS)
+    return float(settings['base']) + float(settings['per_media_second']) * float(media_seconds)
+
+
+def pipeline_deadline(config: Dict, media_seconds: Optional[float]) -> float:
+    """Upper bound for a whole pipeline run: the slowest flow's enabled steps plus slack"""
+    steps = dict(config.get('pipeline_steps', {}))
+    steps['transcribe'] = any(steps.get(key, False) for key in ('add_subtitles', 'create_shorts', 'generate_titles'))
+    steps['select_clips'] = steps.get('create_shorts', False)
+    # Steps overlap when run by the scheduler, so running them one after another is the worst case
+    vertical = sum(stage_deadline(config, key, media_seconds)
+                   for key in ('transcribe', 'add_subtitles', 'trim_silence', 'select_clips', 'create_shorts',
+                               'generate_titles', 'upload_shorts')
+                   if steps.get(key, False))
+    horizontal = stage_deadline(config, 'horizontal', media_seconds)
+    return max(vertical, horizontal) + 60
@@ -0,0 +1,284 @@
+"""
+Stage progress events for a pipeline run.
+
+The pipeline and the stage scripts it launches append one JSON line per event
+to ``events.jsonl`` in the job workspace (the path is handed down through the
+``PIPELINE_EVENTS_FILE`` environment variable). The web app tails that file to
+push progress to clients; the byte offset after each line doubles as the event
+ID, so a reconnecting client resumes exactly where it left off.
+
+Events are typed (StageEvent): a stage's lifecycle (started, progress,
+completed, failed), the artifacts it produced, and the warnings logged while it
+ran. Consumers read these fields directly instead of parsing log lines. Log
+formatting is left to the console.
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+import contextvars
+import subprocess
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from modules.metrics import wait_measured
+from modules.process_control import kill_process_tree, popen_group, release
+
+EVENTS_FILENAME = "events.jsonl"
+EVENTS_ENV_VAR = "PIPELINE_EVENTS_FILE"
+
+# Share of the overall progress bar taken by each stage, in pipeline order
+STAGE_WEIGHTS = [
+    ('transcribe', 20),
+    ('trim', 15),
+    ('select_clips', 5),
+    ('encode', 30),
+    ('crop', 10),
+    ('titles', 10),
+    ('upload', 10),
+]
+
+# Minimum delay between two progress events of the same stage
+PROGRESS_INTERVAL = 1.0
+
+# Statuses that move a stage through its lifecycle (and the progress bar)
+LIFECYCLE_STATUSES = ('started', 'progress', 'completed', 'failed')
+# A file a stage produced, and a warning logged while a stage ran
+ARTIFACT = 'artifact'
+WARNING = 'warning'
+
+# Stage that warnings logged in the current context belong to
+_current_stage = contextvars.ContextVar('progress_stage', default='pipeline')
+
+
+@dataclass(frozen=True)
+class StageEvent:
+    """One typed event of a pipeline run"""
+    stage: str
+    status: str  # One of LIFECYCLE_STATUSES, ARTIFACT or WARNING
+    progress: int
+    message: Optional[str] = None
+    fields: Dict = field(default_factory=dict)
+    time: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict:
+        event = {'time': self.time, 'stage': self.stage, 'status': self.status, 'progress': self.progress}
+        if self.message:
+            event['message'] = self.message
+        event.update(self.fields)
+        return event
+
+
+def overall_progress(stage: str, fraction: float = 0.0) -> int:
+    """Convert a position inside a stage into an overall percentage"""
+    done = 0
+    for name, weight in STAGE_WEIGHTS:
+        if name == stage:
+            fraction = min(max(fraction, 0.0), 1.0)
+            return min(99, int(done + weight * fraction))
+        done += weight
+    return 0
+
+
+class ProgressReporter:
+    """Appends stage events to a job's events file (no-op without one)"""
+
+    def __init__(self, events_file=None):
+        events_file = events_file or os.environ.get(EVENTS_ENV_VAR)
+        self.events_file = Path(events_file) if events_file else None
+        self._last_progress_at = 0.0
+        # Stages can run concurrently, so the overall percentage only ever moves forward
+        self._reached = 0
+        self._lock = threading.Lock()
+        # In-process sinks, called with every StageEvent
+        self.subscribers: List[Callable[[StageEvent], None]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.events_file is not None or bool(self.subscribers)
+
+    @contextmanager
+    def scope(self, stage: str):
+        """Attribute warnings logged inside the block (including threads that copy the context) to a stage"""
+        token = _current_stage.set(stage)
+        try:
+            yield
+        finally:
+            _current_stage.reset(token)
+
+    def emit(self, stage: str, status: str, message: Optional[str] = None,
+             fraction: float = 0.0, **fields):
+        """Record an event.
+
+        Args:
+            stage: Stage name (see STAGE_WEIGHTS), or 'pipeline' for the whole run
+            status: 'started', 'progress', 'completed' or 'failed'
+            message: Human readable description
+            fraction: Position inside the stage between 0 and 1
+            **fields: Extra data such as current/total clip numbers
+        """
+        if not self.enabled:
+            return
+        if status == 'completed':
+            fraction = 1.0
+        if stage == 'pipeline' and status == 'completed':
+            progress = 100
+        elif status in LIFECYCLE_STATUSES:
+            progress = overall_progress(stage, fraction)
+        else:
+            progress = 0  # Artifacts and warnings keep the progress reached so far
+        if stage != 'pipeline' or status not in LIFECYCLE_STATUSES:
+            with self._lock:
+                self._reached = max(self._reached, progress)
+                progress = self._reached
+        self.publish(StageEvent(stage, status, progress, message, fields))
+
+    def publish(self, event: StageEvent):
+        """Write an event to the events file and hand it to the subscribers"""
+        if self.events_file is not None:
+            line = (json.dumps(event.to_dict(), ensure_ascii=False) + "\n").encode('utf-8')
+            try:
+                # A single O_APPEND write keeps lines from concurrent writers intact
+                fd = os.open(str(self.events_file), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber(event)
+            except Exception:
+                pass
+
+    def artifact(self, stage: str, kind: str, paths: Iterable, root=None, **fields):
+        """Record the files a stage produced (paths relative to root when given)"""
+        files = []
+        for path in paths:
+            path = Path(path)
+            if root is not None:
+                try:
+                    path = path.resolve().relative_to(Path(root).resolve())
+                except ValueError:
+                    pass
+            files.append(path.as_posix())
+        self.emit(stage, ARTIFACT, f"{kind}: {len(files)} file(s)", artifact=kind, files=files, **fields)
+
+    def warning(self, message: str, stage: Optional[str] = None, **fields):
+        """Record a warning, attributed to the current stage unless one is given"""
+        self.emit(stage or _current_stage.get(), WARNING, message, **fields)
+
+    def progress(self, stage: str, fraction: float, message: Optional[str] = None, **fields):
+        """Record in-stage progress, throttled to one event per PROGRESS_INTERVAL"""
+        now = time.time()
+        if now - self._last_progress_at < PROGRESS_INTERVAL:
+            return
+        self._last_progress_at = now
+        self.emit(stage, 'progress', message, fraction=fraction, **fields)
+
+
+_reporter = None
+
+
+def get_reporter() -> ProgressReporter:
+    """Reporter for the events file of the current pipeline run"""
+    global _reporter
+    if _reporter is None:
+        _reporter = ProgressReporter()
+    return _reporter
+
+
+def start_reporter(events_file=None) -> ProgressReporter:
+    """Report to a new events file from now on (e.g. a warm worker starting its next job)"""
+    global _reporter
+    _reporter = ProgressReporter(events_file)
+    return _reporter
+
+
+class EventLogHandler(logging.Handler):
+    """Logging sink that turns warnings and errors into WARNING events of the current stage"""
+
+    def __init__(self, level=logging.WARNING):
+        super().__init__(level)
+
+    def emit(self, record: logging.LogRecord):
+        reporter = get_reporter()
+        # Stage failures logged by the pipeline already have their own 'failed' event
+        if not reporter.enabled or getattr(record, 'stage_status', None):
+            return
+        try:
+            reporter.warning(record.getMessage(), level=record.levelname, logger=record.name)
+        except Exception:
+            self.handleError(record)
+
+
+def run_ffmpeg_with_progress(cmd: List[str], duration: float,
+                             on_progress: Callable[[float], None]) -> subprocess.CompletedProcess:
+    """Run an ffmpeg command, reporting the fraction of ``duration`` encoded so far.
+
+    Raises subprocess.CalledProcessError (with stderr bytes) on failure, like
+    ``subprocess.run(cmd, check=True, capture_output=True)``.
+    """
+    cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + list(cmd[1:])
+    started = time.perf_counter()
+    with tempfile.TemporaryFile() as stderr_file:
+        process = popen_group(cmd, stdout=subprocess.PIPE, stderr=stderr_file, universal_newlines=True)
+        try:
+            for line in process.stdout:
+                key, _, value = line.strip().partition('=')
+                if key == 'out_time_us' and duration > 0:
+                    try:
+                        on_progress(int(value) / 1_000_000 / duration)
+                    except ValueError:
+                        pass
+            return_code = wait_measured(process, 'ffmpeg encode', started)
+        except BaseException:
+            kill_process_tree(process)
+            raise
+        finally:
+            process.stdout.close()
+            release(process)
+        stderr_file.seek(0)
+        stderr = stderr_file.read()
+    if return_code != 0:
+        raise subprocess.CalledProcessError(return_code, cmd, output=b'', stderr=stderr)
+    return subprocess.CompletedProcess(cmd, return_code, b'', stderr)
+
+
+def read_events(events_file, offset: int = 0) -> Tuple[List[Tuple[int, Dict]], int]:
+    """Read complete events written after ``offset``.
+
+    Returns a list of (end_offset, event) pairs and the offset to continue from.
+    """
+    events_file = Path(events_file)
+    if not events_file.exists():
+        return [], offset
+    with open(events_file, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    events = []
+    position = offset
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break  # Partially written line, pick it up next time
+        position += len(line)
+        try:
+            events.append((position, json.loads(line)))
+        except json.JSONDecodeError:
+            continue
+    return events, position
+
+
+def last_event(events_file, statuses: Optional[Iterable[str]] = None) -> Optional[Dict]:
+    """Most recent event in the file, if any (only events with one of ``statuses`` when given)"""
+    events, _ = read_events(events_file)
+    if statuses is not None:
+        statuses = set(statuses)
+        events = [item for item in events if item[1].get('status') in statuses]
+    return events[-1][1] if events else None
@@ -0,0 +1,343 @@
+"""
+Job queue state shared by the web server processes.
+
+Queued and running jobs used to live in the memory of the one process that ran
+the queue, so every other gunicorn worker had to refuse jobs. The state is now
+kept where all of them can reach it, and any process can enqueue, cancel or
+report a position. Only the process holding the owner lease runs the jobs, so
+``max_workers`` stays a limit for the whole server; when the owner stops or
+dies, another process takes the lease over and resumes what it was running.
+
+Backends: in-memory (single process, no state file), a JSON file updated under
+a file lock (processes on one host, the owner lease is a held lock file) and
+Redis (a list of queued jobs, a hash of running ones and an expiring owner key,
+used whenever task state is in Redis).
+"""
+
+import json
+import time
+import uuid
+import socket
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from modules.file_lock import file_lock, hold_lock
+
+logger = logging.getLogger(__name__)
+
+# Seconds a Redis owner lease lasts without being renewed
+OWNER_LEASE_SECONDS = 30
+
+
+def queue_entry(job_id: str, payload: Dict, queued_at: Optional[float] = None) -> Dict:
+    return {'job_id': job_id, 'payload': payload, 'queued_at': queued_at or time.time()}
+
+
+def interrupted_entry(entry: Dict) -> Dict:
+    """Queue entry of a job whose run was interrupted; it continues from its journal"""
+    return queue_entry(entry['job_id'], dict(entry.get('payload', {}), resume=True))
+
+
+class QueueState:
+    """Interface of a job queue state backend"""
+
+    def push(self, entry: Dict) -> int:
+        """Append a queued job and return its 1-based position"""
+        raise NotImplementedError
+
+    def pop(self) -> Optional[Dict]:
+        """Move the oldest queued job to the running jobs and return it, or None if none is queued"""
+        raise NotImplementedError
+
+    def finish(self, job_id: str):
+        """Forget a running job"""
+        raise NotImplementedError
+
+    def remove(self, job_id: str) -> bool:
+        """Drop a queued job; False if it is not queued"""
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        """Running jobs (with started_at) and queued jobs (with queued_at), queued ones in FIFO order"""
+        raise NotImplementedError
+
+    def requeue_running(self) -> List[Dict]:
+        """Put jobs left running by a previous owner back at the head of the queue; returns them"""
+        raise NotImplementedError
+
+    def acquire_owner(self) -> bool:
+        """Take (or keep) the owner lease; False while another process holds it"""
+        raise NotImplementedError
+
+    def release_owner(self):
+        raise NotImplementedError
+
+    def position(self, job_id: str) -> Optional[int]:
+        """0 if the job is running, its 1-based queue position if waiting, else None"""
+        snapshot = self.snapshot()
+        if any(job['job_id'] == job_id for job in snapshot['running']):
+            return 0
+        for index, job in enumerate(snapshot['pending']):
+            if job['job_id'] == job_id:
+                return index + 1
+        return None
+
+
+class MemoryQueueState(QueueState):
+    """Queue state kept in this process only"""
+
+    def __init__(self):
+        self._pending = deque()
+        self._running: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def push(self, entry):
+        with self._lock:
+            self._pending.append(entry)
+            return len(self._pending)
+
+    def pop(self):
+        with self._lock:
+            if not self._pending:
+                return None
+            entry = self._pending.popleft()
+            self._running[entry['job_id']] = dict(entry, started_at=time.time())
+            return entry
+
+    def finish(self, job_id):
+        with self._lock:
+            self._running.pop(job_id, None)
+
+    def remove(self, job_id):
+        with self._lock:
+            for entry in self._pending:
+                if entry['job_id'] == job_id:
+                    self._pending.remove(entry)
+                    return True
+        return False
+
+    def snapshot(self):
+        with self._lock:
+            return {'running': list(self._running.values()), 'pending': list(self._pending)}
+
+    def requeue_running(self):
+        with self._lock:
+            interrupted = [interrupted_entry(entry) for entry in self._running.values()]
+            self._running.clear()
+            self._pending.extendleft(reversed(interrupted))
+            return interrupted
+
+    def acquire_owner(self):
+        return True
+
+    def release_owner(self):
+        pass
+
+
+class FileQueueState(QueueState):
+    """Queue state in a JSON file, shared by the processes on this host"""
+
+    def __init__(self, state_file):
+        self.state_file = Path(state_file)
+        self._owner_lock = None
+
+    def _read(self) -> Dict:
+        if not self.state_file.exists():
+            return {'running': [], 'pending': []}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read job queue state: {str(e)}")
+            return {'running': [], 'pending': []}
+        # Entries written before queued_at/started_at were recorded
+        now = time.time()
+        return {'running': [dict(entry, started_at=entry.get('started_at', now)) for entry in state.get('running', [])],
+                'pending': [queue_entry(entry['job_id'], entry.get('payload', {}), entry.get('queued_at'))
+                            for entry in state.get('pending', []) if entry.get('job_id')]}
+
+    def _write(self, state: Dict):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_file.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        tmp_path.replace(self.state_file)
+
+    def push(self, entry):
+        with file_lock(self.state_file):
+            state = self._read()
+            state['pending'].append(entry)
+            self._write(state)
+            return len(state['pending'])
+
+    def pop(self):
+        with file_lock(self.state_file):
+            state = self._read()
+            if not state['pending']:
+                return None
+            entry = state['pending'].pop(0)
+            state['running'].append(dict(entry, started_at=time.time()))
+            self._write(state)
+            return entry
+
+    def finish(self, job_id):
+        with file_lock(self.state_file):
+            state = self._read()
+            state['running'] = [entry for entry in state['running'] if entry['job_id'] != job_id]
+            self._write(state)
+
+    def remove(self, job_id):
+        with file_lock(self.state_file):
+            state = self._read()
+            pending = [entry for entry in state['pending'] if entry['job_id'] != job_id]
+            if len(pending) == len(state['pending']):
+                return False
+            state['pending'] = pending
+            self._write(state)
+            return True
+
+    def snapshot(self):
+        with file_lock(self.state_file):
+            return self._read()
+
+    def requeue_running(self):
+        with file_lock(self.state_file):
+            state = self._read()
+            interrupted = [interrupted_entry(entry) for entry in state['running']]
+            state = {'running': [], 'pending': interrupted + state['pending']}
+            self._write(state)
+            return interrupted
+
+    def acquire_owner(self):
+        # The lock is released by the OS when the owner dies, so a lease needs no renewing
+        if self._owner_lock is None:
+            self._owner_lock = hold_lock(f"{self.state_file}.owner")
+        return self._owner_lock is not None
+
+    def release_owner(self):
+        if self._owner_lock is not None:
+            self._owner_lock.close()
+            self._owner_lock = None
+
+
+class RedisQueueState(QueueState):
+    """Queue state shared through Redis"""
+
+    def __init__(self, redis_client, key_prefix: str = "makereels:queue:", lease_seconds: int = OWNER_LEASE_SECONDS):
+        import redis
+        self.redis = redis_client
+        self.pending_key = f"{key_prefix}pending"
+        self.running_key = f"{key_prefix}running"
+        self.owner_key = f"{key_prefix}owner"
+        self.lease_seconds = int(lease_seconds)
+        self.owner_id = f"{socket.gethostname()}:{uuid.uuid4().hex}"
+        self._watch_error = redis.WatchError
+
+    def push(self, entry):
+        return int(self.redis.rpush(self.pending_key, json.dumps(entry)))
+
+    def pop(self):
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    # Optimistic transaction: the job moves to running exactly once, even if the owner changes
+                    pipe.watch(self.pending_key)
+                    value = pipe.lindex(self.pending_key, 0)
+                    if value is None:
+                        pipe.unwatch()
+                        return None
+                    entry = json.loads(value)
+                    pipe.multi()
+                    pipe.lpop(self.pending_key)
+                    pipe.hset(self.running_key, entry['job_id'], json.dumps(dict(entry, started_at=time.time())))
+                    pipe.execute()
+                    return entry
+                except self._watch_error:
+                    continue
+
+    def finish(self, job_id):
+        self.redis.hdel(self.running_key, job_id)
+
+    def remove(self, job_id):
+        for value in self.redis.lrange(self.pending_key, 0, -1):
+            if json.loads(value)['job_id'] == job_id:
+                # Removes nothing if a worker took the job meanwhile
+                return bool(self.redis.lrem(self.pending_key, 1, value))
+        return False
+
+    def snapshot(self):
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hvals(self.running_key)
+            pipe.lrange(self.pending_key, 0, -1)
+            running, pending = pipe.execute()
+        running = sorted((json.loads(value) for value in running), key=lambda entry: entry.get('started_at', 0))
+        return {'running': running, 'pending': [json.loads(value) for value in pending]}
+
+    def requeue_running(self):
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self.running_key)
+                    running = sorted((json.loads(value) for value in pipe.hvals(self.running_key)),
+                                     key=lambda entry: entry.get('started_at', 0))
+                    if not running:
+                        pipe.unwatch()
+                        return []
+                    interrupted = [interrupted_entry(entry) for entry in running]
+                    pipe.multi()
+                    pipe.lpush(self.pending_key, *[json.dumps(entry) for entry in reversed(interrupted)])
+                    pipe.delete(self.running_key)
+                    pipe.execute()
+                    return interrupted
+                except self._watch_error:
+                    continue
+
+    def acquire_owner(self):
+        if self.redis.set(self.owner_key, self.owner_id, ex=self.lease_seconds, nx=True):
+            return True
+        with self.redis.pipeline() as pipe:
+            try:
+                # Renew the lease only if it is still ours
+                pipe.watch(self.owner_key)
+                owner = pipe.get(self.owner_key)
+                if owner is None or owner.decode('utf-8') != self.owner_id:
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.expire(self.owner_key, self.lease_seconds)
+                pipe.execute()
+                return True
+            except self._watch_error:
+                return False
+
+    def release_owner(self):
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(self.owner_key)
+                owner = pipe.get(self.owner_key)
+                if owner is not None and owner.decode('utf-8') == self.owner_id:
+                    pipe.multi()
+                    pipe.delete(self.owner_key)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+            except self._watch_error:
+                pass
+
+
+def create_queue_state(state_file=None, task_store=None, config: Optional[Dict] = None) -> QueueState:
+    """Build the queue state matching the task store: Redis when task state is in Redis, else the state file
+
+    ``config`` is the ``job_queue`` config section (``key_prefix`` for Redis keys).
+    """
+    config = config or {}
+    redis_client = getattr(task_store, 'redis', None)
+    if redis_client is not None:
+        logger.info("🗄️ Using Redis job queue state")
+        return RedisQueueState(redis_client, key_prefix=config.get('key_prefix', 'makereels:queue:'))
+    if state_file is not None:
+        return FileQueueState(state_file)
+    return MemoryQueueState()
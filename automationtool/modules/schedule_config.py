@@ -10,6 +10,8 @@ import logging
 from pathlib import Path
 import pickle
 
+from modules.config_service import CONFIG_PATH, get_config_service, parse_config
+
 def setup_logging():
     """Configure logging with custom format"""
     logger = logging.getLogger('modules.schedule_config')
@@ -38,12 +40,12 @@ def safe_log(log_func, message: str):
     log_func(message)
 
 class ScheduleConfig:
-    def __init__(self, config_file: str = 'config/master_config.json', credentials=None):
+    def __init__(self, config_file: Optional[str] = None, credentials=None):
         """
         Initialize the schedule configuration.
         
         Args:
-            config_file: Path to the configuration file
+            config_file: Path to the configuration file (default: the shared master_config.json)
             credentials: Optional credentials object or path to credentials file (for backward compatibility)
         """
         self.config_file = config_file
@@ -80,7 +82,7 @@ class ScheduleConfig:
         safe_log(logger.info, f"Initializing ScheduleConfig with timezone: {self.timezone.zone}")
         if self.youtube:
             safe_log(logger.info, "Successfully validated YouTube credentials")
-        safe_log(logger.info, f"Loading configuration from: {self.config_file}")
+        safe_log(logger.info, f"Loading configuration from: {self.config_file or CONFIG_PATH}")
 
     def initialize_youtube(self):
         """Initialize the YouTube client with credentials."""
@@ -115,8 +117,7 @@ class ScheduleConfig:
     def load_config(self):
         """Load configuration from the config file."""
         try:
-            with open(self.config_file, 'r') as f:
-                config = json.load(f)
+            config = get_config_service(self.config_file).current()
             
             # Load schedule configuration
             schedule_config = config.get('schedule', {})
@@ -154,13 +155,13 @@ class ScheduleConfig:
 
     def save_config(self):
         """Save current configuration to master_config.json"""
-        config_path = Path(__file__).parent.parent / self.config_file
+        config_path = Path(__file__).parent.parent / self.config_file if self.config_file else CONFIG_PATH
         
         # Read existing master config if it exists
         master_config = {}
         if config_path.exists():
-            with open(config_path, 'r') as f:
-                master_config = json.load(f)
+            with open(config_path, 'r', encoding='utf-8') as f:
+                master_config = parse_config(f.read())
         
         # Update schedule_config section
         master_config['schedule_config'] = {
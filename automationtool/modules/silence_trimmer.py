@@ -1,6 +1,4 @@
 import os
-import json
-import subprocess
 import tempfile
 import ffmpeg
 from pathlib import Path
@@ -25,62 +23,51 @@ if str(modules_path) not in sys.path:
     sys.path.insert(0, str(modules_path))
 
 from dotenv import load_dotenv
+from modules.audio_stream import AudioStream
+from modules.config_service import load_master_config
+from modules.metrics import measure_api, run_measured
+from modules.timeline import TIMELINE_SUFFIX, Timeline
 
 class SilenceTrimmer:
-    def __init__(self):
+    def __init__(self, output_root=None):
+        """
+        Args:
+            output_root: Output (or job workspace) directory. Defaults to output_folder from master_config.json.
+        """
         # Load environment variables
         load_dotenv(project_root / "config" / "config.env")
         
-        # Load and normalize output folder from config
-        config_path = project_root / "config" / "master_config.json"
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            self.output_root = Path(config['output_folder']).expanduser().resolve()
+        if output_root is None:
+            output_root = load_master_config()['output_folder']
+        self.output_root = Path(output_root).expanduser().resolve()
         
         self.processed_dir = self.output_root / "processed"
+        self.temp_dir = self.output_root / "temp"
         self.processed_dir.mkdir(parents=True, exist_ok=True)
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
 
-    def extract_audio_from_video(self, video_path: str) -> str:
-        """Extract audio from video for transcription"""
-        try:
-            temp_audio = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-            temp_audio_path = temp_audio.name
-            temp_audio.close()
-
-            stream = ffmpeg.input(video_path)
-            stream = ffmpeg.output(
-                stream, temp_audio_path,
-                format='wav',
-                acodec='pcm_s16le',
-                ac=1,
-                ar='16000'
-            )
-            out, err = ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
-            return temp_audio_path
-        except Exception as e:
-            print(f"Error extracting audio from video: {e}")
-            return None
+    def transcribe_with_deepgram(self, video_path: str, retries: int = 3, delay: int = 5) -> Dict:
+        """Transcribe a video's audio using Deepgram API with retry logic
 
-    def transcribe_with_deepgram(self, audio_file_path: str, retries: int = 3, delay: int = 5) -> Dict:
-        """Transcribe audio using Deepgram API with retry logic"""
+        The audio is encoded by ffmpeg and streamed into the request body, no temp file.
+        """
         api_key = os.getenv('DEEPGRAM_API_KEY')
         if not api_key:
             raise ValueError("DEEPGRAM_API_KEY not found in environment variables")
        
         url = "https://api.deepgram.com/v1/listen"
-        headers = {
-            "Authorization": f"Token {api_key}",
-            "Content-Type": "audio/wav"
-        }
        
         for attempt in range(retries):
             try:
-                with open(audio_file_path, "rb") as f:
-                    f.seek(0)
-                    response = requests.post(url, headers=headers, data=f)
+                with AudioStream(video_path) as audio, measure_api('deepgram', 'listen'):
+                    headers = {
+                        "Authorization": f"Token {api_key}",
+                        "Content-Type": audio.mimetype
+                    }
+                    response = requests.post(url, headers=headers, data=audio.chunks())
                 response.raise_for_status()
                 return response.json()
-            except requests.exceptions.RequestException as e:
+            except (requests.exceptions.RequestException, RuntimeError) as e:
                 print(f"Error transcribing audio (attempt {attempt + 1}/{retries}): {e}")
                 if attempt < retries - 1:
                     print(f"Retrying in {delay} seconds...")
@@ -91,8 +78,11 @@ class SilenceTrimmer:
         return None
 
     def find_silence_segments(self, transcript_data: Dict, min_silence_duration: float = 0.5, buffer: float = 0.4) -> List[Dict]:
-        """Find silence segments in the transcript"""
-        words = transcript_data['results']['channels'][0]['alternatives'][0]['words']
+        """Find silence segments in the transcript (a Deepgram response or a saved transcript with 'words')"""
+        if 'words' in transcript_data:
+            words = transcript_data['words']
+        else:
+            words = transcript_data['results']['channels'][0]['alternatives'][0]['words']
         silence_segments = []
        
         for i in range(len(words) - 1):
@@ -115,24 +105,20 @@ class SilenceTrimmer:
         return silence_segments
 
     def create_trimmed_video(self, video_path: str, silence_segments: List[Dict], output_path: str) -> bool:
-        """Create a video with silence segments removed"""
+        """Create a video with silence segments removed
+
+        The kept spans are saved next to the output (see modules/timeline.py), so
+        transcripts of the source can be mapped onto the trimmed video.
+        """
         try:
+            timeline = Timeline.from_silences(silence_segments, self.get_video_duration(video_path))
+            
             # Create a temporary file to store the list of segments
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-                current_time = 0
-                for segment in silence_segments:
-                    # Add segment before silence
-                    if segment['start'] > current_time:
-                        f.write(f"file '{video_path}'\n")
-                        f.write(f"inpoint {current_time}\n")
-                        f.write(f"outpoint {segment['start']}\n")
-                    current_time = segment['end']
-                
-                # Add final segment if needed
-                if current_time < self.get_video_duration(video_path):
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, dir=self.temp_dir) as f:
+                for start, end in timeline.spans:
                     f.write(f"file '{video_path}'\n")
-                    f.write(f"inpoint {current_time}\n")
-                    f.write(f"outpoint {self.get_video_duration(video_path)}\n")
+                    f.write(f"inpoint {start}\n")
+                    f.write(f"outpoint {end}\n")
                 
                 concat_file = f.name
 
@@ -152,7 +138,8 @@ class SilenceTrimmer:
                 output_path
             ]
            
-            subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
+            run_measured(ffmpeg_cmd, "Cut silence", check=True)
+            timeline.save(Path(output_path).with_suffix(TIMELINE_SUFFIX))
             
             # Clean up temporary file
             os.unlink(concat_file)
@@ -171,41 +158,35 @@ class SilenceTrimmer:
             print(f"Error getting video duration: {e}")
             return 0
 
-    def process_video(self, video_path: str, buffer: float = 0.4) -> str:
-        """Process a video to remove silence segments"""
+    def process_video(self, video_path: str, buffer: float = 0.4, transcript_data: Dict = None) -> str:
+        """Process a video to remove silence segments
+
+        Args:
+            transcript_data: Transcript of the video's audio (same timeline) to take word timings from;
+                the audio is only transcribed here when it is not given
+        """
         try:
-            # Extract audio
-            print("Extracting audio from video...")
-            audio_path = self.extract_audio_from_video(video_path)
-            if not audio_path:
-                return None
-           
-            try:
+            if transcript_data is None:
                 # Transcribe audio
                 print("Transcribing audio...")
-                transcript_data = self.transcribe_with_deepgram(audio_path)
+                transcript_data = self.transcribe_with_deepgram(video_path)
                 if not transcript_data:
                     return None
-               
-                # Find silence segments
-                print("Finding silence segments...")
-                silence_segments = self.find_silence_segments(transcript_data, buffer=buffer)
-               
-                # Create output path
-                video_name = Path(video_path).stem
-                output_path = self.processed_dir / f"{video_name}_trimmed.mp4"
-               
-                # Create trimmed video
-                print("Creating trimmed video...")
-                if self.create_trimmed_video(video_path, silence_segments, str(output_path)):
-                    print(f"Created trimmed video: {output_path}")
-                    return str(output_path)
-                return None
-               
-            finally:
-                # Clean up temporary audio file
-                if os.path.exists(audio_path):
-                    os.unlink(audio_path)
+           
+            # Find silence segments
+            print("Finding silence segments...")
+            silence_segments = self.find_silence_segments(transcript_data, buffer=buffer)
+           
+            # Create output path
+            video_name = Path(video_path).stem
+            output_path = self.processed_dir / f"{video_name}_trimmed.mp4"
+           
+            # Create trimmed video
+            print("Creating trimmed video...")
+            if self.create_trimmed_video(video_path, silence_segments, str(output_path)):
+                print(f"Created trimmed video: {output_path}")
+                return str(output_path)
+            return None
                    
         except Exception as e:
             print(f"Error processing video: {str(e)}")
@@ -0,0 +1,478 @@
+"""
+In-process pipeline stages.
+
+Each stage is a plain function that takes a StageContext plus the artifacts it
+depends on and returns a typed artifact describing what it produced. The
+pipeline calls them directly inside one worker process, so the Deepgram client,
+ffmpeg-python, pysrt and the YouTube client are imported and set up once per
+process instead of once per stage. The scripts in src/ are thin command-line
+wrappers around these functions.
+"""
+
+import json
+import shutil
+import logging
+import threading
+from dataclasses import dataclass, field, fields, is_dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from modules.artifact_cache import create_artifact_cache
+from modules.config_service import load_master_config
+from modules.karaoke_subtitles import modify_ass_file
+from modules.manifest import record_clips
+from modules.metrics import run_measured
+from modules.progress import get_reporter
+from modules.timeline import TIMELINE_SUFFIX, Timeline, clip_segments, write_srt
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Bump a stage's version when its output changes for the same inputs, so cached outputs are not reused
+STAGE_VERSIONS = {
+    'transcribe': 3,
+    'burn_subtitles': 1,
+    'trim_silence': 3,
+    'encode_clip': 1
+}
+
+# Silence kept around speech when trimming
+TRIM_BUFFER = 0.4
+
+
+class StageError(Exception):
+    """A stage could not produce its artifact"""
+
+
+@dataclass(frozen=True)
+class SourceVideo:
+    """Video as uploaded, before any processing"""
+    path: Path
+
+
+@dataclass(frozen=True)
+class Transcript:
+    """SRT subtitles of a video, with segment scores and the full transcript in JSON files next to them"""
+    srt_path: Path
+
+    @property
+    def scoring_path(self) -> Path:
+        return self.srt_path.with_suffix('.json')
+
+    @property
+    def data_path(self) -> Path:
+        """Words, scored segments (with sentiment) and language of the one transcription of the source"""
+        return self.srt_path.with_suffix('.transcript.json')
+
+    def load(self) -> Optional[Dict]:
+        """The saved transcript, or None if this transcript predates it"""
+        try:
+            with open(self.data_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+
+@dataclass(frozen=True)
+class SubtitledVideo:
+    """Source video with karaoke subtitles burned in"""
+    path: Path
+    source: Path
+    transcript: Transcript
+
+
+@dataclass(frozen=True)
+class TrimmedVideo:
+    """Video with silent parts cut out"""
+    path: Path
+    source: Path
+
+    @property
+    def timeline_path(self) -> Path:
+        """Spans of the source kept in the video (see modules/timeline.py)"""
+        return self.path.with_suffix(TIMELINE_SUFFIX)
+
+
+@dataclass(frozen=True)
+class ClipSelection:
+    """Clips chosen from a video's transcript, with the paths they will be encoded to"""
+    video: Path
+    video_base_name: str
+    srt_path: Path
+    clips: List[Dict]
+    output_paths: List[Path]
+
+
+@dataclass(frozen=True)
+class ShortClips:
+    """Encoded short clips of a video, with time range and score of each"""
+    video_base_name: str
+    paths: List[Path]
+    details: List[Dict] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class ShortTitles:
+    """File with generated titles, hashtags and descriptions keyed by clip path"""
+    path: Path
+
+
+@dataclass(frozen=True)
+class UploadReport:
+    """Outcome of uploading the shorts"""
+    uploaded: int
+    failed: int
+
+
+# Artifact classes by name, for rebuilding artifacts recorded in a job journal
+ARTIFACT_TYPES = {cls.__name__: cls for cls in (SourceVideo, Transcript, SubtitledVideo, TrimmedVideo,
+                                                ClipSelection, ShortClips, ShortTitles, UploadReport)}
+
+
+def artifact_files(artifact) -> List[Path]:
+    """Files an artifact points to, in field order, without nested artifacts' files"""
+    if not is_dataclass(artifact):
+        return []
+    files = []
+    for item in fields(artifact):
+        value = getattr(artifact, item.name)
+        for candidate in (value if isinstance(value, (list, tuple)) else [value]):
+            if isinstance(candidate, Path) and candidate not in files:
+                files.append(candidate)
+    return files
+
+
+class StageContext:
+    """Output directory, configuration and shared clients for the stages of one run"""
+
+    def __init__(self, output_root, config: Optional[Dict] = None):
+        self.output_root = Path(output_root).expanduser().resolve()
+        self.config = config or {}
+        self._transcriber = None
+        self._trimmer = None
+        self._title_generator = None
+        self._cache = None
+        self._lock = threading.Lock()
+        self.ensure()
+
+    @classmethod
+    def create(cls, output_root=None, config: Optional[Dict] = None) -> "StageContext":
+        """Context for output_root, defaulting to output_folder from master_config.json"""
+        if config is None:
+            config = load_master_config()
+        return cls(output_root or config['output_folder'], config)
+
+    @property
+    def subtitles_dir(self) -> Path:
+        return self.output_root / "subtitles"
+
+    @property
+    def processed_dir(self) -> Path:
+        return self.output_root / "processed"
+
+    @property
+    def shorts_dir(self) -> Path:
+        return self.output_root / "shorts"
+
+    @property
+    def temp_dir(self) -> Path:
+        return self.output_root / "temp"
+
+    def ensure(self):
+        for directory in (self.output_root, self.subtitles_dir, self.processed_dir, self.shorts_dir, self.temp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def transcriber(self):
+        """Deepgram transcription handler, created on first use (sharing the artifact cache)"""
+        cache = self.cache()
+        with self._lock:
+            if self._transcriber is None:
+                from modules.transcription import TranscriptionHandler
+                self._transcriber = TranscriptionHandler(output_root=self.output_root, cache=cache)
+            return self._transcriber
+
+    def trimmer(self):
+        """Silence trimmer, created on first use"""
+        with self._lock:
+            if self._trimmer is None:
+                from modules.silence_trimmer import SilenceTrimmer
+                self._trimmer = SilenceTrimmer(output_root=self.output_root)
+            return self._trimmer
+
+    def cache(self):
+        """Artifact cache shared by all jobs, created on first use"""
+        with self._lock:
+            if self._cache is None:
+                self._cache = create_artifact_cache(self.config.get('artifact_cache'), base_dir=PROJECT_ROOT)
+            return self._cache
+
+    def title_generator(self):
+        """Shorts title generator, created on first use"""
+        with self._lock:
+            if self._title_generator is None:
+                from modules.shorts_titles import ShortsTitleGenerator
+                self._title_generator = ShortsTitleGenerator(output_root=self.output_root)
+            return self._title_generator
+
+
+def run_ffmpeg(command: List[str], step_name: str, cwd=None):
+    """Run an ffmpeg command, raising StageError with its stderr on failure"""
+    logger.info(f"{step_name}...")
+    result = run_measured(command, step_name, text=True, cwd=cwd)
+    if result.returncode != 0:
+        raise StageError(f"{step_name} failed: {result.stderr.strip()[-2000:]}")
+
+
+def base_name(video: Path) -> str:
+    """Name of the source video a (possibly processed) video was made from"""
+    return video.stem.replace("_with_subs_trimmed", "").replace("_trimmed", "")
+
+
+def transcribe(ctx: StageContext, video: Path) -> Transcript:
+    """Transcribe a video to SRT plus segment scores"""
+    video = Path(video)
+    transcript = Transcript(ctx.subtitles_dir / f"{video.stem}.srt")
+    outputs = [transcript.srt_path, transcript.scoring_path, transcript.data_path]
+    from modules.transcription import transcription_settings
+    cache_key = ctx.cache().key('transcribe', STAGE_VERSIONS['transcribe'], [video], transcription_settings())
+    if ctx.cache().fetch(cache_key, outputs):
+        return transcript
+
+    srt_path = ctx.transcriber().transcribe_video(video)
+    if not srt_path:
+        raise StageError(f"Transcription of {video} failed")
+    transcript = Transcript(Path(srt_path))
+    if transcript.scoring_path.exists() and transcript.data_path.exists():
+        ctx.cache().store(cache_key, 'transcribe', outputs)
+    return transcript
+
+
+def add_subtitles(ctx: StageContext, video: Path) -> SubtitledVideo:
+    """Transcribe a video and burn karaoke-style subtitles into it"""
+    return burn_subtitles(ctx, video, transcribe(ctx, video))
+
+
+def burn_subtitles(ctx: StageContext, video: Path, transcript: Transcript) -> SubtitledVideo:
+    """Burn karaoke-style subtitles from a transcript into a video"""
+    video = Path(video).resolve()
+    video_name = video.stem
+
+    # Karaoke ASS is written next to the other temp files of this job and
+    # referenced relative to it, so ffmpeg's filter syntax never sees a drive path
+    temp_ass_name = f"{video_name}.ass"
+    temp_ass_path = ctx.temp_dir / temp_ass_name
+    ass_path = ctx.subtitles_dir / f"{video_name}.ass"
+    output_path = ctx.output_root / f"{video_name}_with_subs.mp4"
+    cache_key = ctx.cache().key('burn_subtitles', STAGE_VERSIONS['burn_subtitles'], [video, transcript.srt_path])
+    if ctx.cache().fetch(cache_key, [output_path, ass_path]):
+        return SubtitledVideo(output_path, video, transcript)
+    try:
+        run_ffmpeg(["ffmpeg", "-y", "-i", str(transcript.srt_path), str(ass_path)], "Converting SRT to ASS")
+
+        if temp_ass_path.exists():
+            temp_ass_path.unlink()
+        shutil.copy2(ass_path, temp_ass_path)
+        modify_ass_file(temp_ass_path)
+
+        run_ffmpeg([
+            "ffmpeg",
+            "-y",  # Overwrite output
+            "-i", str(video),
+            "-vf", f"ass={temp_ass_name},format=yuv420p,colorspace=all=bt709:iall=bt709:fast=1",
+            "-c:v", "libx264",
+            "-crf", "23",
+            "-preset", "veryfast",
+            "-c:a", "aac",
+            "-b:a", "192k",
+            str(output_path)
+        ], "Burning subtitles into video", cwd=ctx.temp_dir)
+        logger.info(f"Subtitled video saved to: {output_path}")
+        ctx.cache().store(cache_key, 'burn_subtitles', [output_path, ass_path])
+        return SubtitledVideo(output_path, video, transcript)
+    finally:
+        if temp_ass_path.exists():
+            temp_ass_path.unlink()
+
+
+def trim_silence(ctx: StageContext, video: Path, transcript: Optional[Transcript] = None) -> TrimmedVideo:
+    """Cut silent parts out of a video
+
+    Args:
+        transcript: Transcript of the source the video was made from (same timeline); its word
+            timings are used instead of transcribing the video again
+    """
+    video = Path(video)
+    output_path = ctx.processed_dir / f"{video.stem}_trimmed.mp4"
+    transcript_data = transcript.load() if transcript else None
+    inputs = [video, transcript.data_path] if transcript_data else [video]
+    cache_key = ctx.cache().key('trim_silence', STAGE_VERSIONS['trim_silence'], inputs, {'buffer': TRIM_BUFFER})
+    outputs = [output_path, output_path.with_suffix(TIMELINE_SUFFIX)]
+    if ctx.cache().fetch(cache_key, outputs):
+        return TrimmedVideo(output_path, video)
+
+    if transcript_data:
+        logger.info(f"Finding silence from the word timings of {transcript.srt_path.stem}")
+    else:
+        logger.info("No transcript to reuse, transcribing the video for silence detection")
+    trimmed_path = ctx.trimmer().process_video(str(video), buffer=TRIM_BUFFER, transcript_data=transcript_data)
+    if not trimmed_path:
+        raise StageError(f"Failed to create trimmed video from {video}")
+    logger.info(f"Successfully created trimmed video: {trimmed_path}")
+    trimmed = TrimmedVideo(Path(trimmed_path), video)
+    if trimmed.timeline_path.exists():
+        ctx.cache().store(cache_key, 'trim_silence', [trimmed.path, trimmed.timeline_path])
+    return trimmed
+
+
+def write_transcript(ctx: StageContext, data: Dict, name: str) -> Transcript:
+    """Save a transcript derived from another one as SRT, scoring JSON and transcript JSON"""
+    transcript = Transcript(ctx.subtitles_dir / f"{name}.srt")
+    write_srt(data['segments'], transcript.srt_path)
+    scoring = {'segments': [{key: segment.get(key) for key in ('start', 'end', 'text', 'score', 'sentiment', 'confidence')}
+                            for segment in data['segments']]}
+    with open(transcript.scoring_path, 'w', encoding='utf-8') as f:
+        json.dump(scoring, f, indent=2)
+    with open(transcript.data_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    return transcript
+
+
+def retime_transcript(ctx: StageContext, transcript: Transcript, timeline: Timeline, name: str) -> Optional[Transcript]:
+    """Transcript of a trimmed video, mapped from its source's transcript; None if that has no word data"""
+    data = transcript.load()
+    if data is None:
+        return None
+    return write_transcript(ctx, dict(data, words=timeline.map_words(data['words']),
+                                      segments=timeline.map_segments(data['segments']),
+                                      duration=round(timeline.duration, 3)), name)
+
+
+def clip_transcript(ctx: StageContext, transcript: Transcript, start: float, end: float,
+                    name: str) -> Optional[Transcript]:
+    """Transcript of a clip cut from [start, end] of a video, on the clip's own timeline
+
+    Derived from the video's transcript; None if that has no word data.
+    """
+    data = transcript.load()
+    if data is None:
+        return None
+    return write_transcript(ctx, dict(data, words=clip_segments(data['words'], start, end),
+                                      segments=clip_segments(data['segments'], start, end),
+                                      duration=round(end - start, 3)), name)
+
+
+def transcript_for(ctx: StageContext, video: Path, transcript: Optional[Transcript] = None) -> Transcript:
+    """Transcript on a video's own timeline
+
+    A trimmed video gets its source's transcript mapped through its timeline;
+    the video is only transcribed if no usable source transcript exists.
+    """
+    video = Path(video).resolve()
+    if transcript is None:
+        srt_path = ctx.subtitles_dir / f"{base_name(video)}.srt"
+        if srt_path.exists() and srt_path.with_suffix('.json').exists():
+            transcript = Transcript(srt_path)
+    timeline = Timeline.load(video.with_suffix(TIMELINE_SUFFIX))
+    if transcript is not None:
+        if timeline is None:
+            return transcript
+        retimed = retime_transcript(ctx, transcript, timeline, video.stem)
+        if retimed is not None:
+            logger.info(f"Mapped the transcript of {transcript.srt_path.stem} onto {video.name}")
+            return retimed
+    logger.info("Generating transcription and scoring data...")
+    return transcribe(ctx, video)
+
+
+def select_clips(ctx: StageContext, video: Path, transcript: Optional[Transcript] = None,
+                 min_duration: int = 15, max_duration: int = 30, padding: int = 2) -> ClipSelection:
+    """Choose the best-scoring segments of a (trimmed) video as clips"""
+    from modules.subtitle_clipper import find_clips_from_srt
+
+    video = Path(video).resolve()
+    video_name = base_name(video)
+
+    # Clip times must be on the timeline of the video the clips are cut from
+    srt_path = transcript_for(ctx, video, transcript).srt_path
+
+    clips = find_clips_from_srt(srt_path=srt_path, keywords=[],  # No keywords - use pure AI scoring
+                                min_duration=min_duration, max_duration=max_duration, padding=padding)
+    if not clips:
+        logger.warning("No suitable clips found in the video")
+    # Unique prefix per source video, so clips of different videos never collide
+    output_paths = [ctx.shorts_dir / f"{video_name}_short__short_{i + 1}.mp4" for i in range(len(clips))]
+    logger.info(f"Selected {len(clips)} clips from {video.name}")
+    return ClipSelection(video, video_name, srt_path, clips, output_paths)
+
+
+def encode_clips(ctx: StageContext, selection: ClipSelection, map_clips=None) -> ShortClips:
+    """Encode the selected clips
+
+    Args:
+        map_clips: Runs a function over the clip indexes, e.g. concurrently; defaults to one after another
+    """
+    from modules.subtitle_clipper import encode_clip
+
+    reporter = get_reporter()
+    cache = ctx.cache()
+    total = len(selection.clips)
+    finished = []
+    finished_lock = threading.Lock()
+
+    def encode(index: int) -> Optional[Dict]:
+        clip, output_path = selection.clips[index], selection.output_paths[index]
+        logger.info(f"Processing clip {index + 1}/{total}: {output_path}")
+        cache_key = cache.key('encode_clip', STAGE_VERSIONS['encode_clip'], [selection.video],
+                              {'start': clip['start'], 'end': clip['end']})
+        created = cache.fetch(cache_key, [output_path])
+        if not created:
+            created = encode_clip(selection.video, clip, output_path)
+            if created:
+                cache.store(cache_key, 'encode_clip', [output_path])
+        with finished_lock:
+            finished.append(index)
+            reporter.emit('encode', 'progress', f"Encoded clip {len(finished)}/{total}",
+                          fraction=len(finished) / total, current=len(finished), total=total)
+        if not created:
+            return None
+        return {'path': output_path, 'start': clip['start'], 'end': clip['end'], 'score': clip['score']}
+
+    map_clips = map_clips or (lambda func, items: [func(item) for item in items])
+    clip_details = [detail for detail in map_clips(encode, range(total)) if detail]
+    clip_paths = [detail['path'] for detail in clip_details]
+    logger.info(f"Created {len(clip_paths)} of {total} shorts")
+
+    # Scores and time ranges only exist here, so keep them in the video's result manifest
+    record_clips(ctx.output_root, selection.video_base_name, clip_details)
+    return ShortClips(selection.video_base_name, clip_paths, clip_details)
+
+
+def create_shorts(ctx: StageContext, video: Path, min_duration: int = 15, max_duration: int = 30,
+                  padding: int = 2) -> ShortClips:
+    """Select the best-scoring segments of a (trimmed) video and encode them as shorts"""
+    selection = select_clips(ctx, video, min_duration=min_duration, max_duration=max_duration, padding=padding)
+    get_reporter().emit('select_clips', 'completed', f"Selected {len(selection.clips)} clips",
+                        total=len(selection.clips))
+    return encode_clips(ctx, selection)
+
+
+def generate_titles(ctx: StageContext, video: Path) -> ShortTitles:
+    """Generate titles, hashtags and descriptions for the shorts of a processed video"""
+    generator = ctx.title_generator()
+    generator.process_all_shorts(ctx.shorts_dir, ctx.subtitles_dir, Path(video))
+    return ShortTitles(ctx.output_root / "shorts_titles.json")
+
+
+def titles_for_clips(ctx: StageContext, selection: ClipSelection) -> ShortTitles:
+    """Generate titles for selected clips from their transcript, without waiting for the encodes"""
+    clips = [(path, clip['start'], clip['end']) for path, clip in zip(selection.output_paths, selection.clips)]
+    ctx.title_generator().process_clips(selection.video_base_name, selection.srt_path, clips)
+    return ShortTitles(ctx.output_root / "shorts_titles.json")
+
+
+def upload_shorts(ctx: StageContext) -> UploadReport:
+    """Upload the shorts in the output folder on the configured schedule"""
+    from modules.shorts_upload import upload_shorts as upload_all
+    result = upload_all(ctx.output_root) or {}
+    return UploadReport(result.get('uploaded', 0), result.get('failed', 0))
@@ -3,9 +3,11 @@ from pathlib import Path
 import subprocess
 import pysrt
 import json
-from typing import List, Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 import logging
 
+from modules.progress import get_reporter, run_ffmpeg_with_progress
+
 logger = logging.getLogger(__name__)
 
 def parse_srt(srt_path: Path) -> List[Dict[str, Any]]:
@@ -161,6 +163,52 @@ def find_clips_from_srt(
     
     return clips
 
+def encode_clip(
+    video_path: Path,
+    clip: Dict[str, Any],
+    output_path: Path,
+    on_progress: Optional[Callable[[float], None]] = None
+) -> bool:
+    """
+    Encode one selected clip of a video.
+    
+    Args:
+        video_path: Path to the source video file
+        clip: Clip with start, end and score (as returned by find_clips_from_srt)
+        output_path: Where to write the clip
+        on_progress: Called with the fraction of the clip encoded so far
+        
+    Returns:
+        True if the clip was created, False if encoding failed or the clip was too small
+    """
+    logger.info(f"Clip score: {clip['score']:.2f}")
+    try:
+        cmd = [
+            'ffmpeg', '-y',
+            '-i', str(video_path),
+            '-ss', str(clip['start']),
+            '-to', str(clip['end']),
+            '-c:v', 'libx264',
+            '-c:a', 'aac',
+            str(output_path)
+        ]
+        
+        run_ffmpeg_with_progress(cmd, duration=clip['end'] - clip['start'],
+                                 on_progress=on_progress or (lambda fraction: None))
+        
+        # Check if the created clip is too small (less than 1MB)
+        if output_path.stat().st_size < 1024 * 1024:  # 1MB in bytes
+            logger.warning(f"Clip {output_path.name} is too small ({output_path.stat().st_size / 1024:.1f}KB), removing it")
+            output_path.unlink()
+            return False
+        
+        logger.info(f"Created clip: {output_path}")
+        return True
+        
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Error creating clip {output_path.name}: {e.stderr.decode()}")
+        return False
+
 def create_shorts_from_srt(
     video_path: Path,
     srt_path: Path,
@@ -169,7 +217,8 @@ def create_shorts_from_srt(
     min_duration: int = 15,
     max_duration: int = 30,
     padding: int = 2,
-    output_prefix: Optional[str] = None
+    output_prefix: Optional[str] = None,
+    clip_details: Optional[List[Dict[str, Any]]] = None
 ) -> List[Path]:
     """
     Create short video clips based on subtitle content containing specific keywords.
@@ -183,12 +232,14 @@ def create_shorts_from_srt(
         max_duration: Maximum duration of clips in seconds
         padding: Number of seconds to add before and after the clip
         output_prefix: Optional prefix for output filenames
+        clip_details: If given, path, start, end and score of each created clip are appended to it
         
     Returns:
         List of paths to the created video clips
     """
     # Create output directory if it doesn't exist
     output_dir.mkdir(parents=True, exist_ok=True)
+    reporter = get_reporter()
     
     # Find clips using the find_clips_from_srt function
     clips = find_clips_from_srt(
@@ -199,6 +250,8 @@ def create_shorts_from_srt(
         padding=padding
     )
     
+    reporter.emit('select_clips', 'completed', f"Selected {len(clips)} clips", total=len(clips))
+    
     if not clips:
         logger.warning("No suitable clips found in the video")
         return []
@@ -215,38 +268,25 @@ def create_shorts_from_srt(
         
         # Log clip number before processing
         logger.info(f"Processing clip {i+1}/{len(clips)}: {output_path}")
-        logger.info(f"Clip score: {clip['score']:.2f}")
-        
-        # Create the clip using FFmpeg
-        try:
-            cmd = [
-                'ffmpeg', '-y',
-                '-i', str(video_path),
-                '-ss', str(clip['start']),
-                '-to', str(clip['end']),
-                '-c:v', 'libx264',
-                '-c:a', 'aac',
-                str(output_path)
-            ]
-            
-            subprocess.run(cmd, check=True, capture_output=True)
-            
-            # Check if the created clip is too small (less than 1MB)
-            if output_path.stat().st_size < 1024 * 1024:  # 1MB in bytes
-                logger.warning(f"Clip {i+1} is too small ({output_path.stat().st_size / 1024:.1f}KB), removing it")
-                output_path.unlink()
-                continue
-                
-            clip_paths.append(output_path)
-            logger.info(f"Created clip: {output_path}")
-            
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error creating clip {i+1}: {e.stderr.decode()}")
+        clip_message = f"Encoding clip {i+1}/{len(clips)}"
+        reporter.emit('encode', 'started' if i == 0 else 'progress', clip_message,
+                      fraction=i / len(clips), current=i + 1, total=len(clips))
+        
+        if not encode_clip(
+            video_path, clip, output_path,
+            on_progress=lambda fraction, i=i: reporter.progress(
+                'encode', (i + min(fraction, 1.0)) / len(clips), clip_message,
+                current=i + 1, total=len(clips), clip_progress=int(min(fraction, 1.0) * 100)
+            )
+        ):
             continue
+            
+        clip_paths.append(output_path)
+        if clip_details is not None:
+            clip_details.append({'path': output_path, 'start': clip['start'], 'end': clip['end'], 'score': clip['score']})
     
     # Log total number of shorts created
     logger.info(f"Successfully created {len(clip_paths)} shorts from video: {video_name}")
-    # Add a special completion message that will be caught by the formatter
-    logger.info(f"Completed: Step 2: Create shorts from full video (created {len(clip_paths)} shorts)")
+    reporter.emit('encode', 'completed', f"Created {len(clip_paths)} shorts", created=len(clip_paths), total=len(clips))
     
     return clip_paths 
\ No newline at end of file
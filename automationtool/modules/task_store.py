@@ -0,0 +1,212 @@
+"""
+Task state storage shared by the web server processes.
+
+Task status used to live in a module-level dict, which is lost on restart and
+not visible across gunicorn workers. The store keeps one JSON document per task
+with two backends: in-memory (single process, the default) and Redis (shared by
+every worker and surviving restarts). Finished tasks expire after a TTL, and
+updates merge fields atomically so concurrent writers never lose each other's
+changes. An update can be made conditional on the current state, e.g. to
+start a task only if nobody cancelled it in the meantime.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {'SUCCESS', 'FAILURE', 'CANCELLED'}
+
+
+class TaskStore:
+    """Interface of a task state backend"""
+
+    def __init__(self, finished_ttl: int = 86400, active_ttl: int = 7 * 86400):
+        """
+        Args:
+            finished_ttl: Seconds a finished task is kept
+            active_ttl: Seconds an unfinished task is kept (guards against orphans)
+        """
+        self.finished_ttl = int(finished_ttl)
+        self.active_ttl = int(active_ttl)
+
+    def ttl_for(self, info: Dict) -> int:
+        return self.finished_ttl if info.get('status') in TERMINAL_STATUSES else self.active_ttl
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def set(self, task_id: str, info: Dict):
+        """Replace the state of a task"""
+        raise NotImplementedError
+
+    def create(self, task_id: str, info: Dict) -> bool:
+        """Store a new task; returns False if the task already exists"""
+        raise NotImplementedError
+
+    def update(self, task_id: str, condition: Optional[Callable[[Dict], bool]] = None, **fields) -> Optional[Dict]:
+        """Merge fields into an existing task and return the new state
+
+        Returns None if the task is missing, or if ``condition`` is given and
+        returns False for the current state (checked atomically with the write).
+        """
+        raise NotImplementedError
+
+    def delete(self, task_id: str):
+        raise NotImplementedError
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+
+class MemoryTaskStore(TaskStore):
+    """Task state kept in this process only"""
+
+    # Seconds between sweeps for expired tasks nobody reads any more
+    SWEEP_INTERVAL = 60
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._tasks: Dict[str, Dict] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.time() + self.SWEEP_INTERVAL
+
+    def _expire(self, task_id: str):
+        """Drop the task if its TTL has passed (caller holds the lock)"""
+        expires_at = self._expires.get(task_id)
+        if expires_at is not None and expires_at <= time.time():
+            self._tasks.pop(task_id, None)
+            self._expires.pop(task_id, None)
+
+    def _sweep(self):
+        """Drop every expired task, at most once per SWEEP_INTERVAL (caller holds the lock)"""
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.SWEEP_INTERVAL
+        for task_id in [task_id for task_id, expires_at in self._expires.items() if expires_at <= now]:
+            self._tasks.pop(task_id, None)
+            self._expires.pop(task_id, None)
+
+    def _store(self, task_id: str, info: Dict):
+        self._sweep()
+        self._tasks[task_id] = info
+        self._expires[task_id] = time.time() + self.ttl_for(info)
+
+    def get(self, task_id):
+        with self._lock:
+            self._expire(task_id)
+            info = self._tasks.get(task_id)
+            return dict(info) if info is not None else None
+
+    def set(self, task_id, info):
+        with self._lock:
+            self._store(task_id, dict(info))
+
+    def create(self, task_id, info):
+        with self._lock:
+            self._expire(task_id)
+            if task_id in self._tasks:
+                return False
+            self._store(task_id, dict(info))
+            return True
+
+    def update(self, task_id, condition=None, **fields):
+        with self._lock:
+            self._expire(task_id)
+            if task_id not in self._tasks:
+                return None
+            if condition is not None and not condition(dict(self._tasks[task_id])):
+                return None
+            info = dict(self._tasks[task_id], **fields)
+            self._store(task_id, info)
+            return dict(info)
+
+    def delete(self, task_id):
+        with self._lock:
+            self._tasks.pop(task_id, None)
+            self._expires.pop(task_id, None)
+
+
+class RedisTaskStore(TaskStore):
+    """Task state shared through Redis"""
+
+    def __init__(self, url: str = "redis://localhost:6379/0", key_prefix: str = "makereels:task:", **kwargs):
+        super().__init__(**kwargs)
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.key_prefix = key_prefix
+        self._watch_error = redis.WatchError
+        self.redis.ping()
+
+    def _key(self, task_id: str) -> str:
+        return f"{self.key_prefix}{task_id}"
+
+    def get(self, task_id):
+        value = self.redis.get(self._key(task_id))
+        return json.loads(value) if value else None
+
+    def set(self, task_id, info):
+        self.redis.set(self._key(task_id), json.dumps(info), ex=self.ttl_for(info))
+
+    def create(self, task_id, info):
+        return bool(self.redis.set(self._key(task_id), json.dumps(info), ex=self.ttl_for(info), nx=True))
+
+    def update(self, task_id, condition=None, **fields):
+        key = self._key(task_id)
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    # Optimistic transaction: retried if another writer touches the key
+                    pipe.watch(key)
+                    value = pipe.get(key)
+                    if not value:
+                        pipe.unwatch()
+                        return None
+                    current = json.loads(value)
+                    if condition is not None and not condition(current):
+                        pipe.unwatch()
+                        return None
+                    info = dict(current, **fields)
+                    pipe.multi()
+                    pipe.set(key, json.dumps(info), ex=self.ttl_for(info))
+                    pipe.execute()
+                    return info
+                except self._watch_error:
+                    continue
+
+    def delete(self, task_id):
+        self.redis.delete(self._key(task_id))
+
+
+def create_task_store(config: Optional[Dict] = None) -> TaskStore:
+    """Build the task store described by the ``task_store`` config section.
+
+    ``backend`` is 'memory', 'redis' or 'auto' (Redis when ``REDIS_URL`` is set).
+    ``REDIS_URL`` in the environment overrides the configured URL. If Redis is
+    selected but unreachable, the in-memory store is used instead.
+    """
+    config = dict(config or {})
+    backend = config.get('backend', 'auto')
+    if backend == 'auto':
+        backend = 'redis' if os.environ.get('REDIS_URL') else 'memory'
+    ttls = {
+        'finished_ttl': config.get('finished_ttl', 86400),
+        'active_ttl': config.get('active_ttl', 7 * 86400)
+    }
+
+    if backend == 'redis':
+        url = os.environ.get('REDIS_URL') or config.get('redis_url', 'redis://localhost:6379/0')
+        try:
+            store = RedisTaskStore(url=url, key_prefix=config.get('key_prefix', 'makereels:task:'), **ttls)
+            logger.info(f"🗄️ Using Redis task store at {url}")
+            return store
+        except Exception as e:
+            logger.warning(f"⚠️ Could not connect to Redis at {url}, falling back to in-memory task store: {str(e)}")
+
+    return MemoryTaskStore(**ttls)
@@ -0,0 +1,149 @@
+"""
+Timestamp mapping between a source video, its silence-trimmed version and its clips.
+
+Trimming keeps a list of spans of the source and drops everything between
+them. The spans are saved next to the trimmed video as ``<video>.timeline.json``.
+With them, the words and segments of the source transcript can be moved onto
+the trimmed timeline, and from there cut to a clip's own timeline. Subtitles
+for trimmed videos and clips are then written locally instead of transcribing
+the media again.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_SUFFIX = '.timeline.json'
+
+
+def word_text(word: Dict) -> str:
+    return word.get('punctuated_word') or word.get('word', '')
+
+
+class Timeline:
+    """Spans of a source kept in a trimmed video, in source seconds"""
+
+    def __init__(self, spans: List[Tuple[float, float]]):
+        self.spans = sorted((float(start), float(end)) for start, end in spans if end > start)
+
+    @classmethod
+    def from_silences(cls, silence_segments: List[Dict], duration: float) -> "Timeline":
+        """Timeline that keeps everything between the given silences"""
+        spans = []
+        current = 0.0
+        for segment in silence_segments:
+            if segment['start'] > current:
+                spans.append((current, segment['start']))
+            current = max(current, segment['end'])
+        if current < duration:
+            spans.append((current, duration))
+        return cls(spans)
+
+    @property
+    def duration(self) -> float:
+        """Length of the trimmed video"""
+        return sum(end - start for start, end in self.spans)
+
+    def to_trimmed(self, seconds: float) -> float:
+        """Position of a source time in the trimmed video; times inside a cut snap to the cut"""
+        offset = 0.0
+        for start, end in self.spans:
+            if seconds < start:
+                return offset
+            if seconds <= end:
+                return offset + seconds - start
+            offset += end - start
+        return offset
+
+    def to_source(self, seconds: float) -> float:
+        """Source time of a position in the trimmed video"""
+        offset = 0.0
+        for start, end in self.spans:
+            if seconds <= offset + end - start:
+                return start + max(0.0, seconds - offset)
+            offset += end - start
+        return self.spans[-1][1] if self.spans else seconds
+
+    def map_words(self, words: List[Dict]) -> List[Dict]:
+        """Words moved onto the trimmed timeline; words cut out entirely are dropped"""
+        mapped = []
+        for word in words:
+            start, end = self.to_trimmed(word['start']), self.to_trimmed(word['end'])
+            if end > start:
+                mapped.append(dict(word, start=round(start, 3), end=round(end, 3)))
+        return mapped
+
+    def map_segments(self, segments: List[Dict]) -> List[Dict]:
+        """Segments (with their words) moved onto the trimmed timeline"""
+        mapped = []
+        for segment in segments:
+            words = segment.get('words') or []
+            if words:
+                kept = self.map_words(words)
+                if not kept:
+                    continue
+                text = segment['text'] if len(kept) == len(words) else ' '.join(word_text(w) for w in kept)
+                mapped.append(dict(segment, start=kept[0]['start'], end=kept[-1]['end'], text=text, words=kept))
+            else:
+                start, end = self.to_trimmed(segment['start']), self.to_trimmed(segment['end'])
+                if end > start:
+                    mapped.append(dict(segment, start=round(start, 3), end=round(end, 3)))
+        return mapped
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'spans': self.spans, 'duration': round(self.duration, 3)}, f)
+        return path
+
+    @classmethod
+    def load(cls, path) -> Optional["Timeline"]:
+        """Timeline saved at path, or None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f)['spans'])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"⚠️ Ignoring unreadable timeline {path}: {str(e)}")
+            return None
+
+
+def clip_segments(segments: List[Dict], start: float, end: float) -> List[Dict]:
+    """Segments within [start, end], cut at the clip's edges and moved onto the clip's own timeline"""
+    clipped = []
+    for segment in segments:
+        if segment['end'] <= start or segment['start'] >= end:
+            continue
+        words = [w for w in segment.get('words') or [] if w['end'] > start and w['start'] < end]
+        if segment.get('words'):
+            if not words:
+                continue
+            words = [dict(w, start=round(max(w['start'], start) - start, 3), end=round(min(w['end'], end) - start, 3))
+                     for w in words]
+            text = segment['text'] if len(words) == len(segment['words']) else ' '.join(word_text(w) for w in words)
+            clipped.append(dict(segment, start=words[0]['start'], end=words[-1]['end'], text=text, words=words))
+        else:
+            clipped.append(dict(segment, start=round(max(segment['start'], start) - start, 3),
+                                end=round(min(segment['end'], end) - start, 3)))
+    return clipped
+
+
+def format_srt_timestamp(seconds: float) -> str:
+    milliseconds = int(round(max(0.0, seconds) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+
+
+def write_srt(segments: List[Dict], path) -> Path:
+    """Write segments as an SRT file"""
+    path = Path(path)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, segment in enumerate(segments, 1):
+            f.write(f"{i}\n{format_srt_timestamp(segment['start'])} --> {format_srt_timestamp(segment['end'])}\n"
+                    f"{segment['text'].strip()}\n\n")
+    return path
@@ -7,6 +7,7 @@ import json
 import re
 from typing import Optional, Tuple
 from config.api_keys import OPENROUTER_API_KEY
+from modules.metrics import measure_api
 
 class TitleGenerator:
     def __init__(self):
@@ -155,7 +156,8 @@ class TitleGenerator:
             }
 
             print("Sending request to OpenRouter API...")
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
+            with measure_api('openrouter', 'chat/completions'):
+                response = requests.post(self.api_url, headers=self.headers, json=payload)
             
             if response.status_code != 200:
                 print(f"API Error: Status code {response.status_code}")
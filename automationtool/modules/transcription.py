@@ -1,16 +1,61 @@
 import os
 import json
-import subprocess
 import shutil
 from pathlib import Path
 from deepgram import Deepgram
 import asyncio
 from dotenv import load_dotenv
-import tempfile
-import ffmpeg
+
+from modules.artifact_cache import create_artifact_cache
+from modules.audio_stream import AudioStream, get_audio_upload_config
+from modules.config_service import load_master_config
+from modules.language_probe import find_excerpt, get_language_probe_config, scan_audio
+from modules.metrics import measure_api, run_measured
+
+# Suffix of the shared transcript (words, segments, language) saved next to a video's SRT
+TRANSCRIPT_SUFFIX = '.transcript.json'
+
+# Options of the single full-length transcription
+TRANSCRIBE_OPTIONS = {
+    'punctuate': True,
+    'model': 'nova-2',
+    'smart_format': True,
+    'utterances': True,  # Enable utterance detection
+    'sentiment': True,   # Enable sentiment analysis
+    'summarize': True,   # Enable summarization
+    'timeout': 300       # 5 minutes timeout
+}
+
+# Options of the language probes on an excerpt; only the transcript text is needed
+PROBE_OPTIONS = {
+    'punctuate': True,
+    'model': 'nova-2',
+    'smart_format': True,
+    'timeout': 120
+}
+
+# Versions of the cached audio scans and Deepgram responses; bump when their layout changes
+AUDIO_SCAN_VERSION = 1
+DEEPGRAM_CACHE_VERSION = 1
+
+def transcription_settings():
+    """Everything that changes a transcript for the same audio: Deepgram options, audio encoding and language choice"""
+    language_config = get_language_probe_config()
+    audio_config = get_audio_upload_config()
+    return {
+        'options': {name: value for name, value in TRANSCRIBE_OPTIONS.items() if name != 'timeout'},
+        'probe_options': {name: value for name, value in PROBE_OPTIONS.items() if name != 'timeout'},
+        'audio': {name: audio_config[name] for name in ('audio_codec', 'audio_bitrate')},
+        'language': {name: value for name, value in language_config.items() if name != 'probe_concurrency'}
+    }
 
 class TranscriptionHandler:
-    def __init__(self):
+    def __init__(self, output_root=None, cache=None):
+        """
+        Args:
+            output_root: Output (or job workspace) directory. Defaults to output_folder from master_config.json.
+            cache: ArtifactCache for audio scans and Deepgram responses. Defaults to the artifact_cache section.
+        """
         # Load environment variables
         project_root = Path(__file__).parent.parent
         load_dotenv(project_root / "config" / "config.env")
@@ -21,164 +66,188 @@ class TranscriptionHandler:
             raise ValueError("DEEPGRAM_API_KEY not found in environment variables")
         self.dg_client = Deepgram(api_key)
         
-        # Load and normalize output folder from config
-        config_path = project_root / "config" / "master_config.json"
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            self.output_root = Path(config['output_folder']).expanduser().resolve()
+        config = load_master_config()
+        if output_root is None:
+            output_root = config['output_folder']
+        self.output_root = Path(output_root).expanduser().resolve()
+        
+        # Audio scans and responses already paid for, shared by all jobs
+        self.cache = cache or create_artifact_cache(config.get('artifact_cache'), base_dir=project_root)
         
         self.subtitles_dir = self.output_root / "subtitles"
+        self.temp_dir = self.output_root / "temp"
         
         # Create directories if they don't exist
         self.output_root.mkdir(parents=True, exist_ok=True)
         self.subtitles_dir.mkdir(parents=True, exist_ok=True)
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
     
-    def extract_audio(self, video_path):
-        """Extract audio from video for transcription"""
-        try:
-            temp_audio = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-            temp_audio_path = temp_audio.name
-            temp_audio.close()
-
-            stream = ffmpeg.input(video_path)
-            stream = ffmpeg.output(
-                stream, temp_audio_path,
-                format='wav',
-                acodec='pcm_s16le',
-                ac=1,
-                ar='16000'
-            )
-            out, err = ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
-            return temp_audio_path
-        except Exception as e:
-            print(f"Error extracting audio from video: {e}")
-            return None
+    def _scan_audio(self, video_path, detect_speech):
+        """Duration, audio fingerprint and speech spans of a video, decoded once per file content"""
+        cache_key = self.cache.key('audio_scan', AUDIO_SCAN_VERSION, [video_path], {'speech': detect_speech})
+        scan = self.cache.fetch_json(cache_key)
+        if scan is None:
+            scan = scan_audio(video_path, detect_speech)
+            if scan['fingerprint']:
+                self.cache.store_json(cache_key, 'audio_scan', scan)
+        return scan
+    
+    async def _prerecorded(self, video_path, options, fingerprint, excerpt=None):
+        """One Deepgram request, with the video's audio encoded and streamed as the request body.
+        
+        Served from the cache when the same audio (by fingerprint) was sent with the same options before.
+        excerpt is an optional (start, length) in seconds; only that part of the audio is sent.
+        """
+        cache_key = None
+        if fingerprint:
+            params = {'audio': fingerprint, 'excerpt': list(excerpt) if excerpt else None,
+                      'options': {name: value for name, value in options.items() if name != 'timeout'}}
+            cache_key = self.cache.key('deepgram', DEEPGRAM_CACHE_VERSION, params=params)
+        response = self.cache.fetch_json(cache_key)
+        if response is not None:
+            return response
+        start, length = excerpt or (None, None)
+        with AudioStream(video_path, start=start, duration=length) as audio, measure_api('deepgram', 'prerecorded'):
+            response = await self.dg_client.transcription.prerecorded({'buffer': audio, 'mimetype': audio.mimetype}, options)
+        # Written from a worker thread, so cache I/O does not stall the other requests on the loop
+        await asyncio.to_thread(self.cache.store_json, cache_key, 'deepgram', response)
+        return response
+    
+    @staticmethod
+    def _response_language(response):
+        """Detected language, its confidence and the transcript text of a Deepgram response"""
+        results = response.get('results', {})
+        channel = results.get('channels', [{}])[0]
+        alternative = channel.get('alternatives', [{}])[0]
+        language = channel.get('detected_language') or results.get('language', '') or ''
+        confidence = channel.get('language_confidence') or results.get('language_confidence', 0) or 0
+        return language, confidence, alternative.get('transcript', '')
+    
+    def _judge_detection(self, response, settings):
+        """Read a detect_language response: (language to use, whether fallback languages should be tried)
+        
+        The language is None when detection should be taken as-is (or nothing better was found).
+        """
+        detected_language, language_confidence, transcript_text = self._response_language(response)
+        print(f"🔍 Detected language: {detected_language}")
+        print(f"🔍 Language confidence: {language_confidence}")
+        
+        # Check if transcript contains Devanagari characters (Hindi script)
+        devanagari_chars = any('\u0900' <= char <= '\u097F' for char in transcript_text)
+        print(f"🔍 Transcript sample: {transcript_text[:200]}...")
+        print(f"🔍 Devanagari characters found: {devanagari_chars}")
+        
+        # If Hindi is detected OR Devanagari characters are found, transcribe in Latin script
+        if detected_language.lower().startswith('hi') or devanagari_chars:
+            print(f"🇮🇳 Hindi detected! Transcribing with {settings['hindi_fallback']} for Latin script")
+            return settings['hindi_fallback'], False
+        
+        if detected_language and language_confidence >= 0.5:
+            return detected_language, False
+        
+        # Only try fallback languages if detection also produced a poor transcript (less than 50 characters)
+        if len(transcript_text.strip()) >= 50:
+            print("✅ Auto-detection produced good transcript")
+            return None, False
+        print("🔍 No language detected or low confidence. Trying common languages...")
+        return None, True
+    
+    async def _choose_language(self, video_path, excerpt, settings, fingerprint):
+        """Pick the transcription language from a short, speech-dense excerpt.
+        
+        Returns a language code, or None to let Deepgram detect it on the full audio.
+        """
+        print(f"🔍 Attempting automatic language detection on {excerpt[1]:.0f}s of speech from {excerpt[0]:.0f}s...")
+        response = await self._prerecorded(video_path, dict(PROBE_OPTIONS, detect_language=True), fingerprint, excerpt)
+        language, try_fallbacks = self._judge_detection(response, settings)
+        if not try_fallbacks:
+            return language
+        
+        # Probe the excerpt in each fallback language at once; they are small, independent requests
+        transcript_text = self._response_language(response)[2]
+        languages = list(settings['probe_languages'])
+        print(f"🔍 Probing {', '.join(languages)} concurrently...")
+        semaphore = asyncio.Semaphore(max(1, int(settings['probe_concurrency'])))
+        
+        async def probe(lang):
+            async with semaphore:
+                return await self._prerecorded(video_path, dict(PROBE_OPTIONS, language=lang), fingerprint, excerpt)
+        
+        responses = await asyncio.gather(*(probe(lang) for lang in languages), return_exceptions=True)
+        best_language, best_length = None, len(transcript_text.strip())
+        for lang, probe_response in zip(languages, responses):
+            if isinstance(probe_response, Exception):
+                print(f"❌ Error trying {lang}: {probe_response}")
+                continue
+            new_transcript = self._response_language(probe_response)[2]
+            if len(new_transcript.strip()) > best_length:
+                best_language, best_length = lang, len(new_transcript.strip())
+        
+        if best_language:
+            print(f"✅ Best excerpt transcript found with {best_language}")
+        else:
+            print("❌ No improvement from fallback languages")
+        return best_language
+    
+    async def _transcribe_detecting(self, video_path, settings, fingerprint):
+        """Transcribe the full audio with language detection, for media too short (or unreadable) for an excerpt.
+        
+        The detection request is the transcription; a Hindi retry or fallback languages follow one at a time.
+        """
+        print("🔍 Attempting automatic language detection...")
+        response = await self._prerecorded(video_path, dict(TRANSCRIBE_OPTIONS, detect_language=True), fingerprint)
+        language, try_fallbacks = self._judge_detection(response, settings)
+        if language and language != self._response_language(response)[0]:
+            # Hindi: transcribe again in Latin script
+            response = await self._prerecorded(video_path, dict(TRANSCRIBE_OPTIONS, language=language), fingerprint)
+            print(f"✅ Transcription completed with {language} (Latin script)")
+            return response, language
+        if not try_fallbacks:
+            return response, ''
+        
+        transcript_text = self._response_language(response)[2]
+        for lang in settings['probe_languages']:
+            print(f"🔍 Trying language: {lang}")
+            try:
+                new_response = await self._prerecorded(video_path, dict(TRANSCRIBE_OPTIONS, language=lang), fingerprint)
+            except Exception as e:
+                print(f"❌ Error trying {lang}: {e}")
+                continue
+            new_transcript = self._response_language(new_response)[2]
+            if len(new_transcript.strip()) > len(transcript_text.strip()):
+                print(f"✅ Better transcript found with {lang}: {new_transcript[:100]}...")
+                return new_response, lang
+            print(f"❌ No improvement with {lang}")
+        return response, ''
     
-    async def _transcribe_with_deepgram(self, audio_path):
-        """Transcribe an audio file using Deepgram API with automatic language detection."""
+    async def _transcribe_with_deepgram(self, video_path, settings, scan):
+        """Transcribe a video's audio using Deepgram API.
+        
+        The language is chosen on a short excerpt first, then the full audio is transcribed exactly once.
+        Media too short for an excerpt is transcribed with detection directly instead.
+        settings is the language probe config and scan the video's audio scan (see _scan_audio).
+        Returns the response and the language it was transcribed in ('' if Deepgram detected it).
+        """
         try:
-            with open(audio_path, 'rb') as audio:
-                source = {'buffer': audio, 'mimetype': 'audio/wav'}
-                
-                # First attempt: Auto-detect language
-                options = {
-                    'punctuate': True,
-                    'model': 'nova-2',
-                    'detect_language': True,  # Enable automatic language detection
-                    'smart_format': True,
-                    'utterances': True,  # Enable utterance detection
-                    'sentiment': True,   # Enable sentiment analysis
-                    'summarize': True,   # Enable summarization
-                    'timeout': 300       # 5 minutes timeout
-                }
-                
-                print("🔍 Attempting automatic language detection...")
-                response = await self.dg_client.transcription.prerecorded(source, options)
-                
-                # Debug: Print response structure for troubleshooting
-                print(f"🔍 Response keys: {list(response.keys())}")
-                if 'results' in response:
-                    print(f"🔍 Results keys: {list(response['results'].keys())}")
-                
-                # Check if Hindi was detected and retry with hi-Latn if needed
-                detected_language = ''
-                if 'results' in response:
-                    detected_language = response['results'].get('language', '')
-                    print(f"🔍 Detected language: {detected_language}")
-                    
-                    # Also check for language_confidence if available
-                    language_confidence = response['results'].get('language_confidence', 0)
-                    print(f"🔍 Language confidence: {language_confidence}")
-                
-                # Check the transcript content for Hindi characters (Devanagari script)
-                transcript_text = ''
-                if 'results' in response and 'channels' in response['results'] and 'alternatives' in response['results']['channels'][0]:
-                    transcript_text = response['results']['channels'][0]['alternatives'][0].get('transcript', '')
-                
-                # Check if transcript contains Devanagari characters (Hindi script)
-                devanagari_chars = any('\u0900' <= char <= '\u097F' for char in transcript_text)
-                
-                # Print detected language info for debugging
-                print(f"🔍 Full transcript sample: {transcript_text[:200]}...")
-                print(f"🔍 Devanagari characters found: {devanagari_chars}")
-                
-                # If Hindi is detected OR Devanagari characters are found, retry with hi-Latn
-                if (detected_language == 'hi' or 'hi' in detected_language.lower() or devanagari_chars):
-                    print("🇮🇳 Hindi detected! Retrying with hi-Latn for Latin script...")
-                    print(f"🔍 Devanagari characters found: {devanagari_chars}")
-                    print(f"🔍 Sample transcript: {transcript_text[:100]}...")
-                    
-                    # Reopen the audio file for the second attempt
-                    with open(audio_path, 'rb') as audio_retry:
-                        source_retry = {'buffer': audio_retry, 'mimetype': 'audio/wav'}
-                        
-                        options = {
-                            'punctuate': True,
-                            'model': 'nova-2',
-                            'language': 'hi-Latn',  # Force Hindi in Latin script
-                            'smart_format': True,
-                            'utterances': True,
-                            'sentiment': True,
-                            'summarize': True,
-                            'timeout': 300
-                        }
-                        
-                        response = await self.dg_client.transcription.prerecorded(source_retry, options)
-                        print("✅ Transcription completed with hi-Latn (Latin script)")
-                        
-                        # Verify the new transcript is in Latin script
-                        new_transcript = ''
-                        if 'results' in response and 'channels' in response['results'] and 'alternatives' in response['results']['channels'][0]:
-                            new_transcript = response['results']['channels'][0]['alternatives'][0].get('transcript', '')
-                        print(f"🔍 New transcript sample: {new_transcript[:100]}...")
-                
-                # If no language was detected or confidence is low, try common languages
-                elif not detected_language or language_confidence < 0.5:
-                    print("🔍 No language detected or low confidence. Trying common languages...")
-                    
-                    # Only try fallback if we got a poor transcript (less than 50 characters)
-                    if len(transcript_text.strip()) < 50:
-                        # Try common languages
-                        languages_to_try = ['en', 'es', 'fr', 'de', 'it', 'pt']
-                        
-                        for lang in languages_to_try:
-                            print(f"🔍 Trying language: {lang}")
-                            with open(audio_path, 'rb') as audio_retry:
-                                source_retry = {'buffer': audio_retry, 'mimetype': 'audio/wav'}
-                                
-                                options = {
-                                    'punctuate': True,
-                                    'model': 'nova-2',
-                                    'language': lang,
-                                    'smart_format': True,
-                                    'utterances': True,
-                                    'sentiment': True,
-                                    'summarize': True,
-                                    'timeout': 300
-                                }
-                                
-                                try:
-                                    response = await self.dg_client.transcription.prerecorded(source_retry, options)
-                                    
-                                    # Check if we got a better transcript
-                                    new_transcript = ''
-                                    if 'results' in response and 'channels' in response['results'] and 'alternatives' in response['results']['channels'][0]:
-                                        new_transcript = response['results']['channels'][0]['alternatives'][0].get('transcript', '')
-                                    
-                                    # If we got a meaningful transcript, use it
-                                    if len(new_transcript.strip()) > len(transcript_text.strip()):
-                                        print(f"✅ Better transcript found with {lang}: {new_transcript[:100]}...")
-                                        break
-                                    else:
-                                        print(f"❌ No improvement with {lang}")
-                                        
-                                except Exception as e:
-                                    print(f"❌ Error trying {lang}: {e}")
-                                    continue
-                    else:
-                        print("✅ Auto-detection produced good transcript, using it as-is")
-                
-                return response
+            fingerprint = scan['fingerprint']
+            language = settings['transcription_language']
+            if not language or language == 'auto':
+                excerpt = find_excerpt(scan, float(settings['language_excerpt_seconds']))
+                if excerpt is None:
+                    return await self._transcribe_detecting(video_path, settings, fingerprint)
+                language = await self._choose_language(video_path, excerpt, settings, fingerprint)
+            else:
+                print(f"🔍 Using configured language: {language}")
+            
+            options = dict(TRANSCRIBE_OPTIONS)
+            if language:
+                options['language'] = language
+            else:
+                options['detect_language'] = True
+            
+            print(f"🔍 Transcribing full audio in {language or 'auto-detected language'}...")
+            response = await self._prerecorded(video_path, options, fingerprint)
+            return response, language or ''
         except Exception as e:
             print(f"Error during transcription: {str(e)}")
             raise
@@ -192,40 +261,50 @@ class TranscriptionHandler:
         srt_path = self.subtitles_dir / f"{video_name}.srt"
         
         try:
-            # Extract audio from video
-            print("Extracting audio from video...")
-            audio_path = self.extract_audio(video_path)
-            if not audio_path:
-                raise Exception("Failed to extract audio from video")
+            # Decoded once up front, outside the event loop: the fingerprint and the speech for the excerpt
+            settings = get_language_probe_config()
+            scan = self._scan_audio(video_path, detect_speech=settings['transcription_language'] in (None, '', 'auto'))
             
-            try:
-                # Run async transcription
-                print("Transcribing audio...")
-                response = asyncio.run(self._transcribe_with_deepgram(audio_path))
-                
-                # Convert Deepgram response to our segment format with scoring
-                segments = []
+            # The audio is encoded and streamed straight into the request, no temp file
+            print("Transcribing audio...")
+            response, language = asyncio.run(self._transcribe_with_deepgram(video_path, settings, scan))
+            
+            # Convert Deepgram response to our segment format with scoring
+            segments = []
+            
+            # Check if we have utterances or need to use words
+            if 'utterances' in response['results']['channels'][0]['alternatives'][0]:
+                # Use utterance-level data
+                for utterance in response['results']['channels'][0]['alternatives'][0]['utterances']:
+                    segment = {
+                        'start': utterance['start'],
+                        'end': utterance['end'],
+                        'text': utterance['transcript'],
+                        'sentiment': utterance.get('sentiment', {}),
+                        'confidence': utterance.get('confidence', 0),
+                        'words': utterance.get('words', [])
+                    }
+                    segments.append(segment)
+            else:
+                # Use word-level data and group into sentences
+                words = response['results']['channels'][0]['alternatives'][0]['words']
+                current_segment = None
                 
-                # Check if we have utterances or need to use words
-                if 'utterances' in response['results']['channels'][0]['alternatives'][0]:
-                    # Use utterance-level data
-                    for utterance in response['results']['channels'][0]['alternatives'][0]['utterances']:
-                        segment = {
-                            'start': utterance['start'],
-                            'end': utterance['end'],
-                            'text': utterance['transcript'],
-                            'sentiment': utterance.get('sentiment', {}),
-                            'confidence': utterance.get('confidence', 0),
-                            'words': utterance.get('words', [])
+                for word in words:
+                    if current_segment is None:
+                        current_segment = {
+                            'start': word['start'],
+                            'end': word['end'],
+                            'text': word['punctuated_word'] if 'punctuated_word' in word else word['word'],
+                            'sentiment': {},
+                            'confidence': word.get('confidence', 0),
+                            'words': [word]
                         }
-                        segments.append(segment)
-                else:
-                    # Use word-level data and group into sentences
-                    words = response['results']['channels'][0]['alternatives'][0]['words']
-                    current_segment = None
-                    
-                    for word in words:
-                        if current_segment is None:
+                    else:
+                        # Check if we should start a new segment (e.g., on punctuation or long pause)
+                        if (word.get('punctuated_word', '').endswith(('.', '!', '?')) or 
+                            word['start'] - current_segment['end'] > 1.0):  # 1 second pause
+                            segments.append(current_segment)
                             current_segment = {
                                 'start': word['start'],
                                 'end': word['end'],
@@ -235,40 +314,25 @@ class TranscriptionHandler:
                                 'words': [word]
                             }
                         else:
-                            # Check if we should start a new segment (e.g., on punctuation or long pause)
-                            if (word.get('punctuated_word', '').endswith(('.', '!', '?')) or 
-                                word['start'] - current_segment['end'] > 1.0):  # 1 second pause
-                                segments.append(current_segment)
-                                current_segment = {
-                                    'start': word['start'],
-                                    'end': word['end'],
-                                    'text': word['punctuated_word'] if 'punctuated_word' in word else word['word'],
-                                    'sentiment': {},
-                                    'confidence': word.get('confidence', 0),
-                                    'words': [word]
-                                }
-                            else:
-                                # Add word to current segment
-                                current_segment['end'] = word['end']
-                                current_segment['text'] += ' ' + (word['punctuated_word'] if 'punctuated_word' in word else word['word'])
-                                current_segment['words'].append(word)
-                                current_segment['confidence'] = (current_segment['confidence'] + word.get('confidence', 0)) / 2
-                    
-                    # Add the last segment if it exists
-                    if current_segment:
-                        segments.append(current_segment)
-                
-                # Save subtitles with scoring information
-                self._save_srt_with_scoring(segments, srt_path)
-                print(f"Subtitles saved to: {srt_path}")
-                
-                return srt_path
+                            # Add word to current segment
+                            current_segment['end'] = word['end']
+                            current_segment['text'] += ' ' + (word['punctuated_word'] if 'punctuated_word' in word else word['word'])
+                            current_segment['words'].append(word)
+                            current_segment['confidence'] = (current_segment['confidence'] + word.get('confidence', 0)) / 2
                 
-            finally:
-                # Clean up temporary audio file
-                if os.path.exists(audio_path):
-                    os.unlink(audio_path)
-                    
+                # Add the last segment if it exists
+                if current_segment:
+                    segments.append(current_segment)
+            
+            # Save subtitles with scoring information
+            self._save_srt_with_scoring(segments, srt_path)
+            print(f"Subtitles saved to: {srt_path}")
+            
+            # Everything later stages need from this transcription, so none of them calls Deepgram again
+            self._save_transcript(response, segments, srt_path.with_suffix(TRANSCRIPT_SUFFIX), language)
+            
+            return srt_path
+            
         except Exception as e:
             print(f"Error transcribing video: {str(e)}")
             raise
@@ -304,6 +368,22 @@ class TranscriptionHandler:
                 } for s in segments]
             }, f, indent=2)
     
+    def _save_transcript(self, response, segments, path, language=''):
+        """Save the words, scored segments and language of a transcription for the other stages."""
+        results = response.get('results', {})
+        channel = results.get('channels', [{}])[0]
+        alternative = channel.get('alternatives', [{}])[0]
+        detected_language, language_confidence, _ = self._response_language(response)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'language': language or detected_language,
+                'language_confidence': 1.0 if language else language_confidence,
+                'duration': response.get('metadata', {}).get('duration'),
+                'transcript': alternative.get('transcript', ''),
+                'words': alternative.get('words', []),
+                'segments': [dict(s, score=self._calculate_segment_score(s)) for s in segments]
+            }, f, ensure_ascii=False)
+    
     def _calculate_segment_score(self, segment):
         """Calculate a score for a segment based on various factors."""
         score = 0.0
@@ -351,7 +431,7 @@ class TranscriptionHandler:
         try:
             print(f"Converting {srt_path} to ASS format...")
             print("Running command:", " ".join(cmd))
-            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            result = run_measured(cmd, "Convert SRT to ASS", text=True)
             if result.returncode != 0:
                 print("FFmpeg Error Output:")
                 print(result.stderr)
@@ -5,10 +5,17 @@ Detects if a video is horizontal (landscape) or vertical (portrait)
 """
 
 import cv2
-import json
+import sys
 from pathlib import Path
 from moviepy.editor import VideoFileClip
 
+# Project root, for modules.* imports when this file is loaded from the modules folder
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from modules.config_service import load_master_config
+
 def detect_video_orientation(video_path):
     """
     Detect if a video is horizontal (landscape) or vertical (portrait)
@@ -66,32 +73,15 @@ def detect_video_orientation(video_path):
             return 'unknown'
 
 def get_orientation_config():
-    """Get orientation detection configuration from master_config.json"""
-    project_root = Path(__file__).parent.parent
-    config_path = project_root / "config" / "master_config.json"
-    
-    fallback_paths = [
-        config_path,
-        Path("/app/config/master_config.json"),  # Docker container path
-        Path("config/master_config.json"),     # Relative path
-        Path("./config/master_config.json")     # Current directory relative
-    ]
-    
-    for path in fallback_paths:
-        try:
-            if path.exists():
-                with open(path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    return config.get('orientation_detection', {
-                        'enabled': True,
-                        'horizontal_threshold': 1.0
-                    })
-        except Exception as e:
-            print(f"Warning: Could not load orientation config from {path}: {e}")
-            continue
-    
-    print("Warning: Could not load orientation config from any path, using defaults")
-    return {'enabled': True, 'horizontal_threshold': 1.0}
+    """Get orientation detection configuration from master_config.json (or the job's config snapshot)"""
+    try:
+        return load_master_config().get('orientation_detection', {
+            'enabled': True,
+            'horizontal_threshold': 1.0
+        })
+    except Exception as e:
+        print(f"Warning: Could not load orientation config, using defaults: {e}")
+        return {'enabled': True, 'horizontal_threshold': 1.0}
 
 def is_horizontal_video(video_path):
     """
@@ -0,0 +1,321 @@
+"""
+Long-lived pipeline worker processes with the heavy libraries already loaded.
+
+Starting ``run_pipeline.py`` for every job imports cv2, moviepy (which probes
+for ffmpeg), the Deepgram SDK, the Google API client and pysrt again, and the
+face detector is rebuilt for every job. A warm worker (``warm_worker.py``)
+imports all of that once and then runs job after job in-process. Jobs are sent
+as JSON lines on its stdin, and it answers on its original stdout. Anything
+else it prints goes to stderr.
+
+Workers are recycled after ``max_jobs_per_worker`` jobs, or once their resident
+memory passes ``max_rss_mb``, to contain leaks in moviepy or OpenCV. A cancelled
+or overdue job kills its worker's whole process group, and a fresh worker takes
+its place.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import importlib
+import threading
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from modules.process_control import KILL_GRACE_PERIOD, kill_process_tree, popen_group, release
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARM_POOL_CONFIG = {
+    'enabled': True,
+    'max_jobs_per_worker': 20,
+    'max_rss_mb': 3072,
+    'startup_timeout': 120
+}
+
+# Imported by every worker before it accepts jobs
+PRELOAD_MODULES = [
+    'numpy',
+    'cv2',
+    'moviepy.editor',
+    'ffmpeg',
+    'pysrt',
+    'deepgram',
+    'googleapiclient.discovery',
+    'modules.face_tracking',
+    'modules.video_orientation',
+    'modules.transcription',
+    'modules.silence_trimmer',
+    'modules.subtitle_clipper',
+    'modules.shorts_titles',
+    'modules.shorts_upload',
+]
+
+
+def current_rss_mb() -> float:
+    """Resident memory of this process in MB"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return round(resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        try:
+            import resource
+            divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+            return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1)
+        except ImportError:
+            return 0.0
+
+
+def preload(modules: List[str]) -> List[str]:
+    """Import modules ahead of the first job; returns the ones that loaded"""
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not preload {name}: {str(e)}")
+    return loaded
+
+
+def serve(run_job: Callable[[Dict], bool], modules: Optional[List[str]] = None):
+    """Worker side: preload, then run the jobs read from stdin until it is closed
+
+    Args:
+        run_job: Runs one job (a dict with workspace, video and resume) and returns whether it succeeded
+        modules: Modules to import up front (default: PRELOAD_MODULES)
+    """
+    # Replies go to the original stdout; everything else printed from here on goes to stderr
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8', buffering=1)
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def reply(message: Dict):
+        channel.write(json.dumps(message) + "\n")
+        channel.flush()
+
+    started = time.perf_counter()
+    loaded = preload(PRELOAD_MODULES if modules is None else modules)
+    logger.info(f"🔥 Warm worker {os.getpid()} ready in {time.perf_counter() - started:.1f}s "
+                f"({len(loaded)} modules preloaded)")
+    reply({'ready': True, 'pid': os.getpid(), 'preloaded': loaded, 'rss_mb': current_rss_mb()})
+
+    jobs = 0
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError:
+            reply({'ok': False, 'error': 'Invalid job'})
+            continue
+        job_started = time.perf_counter()
+        try:
+            ok = bool(run_job(job))
+        except SystemExit:
+            # The pipeline exits on fatal job errors (already logged); the worker carries on
+            ok = False
+        except Exception as e:
+            logger.error(f"Job in warm worker failed: {str(e)}")
+            ok = False
+        jobs += 1
+        reply({'ok': ok, 'jobs': jobs, 'rss_mb': current_rss_mb(),
+               'seconds': round(time.perf_counter() - job_started, 1)})
+
+
+class WarmWorker:
+    """Parent side of one warm worker process"""
+
+    def __init__(self, command: List[str], cwd=None):
+        self.process = popen_group(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   text=True, encoding='utf-8', bufsize=1, cwd=cwd)
+        self.jobs = 0
+        self.rss_mb = 0.0
+        self._replies = queue.Queue()
+        threading.Thread(target=self._read_replies, name=f"warm-worker-{self.process.pid}", daemon=True).start()
+
+    def _read_replies(self):
+        for line in self.process.stdout:
+            try:
+                self._replies.put(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        self._replies.put(None)  # The worker exited
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Wait for the worker to finish preloading"""
+        try:
+            message = self._replies.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        if not message or not message.get('ready'):
+            return False
+        self.rss_mb = message.get('rss_mb', 0.0)
+        return True
+
+    def run(self, job: Dict, timeout: Optional[float], should_cancel: Callable[[], bool],
+            poll_interval: float = 1.0) -> Optional[bool]:
+        """Run a job; True/False for success, None if it was cancelled
+
+        Raises:
+            subprocess.TimeoutExpired: The job ran past its timeout (the worker is then killed)
+        """
+        started = time.time()
+        self.process.stdin.write(json.dumps(job) + "\n")
+        self.process.stdin.flush()
+        while True:
+            try:
+                message = self._replies.get(timeout=poll_interval)
+            except queue.Empty:
+                if should_cancel():
+                    self.kill()
+                    return None
+                if timeout and time.time() - started > timeout:
+                    self.kill()
+                    raise subprocess.TimeoutExpired(self.process.args, timeout)
+                continue
+            if message is None:
+                logger.error(f"❌ Warm worker {self.process.pid} exited during a job")
+                return False
+            self.jobs = message.get('jobs', self.jobs + 1)
+            self.rss_mb = message.get('rss_mb', self.rss_mb)
+            return bool(message.get('ok'))
+
+    def stop(self):
+        """Let the worker exit after closing its job channel"""
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=KILL_GRACE_PERIOD)
+        except (OSError, subprocess.TimeoutExpired):
+            kill_process_tree(self.process)
+        release(self.process)
+
+    def kill(self):
+        """Stop the worker and everything it started"""
+        kill_process_tree(self.process)
+        release(self.process)
+
+
+class WarmPool:
+    """Warm workers handed out one job at a time"""
+
+    def __init__(self, size: int, command: List[str], cwd=None, config: Optional[Dict] = None):
+        self.size = max(1, int(size))
+        self.command = command
+        self.cwd = cwd
+        self.config = dict(DEFAULT_WARM_POOL_CONFIG, **(config or {}))
+        self._idle: List[WarmWorker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        """Warm up the workers in the background"""
+        for _ in range(self.size):
+            threading.Thread(target=self._add_idle_worker, daemon=True).start()
+
+    def _spawn(self) -> Optional[WarmWorker]:
+        try:
+            worker = WarmWorker(self.command, self.cwd)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not start a warm worker: {str(e)}")
+            return None
+        if not worker.wait_ready(self.config['startup_timeout']):
+            logger.warning(f"⚠️ Warm worker {worker.process.pid} did not become ready")
+            worker.kill()
+            return None
+        return worker
+
+    def _add_idle_worker(self):
+        worker = self._spawn()
+        if worker is None:
+            return
+        with self._lock:
+            if self._closed or len(self._idle) >= self.size:
+                surplus = True
+            else:
+                self._idle.append(worker)
+                surplus = False
+        if surplus:
+            worker.stop()
+
+    def _acquire(self) -> Optional[WarmWorker]:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive:
+                    return worker
+                release(worker.process)
+        # None warm yet (or all busy): start one for this job
+        return self._spawn()
+
+    def _release(self, worker: WarmWorker):
+        """Return a worker to the pool, or recycle it if it has done enough jobs or grown too big"""
+        recycle = None
+        if worker.jobs >= self.config['max_jobs_per_worker']:
+            recycle = f"after {worker.jobs} jobs"
+        elif worker.rss_mb > self.config['max_rss_mb']:
+            recycle = f"at {worker.rss_mb:.0f} MB resident"
+        if recycle is None and worker.alive:
+            with self._lock:
+                if not self._closed:
+                    self._idle.append(worker)
+                    return
+        if recycle:
+            logger.info(f"♻️ Recycling warm worker {worker.process.pid} {recycle}")
+        worker.stop()
+        if not self._closed:
+            threading.Thread(target=self._add_idle_worker, daemon=True).start()
+
+    def run(self, job: Dict, timeout: Optional[float], should_cancel: Callable[[], bool],
+            poll_interval: float = 1.0) -> Optional[bool]:
+        """Run a job on a warm worker; True/False for success, None if it was cancelled
+
+        Raises:
+            RuntimeError: No worker could be started
+            subprocess.TimeoutExpired: The job ran past its timeout
+        """
+        worker = self._acquire()
+        if worker is None:
+            raise RuntimeError("No warm worker available")
+        try:
+            result = worker.run(job, timeout, should_cancel, poll_interval)
+        except subprocess.TimeoutExpired:
+            self._replace()
+            raise
+        if result is None or not worker.alive:
+            # Killed (cancelled) or crashed: start a replacement
+            worker.kill()
+            self._replace()
+            return result
+        self._release(worker)
+        return result
+
+    def _replace(self):
+        if not self._closed:
+            threading.Thread(target=self._add_idle_worker, daemon=True).start()
+
+    def shutdown(self):
+        """Stop every idle worker"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+
+def create_warm_pool(config: Optional[Dict], size: int, base_dir) -> Optional[WarmPool]:
+    """Pool described by the ``warm_workers`` config section, or None when it is disabled"""
+    config = dict(DEFAULT_WARM_POOL_CONFIG, **(config or {}))
+    if not config['enabled']:
+        return None
+    command = [sys.executable, str(Path(base_dir) / "warm_worker.py")]
+    return WarmPool(size, command, cwd=base_dir, config=config)
@@ -0,0 +1,112 @@
+"""
+Per-job workspace directories.
+
+Every job gets its own directory tree under ``<output_folder>/jobs/<job_id>`` with
+the same layout the pipeline stages already use for the output folder
+(subtitles/, processed/, shorts/, metadata/), plus input/ and temp/. Stages are
+pointed at the workspace root instead of the shared output folder, so several
+jobs can run at the same time without touching each other's files.
+"""
+
+import shutil
+from pathlib import Path
+from typing import Optional
+
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.webm'}
+
+JOBS_DIRNAME = "jobs"
+
+
+def get_jobs_root(output_folder) -> Path:
+    """Directory that holds all job workspaces"""
+    return Path(output_folder).expanduser().resolve() / JOBS_DIRNAME
+
+
+class JobWorkspace:
+    """Directory layout for a single processing job"""
+
+    def __init__(self, root):
+        self.root = Path(root).expanduser().resolve()
+
+    @classmethod
+    def create(cls, output_folder, job_id: str) -> "JobWorkspace":
+        """Create (or reopen) the workspace for a job"""
+        workspace = cls(get_jobs_root(output_folder) / job_id)
+        workspace.ensure()
+        return workspace
+
+    @classmethod
+    def open(cls, output_folder, job_id: str) -> Optional["JobWorkspace"]:
+        """Return the workspace for a job if it exists"""
+        if not job_id or Path(job_id).name != job_id:
+            return None
+        workspace = cls(get_jobs_root(output_folder) / job_id)
+        return workspace if workspace.root.is_dir() else None
+
+    @property
+    def job_id(self) -> str:
+        return self.root.name
+
+    @property
+    def input_dir(self) -> Path:
+        return self.root / "input"
+
+    @property
+    def subtitles_dir(self) -> Path:
+        return self.root / "subtitles"
+
+    @property
+    def processed_dir(self) -> Path:
+        return self.root / "processed"
+
+    @property
+    def shorts_dir(self) -> Path:
+        return self.root / "shorts"
+
+    @property
+    def metadata_dir(self) -> Path:
+        return self.root / "metadata"
+
+    @property
+    def temp_dir(self) -> Path:
+        return self.root / "temp"
+
+    @property
+    def log_file(self) -> Path:
+        return self.root / "pipeline.log"
+
+    @property
+    def events_file(self) -> Path:
+        return self.root / "events.jsonl"
+
+    def ensure(self):
+        """Create all workspace directories"""
+        for directory in (self.input_dir, self.subtitles_dir, self.processed_dir,
+                          self.shorts_dir, self.metadata_dir, self.temp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def find_input_video(self) -> Optional[Path]:
+        """Return the uploaded source video, if any"""
+        if not self.input_dir.exists():
+            return None
+        videos = [f for f in self.input_dir.iterdir()
+                  if f.is_file() and f.suffix.lower() in VIDEO_EXTENSIONS]
+        if not videos:
+            return None
+        videos.sort(key=lambda f: f.stat().st_mtime)
+        return videos[-1]
+
+    def url_for(self, path: Path, url_prefix: str = "/output") -> str:
+        """URL under which a workspace file is served by the web app"""
+        relative = Path(path).resolve().relative_to(self.root.parent.parent)
+        return f"{url_prefix}/{relative.as_posix()}"
+
+    def clean_temp(self):
+        """Remove intermediate files left in temp/"""
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+
+    def remove(self):
+        """Delete the whole workspace"""
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -1,13 +1,18 @@
 import subprocess
 import sys
 import os
+import signal
 import logging
 import json
+import argparse
+import time
+import multiprocessing
+from multiprocessing.connection import wait as wait_for_processes
 from datetime import datetime
 from pathlib import Path
 import re
 
-# Set up logging with UTF-8 encoding and emojis
+# Console sink: emojis and colors for people watching the run
 class EmojiFormatter(logging.Formatter):
     # ANSI color codes
     COLORS = {
@@ -19,175 +24,142 @@ class EmojiFormatter(logging.Formatter):
         'reset': '\033[0m'     # Reset color
     }
 
-    def format(self, record):
-        # Skip adding emojis for separator lines
-        if "⏳" in record.msg or "♻️" in record.msg or "⭐" in record.msg:
-            return super().format(record)
-            
-        # Add color to processing new video separator
-        elif "♻️" in record.msg and "Processing new video" in record.msg:
-            return f"{self.COLORS['cyan']}{super().format(record)}{self.COLORS['reset']}"
-            
-        # Add emojis based on log level and message content
+    # Color and emoji of each step, for records logged by run_stage (extra stage/stage_status)
+    STAGE_STYLES = {
+        'transcribe': ('blue', '🎬'),
+        'add_subtitles': ('blue', '🎬'),
+        'trim_silence': ('blue', '🎬'),
+        'select_clips': ('green', '✂️'),
+        'create_shorts': ('green', '✂️'),
+        'generate_titles': ('yellow', '📝'),
+        'upload_shorts': ('red', '📤')
+    }
+
+    # Emoji for other messages, by the first keyword they contain
+    KEYWORD_EMOJIS = [
+        ('completed', '✅'),
+        ('generating title', '🎯'),
+        ('sending request', '🌐'),
+        ('api response', '📡'),
+        ('hashtags', '🏷️'),
+        ('description', '📄'),
+        ('extracted', '🔖'),
+        ('starting', '🚀'),
+        ('processing', ''),
+        ('found', '🔍'),
+        ('saved', '💾'),
+        ('upload', '📤'),
+        ('schedule', '📅'),
+        ('error', '❌'),
+        ('warning', '⚠️'),
+        ('successfully', '✅'),
+        ('burning', '🔥'),
+        ('temporary', '🗑️'),
+        ('cleaned', '🗑️'),
+        ('clip', '📋')
+    ]
+
+    CLIP_PATTERN = re.compile(r'processing clip (\d+)/(\d+)')
+
+    def decorate(self, record, message: str) -> str:
+        """Message with its emoji (and color); the record itself is left untouched for other sinks"""
+        # Separator lines are already decorated
+        if "⏳" in message or "♻️" in message or "⭐" in message:
+            return message
         if record.levelno >= logging.ERROR:
-            record.msg = f"❌  {record.msg}"
-        elif record.levelno >= logging.WARNING:
-            record.msg = f"⚠️  {record.msg}"
-        elif record.levelno >= logging.INFO:
-            # Add specific emojis for common operations
-            msg = record.msg.lower()
-            
-            # Check for completed status first
-            if "completed" in msg:
-                shorts_match = re.search(r'created (\d+) shorts', msg)
-                if shorts_match and "step 2" in msg:
-                    # Let it match even if emojis are there
-                    record.msg = f"{self.COLORS['green']}✂️  Completed: Step 2: Create shorts from full video (created {shorts_match.group(1)} shorts){self.COLORS['reset']}"
-                else:
-                    # Apply a default emoji only if not already present
-                    if not record.msg.startswith("✅"):
-                        record.msg = f"✅  {record.msg}"
-            # Pipeline steps with colors - only for main step messages
-            elif "step 1:" in msg and "process video and add subtitles" in msg:
-                record.msg = f"{self.COLORS['blue']}🎬  {record.msg}{self.COLORS['reset']}"  # Video processing
-            elif "step 2:" in msg and "create shorts from full video" in msg:
-                record.msg = f"{self.COLORS['green']}✂️  {record.msg}{self.COLORS['reset']}"  # Creating shorts
-            elif "step 3:" in msg and "generate titles/tags/descriptions" in msg:
-                record.msg = f"{self.COLORS['yellow']}📝  {record.msg}{self.COLORS['reset']}"  # Generating titles
-            elif "step 4:" in msg and "upload shorts and schedule" in msg:
-                record.msg = f"{self.COLORS['red']}📤  {record.msg}{self.COLORS['reset']}"  # Uploading
-            # API and Content Generation
-            elif "generating title" in msg:
-                record.msg = f"🎯  {record.msg}"  # Targeting content
-            elif "sending request" in msg:
-                record.msg = f"🌐  {record.msg}"  # API request
-            elif "api response" in msg:
-                record.msg = f"📡  {record.msg}"  # API response
-            elif "hashtags" in msg:
-                record.msg = f"🏷️  {record.msg}"  # Tags
-            elif "description" in msg:
-                record.msg = f"📄  {record.msg}"  # Description
-            elif "extracted" in msg:
-                record.msg = f"🔖  {record.msg}"  # Extracted content
-            # Other operations
-            elif "starting" in msg:
-                record.msg = f"🚀  {record.msg}"
-            elif "processing" in msg:
-                # Remove gear icon for processing messages
-                record.msg = f"{record.msg}"
-            elif "found" in msg:
-                record.msg = f"🔍  {record.msg}"
-            elif "saved" in msg:
-                record.msg = f"💾  {record.msg}"
-            elif "upload" in msg:
-                record.msg = f"📤  {record.msg}"
-            elif "schedule" in msg:
-                record.msg = f"📅  {record.msg}"
-            elif "error" in msg:
-                record.msg = f"❌  {record.msg}"
-            elif "warning" in msg:
-                record.msg = f"⚠️  {record.msg}"
-            elif "successfully" in msg:
-                record.msg = f"✅  {record.msg}"  # Success messages
-            elif "burning" in msg:
-                record.msg = f"🔥  {record.msg}"  # Burning subtitles
-            elif "temporary" in msg or "cleaned" in msg:
-                record.msg = f"🗑️  {record.msg}"  # Cleanup operations
-            elif "clip" in msg:
-                # Extract clip number and total if present
-                clip_match = re.search(r'Processing clip (\d+)/(\d+)', msg)
-                if clip_match:
-                    clip_num = clip_match.group(1)
-                    total_clips = clip_match.group(2)
-                    record.msg = f"📋  Clip {clip_num}/{total_clips}  {record.msg}"  # Clip processing
-                else:
-                    record.msg = f"📋  {record.msg}"  # General clip message
-            # Regular step messages without colors
-            elif "step" in msg:
-                if "step 1" in msg:
-                    record.msg = f"🎬  {record.msg}"  # Video processing
-                elif "step 2" in msg:
-                    record.msg = f"✂️  {record.msg}"  # Creating shorts
-                elif "step 3" in msg:
-                    record.msg = f"📝  {record.msg}"  # Generating titles
-                elif "step 4" in msg:
-                    record.msg = f"📤  {record.msg}"  # Uploading
+            return f"❌  {message}"
+        if record.levelno >= logging.WARNING:
+            return f"⚠️  {message}"
+        if record.levelno < logging.INFO:
+            return message
+
+        status = getattr(record, 'stage_status', None)
+        if status is not None:
+            color, emoji = self.STAGE_STYLES.get(getattr(record, 'stage', None), (None, '▶️'))
+            if status == 'completed':
+                emoji = '✅'
+            if color:
+                return f"{self.COLORS[color]}{emoji}  {message}{self.COLORS['reset']}"
+            return f"{emoji}  {message}"
+
+        lowered = message.lower()
+        for keyword, emoji in self.KEYWORD_EMOJIS:
+            if keyword in lowered:
+                if not emoji or message.startswith(emoji):
+                    return message
+                if keyword == 'clip':
+                    clip_match = self.CLIP_PATTERN.search(lowered)
+                    if clip_match:
+                        return f"📋  Clip {clip_match.group(1)}/{clip_match.group(2)}  {message}"
+                return f"{emoji}  {message}"
+        return message
+
+    def format(self, record):
+        message = record.getMessage()
+        decorated = self.decorate(record, message)
+        if decorated != message:
+            record = logging.makeLogRecord(record.__dict__)
+            record.msg, record.args = decorated, None
         return super().format(record)
 
-# Set up logging with UTF-8 encoding
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('pipeline.log', encoding='utf-8')
-    ]
-)
+def setup_logging(log_file='pipeline.log'):
+    """Log to stdout (with emojis) and to the given log file (plain, UTF-8; None for the console only)"""
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
 
-# Apply the emoji formatter to the root logger
-for handler in logging.getLogger().handlers:
-    handler.setFormatter(EmojiFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+    # Emojis only on the console; the log file stays plain
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, logging.FileHandler):
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        elif isinstance(handler, logging.StreamHandler):
+            handler.setFormatter(EmojiFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+    # Warnings also reach the web app, as typed events of the stage they happened in
+    if not any(isinstance(handler, EventLogHandler) for handler in root.handlers):
+        root.addHandler(EventLogHandler())
 
 logger = logging.getLogger(__name__)
 
 # Get the project root directory
 PROJECT_ROOT = Path(__file__).parent.absolute()
 
-def get_pipeline_config():
-    """Get pipeline configuration from master_config.json"""
-    config_path = PROJECT_ROOT / "config" / "master_config.json"
-    if not config_path.exists():
-        logger.error("Error: master_config.json not found in config directory!")
-        sys.exit(1)
-    
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            pipeline_steps = config.get('pipeline_steps', {})
-            if not pipeline_steps:
-                logger.error("Error: 'pipeline_steps' not found in master_config.json!")
-                sys.exit(1)
-            return config
-    except json.JSONDecodeError:
-        logger.error("Error: Invalid JSON in master_config.json!")
-        sys.exit(1)
-    except Exception as e:
-        logger.error(f"Error reading master_config.json: {str(e)}")
-        sys.exit(1)
+sys.path.insert(0, str(PROJECT_ROOT))
+from modules.workspace import JobWorkspace
+from modules.manifest import finalize_manifest, load_manifest
+from modules.progress import EVENTS_ENV_VAR, EventLogHandler, get_reporter, start_reporter
+from modules.process_control import kill_active_process_groups, StageDeadline, stage_deadline
+from modules import stages
+from modules.stages import StageContext, StageError
+from modules.dag import CpuBudget, DagScheduler
+from modules.journal import JobJournal
+from modules.job_queue import default_worker_count
+from modules.media_probe import probe_duration, probe_media
+from modules.metrics import get_metrics, start_job_metrics
+from modules.cost_model import EtaTracker, create_cost_model, eta_path, expected_flow
+from modules.config_service import CONFIG_ENV_VAR, CONFIG_PATH, ConfigError, get_config_service, write_snapshot
+from modules.video_orientation import is_horizontal_video
+from src.process_horizontal_video import process_horizontal_video as process_horizontal
 
-def normalize_paths_in_config():
-    """Normalize paths in master_config.json to use double backslashes"""
-    config_path = PROJECT_ROOT / "config" / "master_config.json"
-    if not config_path.exists():
+def get_pipeline_config(**overrides):
+    """Frozen snapshot of master_config.json for this run, with top-level keys overridden"""
+    try:
+        config = get_config_service(CONFIG_PATH).snapshot(**overrides)
+    except FileNotFoundError:
         logger.error("Error: master_config.json not found in config directory!")
         sys.exit(1)
-    
-    try:
-        # First read the file content as a raw string
-        with open(config_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        # Fix common JSON formatting issues
-        content = content.replace('""', '"')  # Remove double quotes
-        content = content.replace('\\', '\\\\')  # Convert single backslashes to double
-        
-        # Parse the JSON
-        config = json.loads(content)
-        
-        # Ensure paths are properly formatted
-        if 'input_folder' in config:
-            config['input_folder'] = str(Path(config['input_folder']).resolve()).replace('\\', '\\\\')
-        if 'output_folder' in config:
-            config['output_folder'] = str(Path(config['output_folder']).resolve()).replace('\\', '\\\\')
-        
-        # Write back the normalized config
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-        
-        logger.info("Normalized paths in master_config.json")
-    except Exception as e:
-        logger.error(f"Error normalizing paths in master_config.json: {str(e)}")
+    except ConfigError as e:
+        logger.error(f"Error: Invalid master_config.json: {str(e)}")
         sys.exit(1)
+    if not config.get('pipeline_steps'):
+        logger.error("Error: 'pipeline_steps' not found in master_config.json!")
+        sys.exit(1)
+    return config
 
 def get_all_videos(folder_path: Path) -> list[Path]:
     """Get all video files from the specified folder"""
@@ -217,137 +189,393 @@ def get_all_videos(folder_path: Path) -> list[Path]:
     logger.info(f"Found {len(video_files)} video files")
     return video_files
 
-def run_command(command: str, step_name: str) -> bool:
-    """Run a command and log its output"""
-    logger.info(f"Starting: {step_name}")
+def process_video(video_file: Path, config: dict, resume: bool = False, budget: CpuBudget = None) -> bool:
+    """Process a single video through the pipeline (resume: skip stages the job journal records as done)"""
+    logger.info(f"Processing video: {video_file}")
+    output_root = Path(config['output_folder']).expanduser().resolve()
+    metrics = start_job_metrics(video_file)
+
+    # Predicted processing time, refined in eta/<video>.json as stages finish
+    media = probe_media(video_file)
+    cost_model = create_cost_model(config.get('cost_model'), config.get('admission'), base_dir=PROJECT_ROOT)
+    prediction = cost_model.predict(media, expected_flow(media, config))
+    logger.info(f"🔮 Predicted processing time: {prediction.total_seconds / 60:.1f} min "
+                f"({prediction.flow} flow, {prediction.source} estimate)")
+    output_root.mkdir(parents=True, exist_ok=True)
+    metrics.listeners.append(EtaTracker(prediction, eta_path(output_root, video_file.stem)).stage_finished)
+
+    success = False
     try:
-        # Set up environment with PYTHONPATH
-        env = os.environ.copy()
-        env['PYTHONPATH'] = str(PROJECT_ROOT)
-        
-        # Run the command and capture output in real-time
-        process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            shell=True,
-            env=env
-        )
-        
-        # Stream the output in real-time
-        for line in process.stdout:
-            # Remove any ANSI color codes and extra whitespace
-            clean_line = line.strip()
-            if clean_line:
-                logger.info(clean_line)
-        
-        # Wait for the process to complete
-        return_code = process.wait()
-        
-        if return_code == 0:
-            logger.info(f"Completed: {step_name}")
-            return True
-        else:
-            logger.error(f"Failed: {step_name} with return code {return_code}")
-            return False
-            
-    except Exception as e:
-        logger.error(f"Error in {step_name}: {str(e)}")
-        return False
+        success = process_video_flow(video_file, config, resume, budget)
+        return success
+    finally:
+        # Timing and resource usage of every stage, command and API call
+        report = metrics.write(output_root, video_file.stem)
+        summary = metrics.summary()
+        if report:
+            logger.info(f"⏱️ {summary['wall_seconds']:.0f}s total, slowest stage: {summary['slowest_stage']} "
+                        f"(report: {report})")
+        # Resumed runs skip stages, so only complete fresh runs teach the model
+        if success and not resume:
+            flow = (load_manifest(output_root, video_file.stem) or {}).get('flow', prediction.flow)
+            cost_model.record(media, flow, summary['wall_seconds'], summary['stages'],
+                              predicted_seconds=prediction.total_seconds,
+                              job=output_root.name)
 
-def process_video(video_file: Path, config: dict) -> bool:
-    """Process a single video through the pipeline"""
-    logger.info(f"Processing video: {video_file}")
+def process_video_flow(video_file: Path, config: dict, resume: bool = False, budget: CpuBudget = None) -> bool:
+    """Pick the horizontal or vertical flow for a video and run it"""
     
     # Check if orientation detection is enabled and detect video orientation
     orientation_config = config.get('orientation_detection', {})
     if orientation_config.get('enabled', False):
         logger.info("🔍 Checking video orientation...")
         
-        # Import orientation detection
-        sys.path.append(str(PROJECT_ROOT / "modules"))
-        from video_orientation import is_horizontal_video
-        
         if is_horizontal_video(str(video_file)):
             logger.info("📱 Horizontal video detected - using horizontal processing flow")
-            return process_horizontal_video(video_file, config)
+            return process_horizontal_video(video_file, config, resume)
         else:
             logger.info("📱 Vertical video detected - using standard processing flow")
     
     # Standard vertical video processing flow
-    return process_vertical_video(video_file, config)
+    return process_vertical_video(video_file, config, resume, budget)
 
-def process_horizontal_video(video_file: Path, config: dict) -> bool:
-    """Process horizontal video with specialized flow"""
+def process_horizontal_video(video_file: Path, config: dict, resume: bool = False) -> bool:
+    """Process horizontal video with specialized flow (resume: skip stages the job journal records as done)"""
     logger.info("🎬 Processing horizontal video with specialized flow...")
     
-    # Import horizontal processing
-    sys.path.append(str(PROJECT_ROOT / "src"))
-    from process_horizontal_video import process_horizontal_video as process_horizontal
-    
     output_folder = str(Path(config['output_folder']).expanduser().resolve())
-    result = process_horizontal(str(video_file), output_folder)
+    media_seconds = probe_duration(video_file)
+    stage_timeouts = {key: stage_deadline(config, key, media_seconds)
+                      for key in ('trim_silence', 'create_shorts', 'add_subtitles')}
+    result = process_horizontal(str(video_file), output_folder, stage_timeouts, resume)
     
     if result['status'] == 'success':
         logger.info(f"✅ Horizontal video processing completed successfully!")
         logger.info(f"📊 Generated {len(result['clips'])} clips")
+        finalize_manifest(output_folder, video_file.stem, video_file, 'horizontal',
+                          processed_video=Path(output_folder) / "processed" / f"{video_file.stem}_trimmed.mp4",
+                          renamed_clips=result.get('renamed_clips'))
         return True
     else:
         logger.error(f"❌ Horizontal video processing failed: {result.get('error', 'Unknown error')}")
         return False
 
-def process_vertical_video(video_file: Path, config: dict) -> bool:
+def scheduler_budget(config: dict):
+    """CPU slots for this job's stages and the slots one ffmpeg encode takes
+
+    An encode is counted as encoder_threads cores. "auto" gives this job its
+    share of the cores left by the other jobs the queue runs in parallel.
+    """
+    queue_config = config.get('job_queue', {})
+    encoder_threads = max(1, int(queue_config.get('encoder_threads', 4)))
+    cpu_budget = config.get('scheduler', {}).get('cpu_budget', 'auto')
+    if cpu_budget == 'auto':
+        max_workers = queue_config.get('max_workers', 1)
+        if max_workers == 'auto':
+            max_workers = default_worker_count(encoder_threads)
+        cpu_budget = (os.cpu_count() or 1) // max(1, int(max_workers))
+    return max(encoder_threads, int(cpu_budget)), encoder_threads
+
+def run_stage(step: dict, config: dict, media_seconds, *inputs):
+    """Run one in-process stage under its deadline and return its artifact
+
+    Raises StageError if the stage failed, so the scheduler skips what depends on it.
+    """
+    reporter = get_reporter()
+    step_name = step["name"]
+    log_fields = {'stage': step["config_key"]}
+    logger.info(f"Starting: {step_name}", extra=dict(log_fields, stage_status='started'))
+    reporter.emit(step["stage"], 'started', step_name)
+    timeout = stage_deadline(config, step["config_key"], media_seconds)
+    try:
+        with get_metrics().stage(step["config_key"], step_name), reporter.scope(step["stage"]), \
+                StageDeadline(step_name, timeout,
+                              on_expire=lambda: reporter.emit(step["stage"], 'failed', f"{step_name} exceeded its deadline")):
+            artifact = step["run"](*inputs)
+    except Exception as e:
+        logger.error(f"Failed: {step_name}: {str(e)}", extra=dict(log_fields, stage_status='failed'))
+        reporter.emit(step["stage"], 'failed', step_name, error=str(e))
+        raise StageError(f"{step_name} failed") from e
+    logger.info(f"Completed: {step_name}", extra=dict(log_fields, stage_status='completed'))
+    files = stages.artifact_files(artifact)
+    if files:
+        reporter.artifact(step["stage"], type(artifact).__name__, files, root=config['output_folder'])
+    reporter.emit(step["stage"], 'completed', step_name)
+    return artifact
+
+def process_vertical_video(video_file: Path, config: dict, resume: bool = False, budget: CpuBudget = None) -> bool:
     """Process vertical video with standard flow"""
     logger.info("📱 Processing vertical video with standard flow...")
     
-    # Construct the path to the subtitled video
-    output_root = Path(config['output_folder']).expanduser().resolve()
-    subtitled_video_path = output_root / f"{video_file.stem}_with_subs.mp4"
+    # All stages run in this process and write into the job's output folder
+    ctx = StageContext(config['output_folder'], config)
+    
+    # Every completed stage is journaled; a resumed run reuses what is still on disk
+    journal = JobJournal(ctx.output_root, video_file.stem)
+    if resume:
+        completed = journal.completed(stages.ARTIFACT_TYPES)
+        if completed:
+            logger.info(f"⏯️ Resuming: {', '.join(completed)} already completed")
+    else:
+        journal.reset()
+        completed = {}
+    rerun = set()
+    
+    # Stage deadlines scale with the length of the source
+    media_seconds = probe_duration(video_file)
+    enabled = {key: bool(config['pipeline_steps'].get(key, False))
+               for key in ('add_subtitles', 'trim_silence', 'create_shorts', 'generate_titles', 'upload_shorts')}
+
+    cpu_budget, encode_weight = scheduler_budget(config)
+    if budget is not None:
+        # Batch run: the slots are shared with the other videos being processed
+        cpu_budget = budget
+    scheduler = DagScheduler(cpu_budget)
+    logger.info(f"🧮 Stage scheduler: {scheduler.budget.slots} CPU slots, {encode_weight} per encode")
 
-    # Define the steps with their corresponding config keys
+    # Titles are generated from the selected clips' transcript while the clips
+    # encode; without encoding they are generated for the shorts already on disk
+    def titles(selection):
+        if isinstance(selection, stages.ClipSelection):
+            return stages.titles_for_clips(ctx, selection)
+        return stages.generate_titles(ctx, selection.path)
+
+    # A disabled step passes its first dependency's artifact on, so the next
+    # step works on the video produced by the last enabled step before it
     steps = [
         {
-            "name": "Step 1: Process video and add subtitles",
-            "command": f'python src/add_subtitles.py "{video_file}"',
-            "config_key": "add_subtitles"
+            "name": "Load source video",
+            "key": "source",
+            "run": lambda results: stages.SourceVideo(video_file),
+        },
+        {
+            "name": "Step 1: Transcribe video",
+            "key": "transcribe",
+            "config_key": "transcribe",
+            "stage": "transcribe",
+            "run": lambda results: stages.transcribe(ctx, video_file),
+            # The one transcription of the source; every step below reuses it
+            "enabled": any(enabled[key] for key in ('add_subtitles', 'trim_silence', 'create_shorts', 'generate_titles'))
+        },
+        {
+            "name": "Step 1: Add subtitles",
+            "key": "add_subtitles",
+            "config_key": "add_subtitles",
+            "stage": "transcribe",
+            "deps": ["source", "transcribe"],
+            "cpu": encode_weight,
+            "run": lambda results: stages.burn_subtitles(ctx, video_file, results['transcribe'])
         },
         {
             "name": "Step 1.5: Trim silence from video",
-            "command": f'python src/trim_silence.py "{subtitled_video_path}"',
-            "config_key": "trim_silence"
+            "key": "trim_silence",
+            "config_key": "trim_silence",
+            "stage": "trim",
+            "deps": ["add_subtitles", "transcribe"],
+            "cpu": encode_weight,
+            "run": lambda results: stages.trim_silence(ctx, results['add_subtitles'].path, results['transcribe'])
+        },
+        {
+            "name": "Step 2: Select clips",
+            "key": "select_clips",
+            "config_key": "select_clips",
+            "stage": "select_clips",
+            "deps": ["trim_silence", "transcribe"],
+            "run": lambda results: stages.select_clips(ctx, results['trim_silence'].path, results['transcribe']),
+            "enabled": enabled['create_shorts']
         },
         {
             "name": "Step 2: Create shorts from full video",
-            "command": 'python src/create_shorts.py',
-            "config_key": "create_shorts"
+            "key": "create_shorts",
+            "config_key": "create_shorts",
+            "stage": "encode",
+            "deps": ["select_clips"],
+            # Holds no slots itself; each clip encode takes its own
+            "run": lambda results: stages.encode_clips(
+                ctx, results['select_clips'],
+                map_clips=lambda encode, clips: scheduler.map(encode, clips, cpu=encode_weight))
         },
         {
             "name": "Step 3: Generate titles/tags/descriptions",
-            "command": 'python src/generate_titles.py',
-            "config_key": "generate_titles"
+            "key": "generate_titles",
+            "config_key": "generate_titles",
+            "stage": "titles",
+            "deps": ["select_clips"],
+            "run": lambda results: titles(results['select_clips'])
         },
         {
             "name": "Step 4: Upload shorts and schedule",
-            "command": 'python src/upload_shorts.py',
-            "config_key": "upload_shorts"
+            "key": "upload_shorts",
+            "config_key": "upload_shorts",
+            "stage": "upload",
+            "deps": ["create_shorts", "generate_titles"],
+            "run": lambda results: stages.upload_shorts(ctx)
         }
     ]
 
-    # Run each step if enabled in config
+    upstream = {step["key"]: set(step.get("deps", ())) for step in steps}
+
+    def ancestors(key):
+        found = set()
+        pending = list(upstream[key])
+        while pending:
+            dep = pending.pop()
+            if dep not in found:
+                found.add(dep)
+                pending.extend(upstream[dep])
+        return found
+
+    def run_journaled(step, results):
+        # A journaled artifact is only valid if nothing it was made from has been redone
+        key = step["key"]
+        if key in completed and not (ancestors(key) & rerun):
+            logger.info(f"⏭️ {step['name']}: already completed, reusing its output")
+            get_reporter().emit(step["stage"], 'completed', f"{step['name']} (resumed)")
+            return completed[key]
+        rerun.add(key)
+        artifact = run_stage(step, config, media_seconds, results)
+        journal.record(key, artifact)
+        return artifact
+
     for step in steps:
-        # Check if the step is enabled in config
-        if not config['pipeline_steps'].get(step['config_key'], False):
-            logger.info(f"{step['name']} is disabled in config. Stopping pipeline.")
-            return True  # Return True since this is an intentional stop
-            
-        if not run_command(step["command"], step["name"]):
-            logger.error(f"Pipeline failed at {step['name']} for video {video_file}")
-            return False
+        step_enabled = step.get("enabled", enabled.get(step["key"], True))
+        if not step_enabled:
+            logger.info(f"{step['name']} is disabled in config, skipping it.")
+        func = step["run"] if "stage" not in step else (
+            lambda results, step=step: run_journaled(step, results))
+        scheduler.add(step["key"], func, deps=step.get("deps", ()), cpu=step.get("cpu", 0), enabled=step_enabled)
 
+    results, errors = scheduler.run()
+    if errors:
+        logger.error(f"Pipeline failed at {', '.join(errors)} for video {video_file}")
+        return False
+
+    processed = results.get('trim_silence')
+    subtitled = results.get('add_subtitles')
+    finalize_manifest(ctx.output_root, video_file.stem, video_file, 'vertical',
+                      processed_video=processed.path if isinstance(processed, stages.TrimmedVideo) else None,
+                      subtitled_video=subtitled.path if isinstance(subtitled, stages.SubtitledVideo) else None)
     logger.info(f"Successfully processed video: {video_file}")
     return True
 
+# How often the batch runner logs the progress of a long-running batch
+BATCH_STATUS_INTERVAL = 30
+
+# Worker processes of a running batch, stopped together with the batch
+batch_processes = set()
+
+def batch_parallelism(config: dict, requested=None) -> int:
+    """Number of videos a batch processes at the same time"""
+    jobs = requested or config.get('batch', {}).get('max_parallel_videos', 'auto')
+    if jobs == 'auto':
+        jobs = default_worker_count(config.get('job_queue', {}).get('encoder_threads', 4))
+    return max(1, int(jobs))
+
+def batch_budget(config: dict) -> int:
+    """CPU slots shared by all videos of a batch: the whole machine unless configured"""
+    _, encode_weight = scheduler_budget(config)
+    cpu_budget = config.get('scheduler', {}).get('cpu_budget', 'auto')
+    if cpu_budget == 'auto':
+        cpu_budget = os.cpu_count() or 1
+    return max(encode_weight, int(cpu_budget))
+
+def run_batch_video(video_file: Path, config: dict, resume: bool, budget: CpuBudget, log_file):
+    """Entry point of a batch worker process; exits with 0 if the video was processed"""
+    batch_processes.clear()  # Inherited from the parent when forked; those are siblings, not children
+    signal.signal(signal.SIGTERM, handle_termination)
+    setup_logging(log_file)  # No-op when forked, needed when the worker was spawned
+    try:
+        succeeded = process_video(video_file, config, resume=resume, budget=budget)
+    except Exception as e:
+        logger.error(f"Unexpected error processing video {video_file}: {str(e)}")
+        succeeded = False
+    sys.exit(0 if succeeded else 1)
+
+def batch_entry(video_file: Path, config: dict, exit_code: int, seconds: float) -> dict:
+    """Summary of one video of a batch, from its exit code and result manifest"""
+    manifest = load_manifest(Path(config['output_folder']).expanduser().resolve(), video_file.stem) or {}
+    entry = {
+        'video': str(video_file),
+        'status': 'success' if exit_code == 0 else 'failed',
+        'seconds': round(seconds, 1),
+        'flow': manifest.get('flow'),
+        'clips': len(manifest.get('clips', []))
+    }
+    if exit_code != 0:
+        entry['exit_code'] = exit_code
+    return entry
+
+def run_batch(video_files: list, config: dict, jobs: int, resume: bool = False, log_file='pipeline.log') -> list:
+    """Process videos in parallel worker processes sharing one CPU budget
+
+    Uploads are left to the caller: every video's upload step would upload the
+    whole shared shorts folder, so it runs once after the batch instead.
+    """
+    budget = CpuBudget.shared(batch_budget(config))
+    worker_config = dict(config, pipeline_steps=dict(config['pipeline_steps'], upload_shorts=False))
+    logger.info(f"🧵 Batch mode: {len(video_files)} videos, {jobs} at a time, {budget.slots} shared CPU slots")
+
+    pending = list(video_files)
+    running = {}
+    report = []
+    last_status = time.time()
+    while pending or running:
+        while pending and len(running) < jobs:
+            video_file = pending.pop(0)
+            process = multiprocessing.Process(target=run_batch_video, name=f"batch-{video_file.stem}",
+                                              args=(video_file, worker_config, resume, budget, log_file))
+            process.start()
+            batch_processes.add(process)
+            running[process.sentinel] = (process, video_file, time.time())
+            logger.info(f"▶️ Started {video_file.name} (pid {process.pid})")
+
+        for sentinel in wait_for_processes(list(running), timeout=BATCH_STATUS_INTERVAL):
+            process, video_file, started = running.pop(sentinel)
+            process.join()
+            batch_processes.discard(process)
+            entry = batch_entry(video_file, config, process.exitcode, time.time() - started)
+            report.append(entry)
+            icon = "✅" if entry['status'] == 'success' else "❌"
+            logger.info(f"{icon} {video_file.name} finished in {entry['seconds']:.0f}s with {entry['clips']} shorts "
+                        f"({len(report)}/{len(video_files)} done, {len(running)} running)")
+            get_reporter().emit('pipeline', 'progress', f"{len(report)}/{len(video_files)} videos processed",
+                                fraction=len(report) / len(video_files), current=len(report), total=len(video_files))
+
+        if running and time.time() - last_status >= BATCH_STATUS_INTERVAL:
+            last_status = time.time()
+            names = ', '.join(video_file.name for _, video_file, _ in running.values())
+            logger.info(f"📊 Batch: {len(report)}/{len(video_files)} done, running: {names}")
+    return report
+
+def write_batch_report(config: dict, report: list, started: float) -> Path:
+    """Write the per-video summary of a batch to batch_reports/ in the output folder"""
+    output_folder = Path(config['output_folder']).expanduser().resolve()
+    report_file = output_folder / "batch_reports" / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    summary = {
+        'started_at': datetime.fromtimestamp(started).isoformat(timespec='seconds'),
+        'wall_seconds': round(time.time() - started, 1),
+        'videos': len(report),
+        'successful': sum(1 for entry in report if entry['status'] == 'success'),
+        'failed': sum(1 for entry in report if entry['status'] != 'success'),
+        'clips': sum(entry['clips'] for entry in report),
+        'results': report
+    }
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    logger.info(f"📄 Batch report written to {report_file}")
+    return report_file
+
+def upload_batch(config: dict) -> bool:
+    """Run the upload step once for all shorts produced by a batch"""
+    step = {"name": "Step 4: Upload shorts and schedule", "config_key": "upload_shorts", "stage": "upload",
+            "run": lambda: stages.upload_shorts(StageContext(config['output_folder'], config))}
+    try:
+        run_stage(step, config, None)
+        return True
+    except StageError:
+        return False
+
 def display_final_metadata_summary(config: dict):
     """Display final metadata summary from shorts_titles.json"""
     try:
@@ -371,30 +599,123 @@ def display_final_metadata_summary(config: dict):
     except Exception as e:
         logger.error(f"Error reading final metadata: {str(e)}")
 
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Run the video automation pipeline")
+    parser.add_argument("video", nargs="?", help="Process only this video instead of the whole input folder")
+    parser.add_argument("--workspace", help="Job workspace directory used for all outputs of this run")
+    parser.add_argument("--jobs", type=int,
+                        help="Videos processed in parallel in batch mode (default: batch.max_parallel_videos)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the first stage not recorded as completed in the job journal")
+    return parser.parse_args()
+
+def prepare_workspace_job(workspace: JobWorkspace, video=None):
+    """Point this process at a job workspace; returns the job's config snapshot and input video
+
+    Exits if the config is invalid or the workspace has no input video.
+    """
+    # Stage scripts inherit this and report their progress to the job's events file
+    os.environ[EVENTS_ENV_VAR] = str(workspace.events_file)
+    start_reporter(workspace.events_file)
+    # The job's own frozen copy of the settings; stages and modules of this run read it
+    config = get_pipeline_config(output_folder=str(workspace.root))
+    os.environ[CONFIG_ENV_VAR] = str(write_snapshot(config, workspace.root))
+    video_file = Path(video) if video else workspace.find_input_video()
+    if not video_file or not video_file.exists():
+        logger.error(f"Error: No input video found for workspace '{workspace.root}'!")
+        sys.exit(1)
+    return config, video_file.resolve()
+
+def run_workspace_job(workspace_root, video=None, resume: bool = False) -> bool:
+    """Process the video of one job workspace in this process (used by warm workers)"""
+    workspace = JobWorkspace(workspace_root)
+    workspace.ensure()
+    # This job's log file, for as long as it runs
+    log_handler = logging.FileHandler(workspace.log_file, encoding='utf-8')
+    log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    root = logging.getLogger()
+    root.addHandler(log_handler)
+    try:
+        config, video_file = prepare_workspace_job(workspace, video)
+        reporter = get_reporter()
+        reporter.emit('pipeline', 'started', "Processing 1 video(s)")
+        logger.info(f"🎥  {video_file}")
+        try:
+            succeeded = process_video(video_file, config, resume=resume)
+        except Exception as e:
+            logger.error(f"Unexpected error processing video {video_file}: {str(e)}")
+            succeeded = False
+        reporter.emit('pipeline', 'completed' if succeeded else 'failed',
+                      f"{int(succeeded)} of 1 video(s) processed")
+        return succeeded
+    finally:
+        root.removeHandler(log_handler)
+        log_handler.close()
+
+def handle_termination(signum, frame):
+    """Stop the running stage's whole process group (and any batch workers) before exiting"""
+    logger.error("Pipeline stopped, terminating the running stage")
+    for process in list(batch_processes):
+        process.terminate()
+    kill_active_process_groups()
+    sys.exit(128 + signum)
+
 def main():
-    # Normalize paths in master_config.json first
-    normalize_paths_in_config()
-    
-    # Get configuration
-    config = get_pipeline_config()
+    args = parse_args()
+    signal.signal(signal.SIGTERM, handle_termination)
     
-    # Get input folder from config and find all videos
-    input_folder = Path(config['input_folder']).expanduser().resolve()
-    video_files = get_all_videos(input_folder)
+    if args.workspace:
+        # Isolated job: everything goes into the workspace, the shared config is left untouched
+        workspace = JobWorkspace(args.workspace)
+        workspace.ensure()
+        setup_logging(workspace.log_file)
+        config, video_file = prepare_workspace_job(workspace, args.video)
+        video_files = [video_file]
+    else:
+        setup_logging()
+        
+        # Resolve the configured folders once, in this run's snapshot (the file is left as it is)
+        base_config = get_pipeline_config()
+        config = get_pipeline_config(input_folder=str(Path(base_config['input_folder']).expanduser().resolve()),
+                                     output_folder=str(Path(base_config['output_folder']).expanduser().resolve()))
+        
+        if args.video:
+            video_files = [Path(args.video).expanduser().resolve()]
+        else:
+            # Get input folder from config and find all videos
+            input_folder = Path(config['input_folder']).expanduser().resolve()
+            video_files = get_all_videos(input_folder)
     
     # Track success and failure
     successful_videos = []
     failed_videos = []
+    reporter = get_reporter()
+    reporter.emit('pipeline', 'started', f"Processing {len(video_files)} video(s)")
+    
+    jobs = batch_parallelism(config, args.jobs)
+    if not args.workspace and len(video_files) > 1 and jobs > 1:
+        # Batch mode: several videos at once in worker processes
+        started = time.time()
+        report = run_batch(video_files, config, jobs, resume=args.resume)
+        for entry in report:
+            (successful_videos if entry['status'] == 'success' else failed_videos).append(Path(entry['video']))
+        if successful_videos and config['pipeline_steps'].get('upload_shorts', False):
+            upload_batch(config)
+        write_batch_report(config, report, started)
+        video_files_to_process = []
+    else:
+        video_files_to_process = video_files
     
     # Process each video
-    for video_file in video_files:
+    for video_file in video_files_to_process:
         # Add visual separator for new video
         logger.info("♻️ ♻️ ♻️  Processing new video  ♻️ ♻️ ♻️")
         logger.info(f"🎥  {video_file}")
         logger.info("⏳ ⏳ ⏳  Starting processing  ⏳ ⏳ ⏳")
         
         try:
-            if process_video(video_file, config):
+            if process_video(video_file, config, resume=args.resume):
                 successful_videos.append(video_file)
             else:
                 failed_videos.append(video_file)
@@ -416,6 +737,9 @@ def main():
     # Display final metadata summary
     display_final_metadata_summary(config)
     
+    reporter.emit('pipeline', 'failed' if failed_videos else 'completed',
+                  f"{len(successful_videos)} of {len(video_files)} video(s) processed")
+    
     if failed_videos:
         sys.exit(1)  # Exit with error if any videos failed
     else:
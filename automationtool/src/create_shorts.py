@@ -1,6 +1,4 @@
-import os
 import sys
-import json
 from pathlib import Path
 import logging
 
@@ -9,64 +7,39 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from modules.subtitle_clipper import create_shorts_from_srt
-from modules.transcription import TranscriptionHandler
+from modules.stages import StageContext, create_shorts
 
 logger = logging.getLogger(__name__)
 
 def main():
-    # Load and normalize output folder from config
-    config_path = project_root / "config" / "master_config.json"
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = json.load(f)
-        output_root = Path(config['output_folder']).expanduser().resolve()
-    
-    # Set up paths
-    shorts_output_dir = output_root / "shorts"
-    subtitles_dir = output_root / "subtitles"
-    processed_dir = output_root / "processed"
-    shorts_output_dir.mkdir(parents=True, exist_ok=True)
-    subtitles_dir.mkdir(parents=True, exist_ok=True)
-    processed_dir.mkdir(parents=True, exist_ok=True)
-
-    # Get the most recent trimmed video file from the processed directory
-    video_files = list(processed_dir.glob("*_trimmed.mp4"))
-    if not video_files:
-        raise FileNotFoundError("No trimmed video found in processed directory")
-    
-    # Sort by modification time to get the most recent file
-    video_files.sort(key=lambda x: x.stat().st_mtime)
-    video_path = video_files[-1]  # Now this gets the most recently modified file
-    video_name = video_path.stem.replace("_with_subs_trimmed", "").replace("_trimmed", "")
+    if len(sys.argv) > 3:
+        print("Usage: python src/create_shorts.py [trimmed_video_path] [output_dir]")
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    # A job workspace may be passed in by the pipeline, otherwise output_folder from the config is used
+    ctx = StageContext.create(sys.argv[2] if len(sys.argv) == 3 else None)
+
+    if len(sys.argv) >= 2:
+        video_path = Path(sys.argv[1]).expanduser().resolve()
+        if not video_path.exists():
+            raise FileNotFoundError(f"Trimmed video not found: {video_path}")
+    else:
+        # Get the most recent trimmed video file from the processed directory
+        video_files = list(ctx.processed_dir.glob("*_trimmed.mp4"))
+        if not video_files:
+            raise FileNotFoundError("No trimmed video found in processed directory")
+        
+        # Sort by modification time to get the most recent file
+        video_files.sort(key=lambda x: x.stat().st_mtime)
+        video_path = video_files[-1]  # Now this gets the most recently modified file
     
     logger.info(f"Using video: {video_path}")
-    logger.info(f"Video name: {video_name}")
-
-    # Get subtitle path
-    srt_path = subtitles_dir / f"{video_name}.srt"
-    
-    # If SRT file doesn't exist or scoring data is missing, generate it
-    if not srt_path.exists() or not srt_path.with_suffix('.json').exists():
-        logger.info("Generating transcription and scoring data...")
-        handler = TranscriptionHandler()
-        srt_path = handler.transcribe_video(video_path)
-        logger.info(f"Generated transcription and scoring data: {srt_path}")
-
-    # Create shorts using language-agnostic AI scoring
-    clip_paths = create_shorts_from_srt(
-        video_path=video_path,
-        srt_path=srt_path,
-        keywords=[],  # No keywords - use pure AI scoring
-        output_dir=shorts_output_dir,
-        min_duration=15,
-        max_duration=30,
-        padding=2,
-        output_prefix=f"{video_name}_short_"  # Add unique prefix for each video
-    )
+    clips = create_shorts(ctx, video_path)
 
-    if clip_paths:
-        logger.info(f"Successfully created {len(clip_paths)} shorts")
-        for path in clip_paths:
+    if clips.paths:
+        logger.info(f"Successfully created {len(clips.paths)} shorts")
+        for path in clips.paths:
             logger.info(f"Created short: {path}")
     else:
         logger.warning("No shorts were created")
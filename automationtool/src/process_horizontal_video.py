@@ -12,18 +12,25 @@ from pathlib import Path
 import subprocess
 import shutil
 
-# Add modules to path
+# Add the project root to path
 project_root = Path(__file__).parent.parent
-sys.path.append(str(project_root / "modules"))
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
-from video_orientation import is_horizontal_video
-from face_tracking import crop_to_vertical, combine_videos, get_face_tracking_config
+from modules.video_orientation import is_horizontal_video
+from modules.face_tracking import crop_to_vertical, combine_videos, get_face_tracking_config
+from modules.progress import get_reporter
+from modules import stages
+from modules.stages import StageContext, StageError
+from modules.process_control import DeadlineExceeded, StageDeadline
+from modules.journal import JobJournal
+from modules.metrics import get_metrics
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def process_horizontal_video(input_video_path, output_folder):
+def process_horizontal_video(input_video_path, output_folder, stage_timeouts=None, resume=False):
     """
     Process horizontal video with the new flow:
     1. Create SRT and JSON files from original video
@@ -36,6 +43,10 @@ def process_horizontal_video(input_video_path, output_folder):
     Args:
         input_video_path (str): Path to input horizontal video
         output_folder (str): Path to output folder
+        stage_timeouts (dict): Optional deadlines in seconds per step
+            ('trim_silence', 'create_shorts', 'add_subtitles'); a step that runs
+            longer stops the whole pipeline process
+        resume (bool): Reuse the outputs of stages the job journal records as completed
         
     Returns:
         dict: Processing results with paths to generated clips
@@ -49,71 +60,97 @@ def process_horizontal_video(input_video_path, output_folder):
         logger.warning("⚠️ Video is not horizontal, skipping horizontal processing")
         return {'status': 'skipped', 'reason': 'not_horizontal'}
     
+    reporter = get_reporter()
+    metrics = get_metrics()
+    stage_timeouts = stage_timeouts or {}
     try:
         # Step 1: Create SRT and JSON files from original video (like vertical workflow)
         logger.info("📝 Step 1: Creating transcription and scoring data from original video...")
-        
-        # Import transcription handler
-        sys.path.append(str(project_root / "modules"))
-        from transcription import TranscriptionHandler
-        
-        # Create transcription handler
-        handler = TranscriptionHandler()
+        reporter.emit('transcribe', 'started', "Transcribing video")
+        
+        # All stages run in this process and write into this job's output folder
+        ctx = StageContext(output_folder)
+        
+        # Every completed stage is journaled; a resumed run reuses what is still on disk
+        journal = JobJournal(ctx.output_root, Path(input_video_path).stem)
+        if resume:
+            completed = journal.completed(stages.ARTIFACT_TYPES)
+            if completed:
+                logger.info(f"⏯️ Resuming: {', '.join(completed)} already completed")
+        else:
+            journal.reset()
+            completed = {}
+        rerun = set()
+        
+        def journaled(key, run, deps=()):
+            # A journaled output is only reused if nothing it was made from has been redone
+            if key in completed and not (set(deps) & rerun):
+                logger.info(f"⏭️ {key}: already completed, reusing its output")
+                return completed[key]
+            rerun.add(key)
+            artifact = run()
+            journal.record(key, artifact)
+            return artifact
         
         # Generate SRT and JSON files from original video
-        srt_path = handler.transcribe_video(input_video_path)
+        with metrics.stage('transcribe', "Transcription"):
+            transcript = journaled('transcribe', lambda: stages.transcribe(ctx, input_video_path))
+        srt_path = transcript.srt_path
         logger.info(f"✅ Transcription completed: {srt_path}")
+        reporter.emit('transcribe', 'completed', "Transcription completed")
         
         # Step 2: Trim silence from the horizontal video
         logger.info("🔇 Step 2: Trimming silence from horizontal video...")
-        trimmed_video_path = str(Path(output_folder) / f"{Path(input_video_path).stem}_trimmed.mp4")
-        
-        # Run silence trimming
-        trim_command = f'python src/trim_silence.py "{input_video_path}"'
-        result = subprocess.run(trim_command, shell=True, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            logger.error(f"❌ Silence trimming failed: {result.stderr}")
+        reporter.emit('trim', 'started', "Trimming silence")
+        
+        # Run silence trimming (the trimmed video is written to the processed subfolder)
+        try:
+            with metrics.stage('trim_silence', "Silence trimming"), \
+                    StageDeadline("Silence trimming", stage_timeouts.get('trim_silence')):
+                trimmed_video_path = str(journaled(
+                    'trim_silence', lambda: stages.trim_silence(ctx, input_video_path, transcript),
+                    deps=['transcribe']).path)
+        except (StageError, DeadlineExceeded) as e:
+            logger.error(f"❌ Silence trimming failed: {str(e)}")
+            reporter.emit('trim', 'failed', "Silence trimming failed")
             return {'status': 'error', 'error': 'silence_trimming_failed'}
         
-        # Find the trimmed video (trim_silence.py creates it in processed subfolder)
-        processed_dir = Path(output_folder) / "processed"
-        trimmed_files = list(processed_dir.glob("*_trimmed.mp4"))
-        if not trimmed_files:
-            logger.error("❌ Trimmed video not found after silence trimming")
-            logger.error(f"Looked in: {processed_dir}")
-            return {'status': 'error', 'error': 'trimmed_video_not_found'}
-        
-        # Sort by modification time to get the most recent file
-        trimmed_files.sort(key=lambda x: x.stat().st_mtime)
-        trimmed_video_path = str(trimmed_files[-1])  # Get most recent file
         logger.info(f"✅ Silence trimmed: {trimmed_video_path}")
+        reporter.emit('trim', 'completed', "Silence trimmed")
         
         # Step 3: Find highlights/clips from the trimmed video
         logger.info("🎯 Step 3: Finding highlights/clips...")
-        
-        # Run create_shorts.py to find highlights
-        shorts_command = 'python src/create_shorts.py'
-        result = subprocess.run(shorts_command, shell=True, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            logger.error(f"❌ Highlight detection failed: {result.stderr}")
+        reporter.emit('select_clips', 'started', "Finding highlights")
+        
+        # Select and encode highlights (saved in the shorts subfolder)
+        try:
+            with metrics.stage('create_shorts', "Highlight detection"), \
+                    StageDeadline("Highlight detection", stage_timeouts.get('create_shorts')):
+                clips = journaled('create_shorts', lambda: stages.create_shorts(ctx, trimmed_video_path),
+                                  deps=['trim_silence'])
+        except Exception as e:
+            logger.error(f"❌ Highlight detection failed: {str(e)}")
+            reporter.emit('select_clips', 'failed', "Highlight detection failed")
             return {'status': 'error', 'error': 'highlight_detection_failed'}
         
-        # Find generated short clips (create_shorts.py saves them in shorts subfolder)
-        shorts_dir = Path(output_folder) / "shorts"
-        
-        # Only look for clips from the current video, not all existing clips
         current_video_name = Path(input_video_path).stem
-        short_clips = list(shorts_dir.glob(f"{current_video_name}_short_*.mp4"))
+        short_clips = clips.paths
+        # Clip subtitles are cut from the transcript mapped onto the trimmed video
+        trimmed_transcript = stages.transcript_for(ctx, trimmed_video_path, transcript)
+        if trimmed_transcript.load() is None:
+            # Without word timings every clip would have to be transcribed again; refuse instead
+            logger.error(f"❌ No word-level transcript data in {trimmed_transcript.data_path}, cannot subtitle clips")
+            reporter.emit('select_clips', 'failed', "Transcript data missing")
+            return {'status': 'error', 'error': 'transcript_data_missing'}
         
         if not short_clips:
             logger.error("❌ No short clips found after highlight detection")
-            logger.error(f"Looked in: {shorts_dir}")
+            logger.error(f"Looked in: {ctx.shorts_dir}")
             logger.error(f"Expected pattern: {current_video_name}_short_*.mp4")
             return {'status': 'error', 'error': 'no_clips_found'}
         
         logger.info(f"✅ Found {len(short_clips)} highlight clips for {current_video_name}")
+        reporter.emit('encode', 'completed', f"Encoded {len(short_clips)} clips")
         
         # Step 4: Crop each highlight to vertical format with face tracking
         logger.info("✂️ Step 4: Cropping highlights to vertical format...")
@@ -121,6 +158,8 @@ def process_horizontal_video(input_video_path, output_folder):
         cropped_clips = []
         for i, clip_path in enumerate(short_clips):
             logger.info(f"📋 Processing clip {i+1}/{len(short_clips)}: {clip_path.name}")
+            reporter.emit('crop', 'started' if i == 0 else 'progress', f"Cropping clip {i+1}/{len(short_clips)}",
+                          fraction=i / (2 * len(short_clips)), current=i + 1, total=len(short_clips))
             
             # Create cropped version
             cropped_path = str(Path(output_folder) / f"{clip_path.stem}_cropped.mp4")
@@ -129,11 +168,17 @@ def process_horizontal_video(input_video_path, output_folder):
             config = get_face_tracking_config()
             debug_overlay = config.get('debug_overlay', False)
             
-            crop_to_vertical(str(clip_path), cropped_path, debug_overlay=debug_overlay)
-            
-            # Combine with original audio from the clip
             final_cropped_path = str(Path(output_folder) / f"{clip_path.stem}_final.mp4")
-            combine_videos(str(clip_path), cropped_path, final_cropped_path)
+            
+            def crop(clip_path=clip_path, cropped_path=cropped_path, final_cropped_path=final_cropped_path):
+                crop_to_vertical(str(clip_path), cropped_path, debug_overlay=debug_overlay)
+                
+                # Combine with original audio from the clip
+                combine_videos(str(clip_path), cropped_path, final_cropped_path)
+                return Path(final_cropped_path)
+            
+            with metrics.stage('crop', f"Crop clip {i+1}"):
+                final_cropped_path = str(journaled(f'crop_clip_{i + 1}', crop, deps=['create_shorts']))
             
             # Clean up intermediate file
             if os.path.exists(cropped_path):
@@ -148,24 +193,25 @@ def process_horizontal_video(input_video_path, output_folder):
         subtitled_clips = []
         for i, clip_path in enumerate(cropped_clips):
             logger.info(f"📝 Adding subtitles to clip {i+1}/{len(cropped_clips)}: {Path(clip_path).name}")
+            reporter.emit('crop', 'progress', f"Adding subtitles to clip {i+1}/{len(cropped_clips)}",
+                          fraction=0.5 + i / (2 * len(cropped_clips)), current=i + 1, total=len(cropped_clips))
             
-            # Run subtitle addition
-            subtitle_command = f'python src/add_subtitles.py "{clip_path}"'
-            result = subprocess.run(subtitle_command, shell=True, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                logger.warning(f"⚠️ Subtitle addition failed for clip {i+1}: {result.stderr}")
+            # Run subtitle addition, with the clip's part of the transcript (no new transcription)
+            try:
+                with metrics.stage('add_subtitles', f"Subtitles for clip {i+1}"), \
+                        StageDeadline(f"Subtitles for clip {i+1}", stage_timeouts.get('add_subtitles')):
+                    detail = clips.details[i]
+                    clip_transcript = stages.clip_transcript(ctx, trimmed_transcript, detail['start'], detail['end'],
+                                                             Path(clip_path).stem)
+                    subtitled = journaled(f'subtitle_clip_{i + 1}',
+                                          lambda: stages.burn_subtitles(ctx, clip_path, clip_transcript),
+                                          deps=['create_shorts', f'crop_clip_{i + 1}'])
+                subtitled_clips.append(str(subtitled.path))
+                logger.info(f"✅ Subtitles added to clip {i+1}")
+            except Exception as e:
+                logger.warning(f"⚠️ Subtitle addition failed for clip {i+1}: {str(e)}")
                 # Continue with other clips even if one fails
                 subtitled_clips.append(clip_path)  # Use original if subtitle fails
-            else:
-                # Find the subtitled version
-                subtitled_files = list(Path(output_folder).glob(f"{Path(clip_path).stem}_with_subs.mp4"))
-                if subtitled_files:
-                    subtitled_clips.append(str(subtitled_files[0]))
-                    logger.info(f"✅ Subtitles added to clip {i+1}")
-                else:
-                    subtitled_clips.append(clip_path)  # Use original if subtitle file not found
-                    logger.warning(f"⚠️ Subtitle file not found for clip {i+1}, using original")
         
         # Step 6: Clean up and organize final videos
         logger.info("🧹 Step 6: Cleaning up and organizing final videos...")
@@ -220,12 +266,15 @@ def process_horizontal_video(input_video_path, output_folder):
                 os.remove(file_path)
                 logger.info(f"🗑️ Removed intermediate: {file_path.name}")
         
+        reporter.emit('crop', 'completed', f"Finished {len(final_videos)} clips")
         logger.info("🎉 Horizontal video processing completed!")
         logger.info(f"📊 Generated {len(final_videos)} final clips in shorts folder")
         
         return {
             'status': 'success',
             'clips': final_videos,
+            # Clip recorded by create_shorts.py → cropped, subtitled final clip
+            'renamed_clips': {str(source): final for source, final in zip(short_clips, final_videos)},
             'shorts_folder': str(shorts_dir)
         }
         
@@ -1,6 +1,4 @@
-import os
 import sys
-import json
 from pathlib import Path
 import logging
 
@@ -9,46 +7,30 @@ project_root = Path(__file__).parent.parent.absolute()
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-# Add src directory to Python path
-src_path = project_root / "src"
-if str(src_path) not in sys.path:
-    sys.path.insert(0, str(src_path))
-
-# Add modules directory to Python path
-modules_path = project_root / "modules"
-if str(modules_path) not in sys.path:
-    sys.path.insert(0, str(modules_path))
-
-from modules.silence_trimmer import SilenceTrimmer
+from modules.stages import StageContext, StageError, trim_silence
 
 logger = logging.getLogger(__name__)
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python src/trim_silence.py <video_path>")
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python src/trim_silence.py <video_path> [output_dir]")
         sys.exit(1)
 
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     video_path = Path(sys.argv[1])
-    
     if not video_path.exists():
         logger.error(f"Video file not found: {video_path}")
         sys.exit(1)
 
     logger.info(f"Processing video: {video_path}")
-
-    # Initialize silence trimmer
-    trimmer = SilenceTrimmer()
-    
-    # Process the video
-    output_path = trimmer.process_video(str(video_path))
-    
-    if output_path:
-        logger.info(f"Successfully created trimmed video: {output_path}")
+    try:
+        ctx = StageContext.create(sys.argv[2] if len(sys.argv) == 3 else None)
+        trim_silence(ctx, video_path)
         # Add a special completion message that will be caught by the formatter
         logger.info("Completed: Step 1.5: Trim silence from video")
-    else:
-        logger.error("Failed to create trimmed video")
+    except StageError as e:
+        logger.error(str(e))
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Tests import the app's packages (modules, src) the way the app does, from the project root
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
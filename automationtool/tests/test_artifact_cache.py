@@ -0,0 +1,84 @@
+import os
+import time
+
+import pytest
+
+from modules.artifact_cache import ArtifactCache, create_artifact_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArtifactCache(tmp_path / 'cache', max_size_bytes=25)
+
+
+def make_file(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x' * size)
+    return path
+
+
+def store(cache, tmp_path, name, size=10):
+    key = cache.key('encode', 1, params={'name': name})
+    cache.store(key, 'encode', [make_file(tmp_path / 'out' / f'{name}.mp4', size)])
+    return key
+
+
+def age(cache, key, seconds):
+    """Make an entry look last used ``seconds`` ago"""
+    entry = cache._entry_dir(key)
+    past = time.time() - seconds
+    os.utime(entry, (past, past))
+
+
+def test_key_changes_with_input_content_params_and_version(cache, tmp_path):
+    video = make_file(tmp_path / 'video.mp4', 5)
+    key = cache.key('trim', 1, [video], {'threshold': -30})
+
+    assert cache.key('trim', 1, [video], {'threshold': -30}) == key
+    assert cache.key('trim', 2, [video], {'threshold': -30}) != key
+    assert cache.key('trim', 1, [video], {'threshold': -35}) != key
+    time.sleep(0.01)
+    video.write_bytes(b'y' * 5)
+    assert cache.key('trim', 1, [video], {'threshold': -30}) != key
+
+
+def test_fetch_restores_stored_files(cache, tmp_path):
+    key = store(cache, tmp_path, 'a')
+    restored = tmp_path / 'restored' / 'a.mp4'
+
+    assert cache.fetch(key, [restored])
+    assert restored.read_bytes() == b'x' * 10
+    assert not cache.fetch(cache.key('encode', 1, params={'name': 'other'}), [restored])
+
+
+def test_least_recently_used_entries_are_evicted_first(cache, tmp_path):
+    a = store(cache, tmp_path, 'a')
+    b = store(cache, tmp_path, 'b')
+    age(cache, a, 300)
+    age(cache, b, 200)
+    # Using a makes b the least recently used
+    assert cache.fetch(a, [tmp_path / 'restored' / 'a.mp4'])
+
+    c = store(cache, tmp_path, 'c')
+
+    assert not cache._entry_dir(b).exists()
+    assert cache._entry_dir(a).exists() and cache._entry_dir(c).exists()
+    assert sum(entry['size_bytes'] for entry in cache.entries()) <= cache.max_size_bytes
+
+
+def test_json_entries_share_the_cache(tmp_path):
+    cache = ArtifactCache(tmp_path / 'cache', max_size_bytes=1024)
+    key = cache.key('deepgram', 1, params={'audio': 'abc', 'options': {'model': 'nova-2'}})
+
+    assert cache.fetch_json(key) is None
+    cache.store_json(key, 'deepgram', {'results': {'transcript': 'héllo'}})
+    assert cache.fetch_json(key) == {'results': {'transcript': 'héllo'}}
+    assert len(cache.entries()) == 1
+
+
+def test_disabled_cache_never_hits(tmp_path):
+    cache = create_artifact_cache({'enabled': False, 'path': 'cache'}, base_dir=tmp_path)
+
+    assert cache.key('encode', 1, params={'name': 'a'}) is None
+    assert cache.fetch_json(None) is None
+    assert not cache.fetch(None, [tmp_path / 'a.mp4'])
@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from modules.chunked_upload import ChunkedUpload, UploadError
+from modules.workspace import JobWorkspace
+
+
+class BrokenStream(io.RawIOBase):
+    """Request body whose connection drops after some bytes"""
+
+    def __init__(self, data):
+        self.data = data
+        self.sent = False
+
+    def read(self, size=-1):
+        if self.sent:
+            raise ConnectionError("connection reset")
+        self.sent = True
+        return self.data
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    return JobWorkspace.create(tmp_path, 'job-1')
+
+
+def test_chunks_advance_the_offset_and_publish_the_file(workspace):
+    upload = ChunkedUpload.create(workspace, 'video.mp4', 10)
+
+    assert upload.write_chunk(io.BytesIO(b'01234'), 0) == 5
+    assert ChunkedUpload.load(workspace).offset == 5
+    assert not upload.is_complete
+
+    assert upload.write_chunk(io.BytesIO(b'56789'), 5) == 10
+    assert upload.is_complete
+    assert upload.final_path.read_bytes() == b'0123456789'
+    assert not upload.part_path.exists()
+
+
+def test_chunk_at_the_wrong_offset_is_refused(workspace):
+    upload = ChunkedUpload.create(workspace, 'video.mp4', 10)
+    upload.write_chunk(io.BytesIO(b'01234'), 0)
+
+    with pytest.raises(UploadError) as error:
+        upload.write_chunk(io.BytesIO(b'xxxxx'), 3)
+
+    assert error.value.status == 409
+    assert upload.offset == 5
+
+
+def test_chunk_past_the_declared_length_is_truncated_back(workspace):
+    upload = ChunkedUpload.create(workspace, 'video.mp4', 8)
+    upload.write_chunk(io.BytesIO(b'0123'), 0)
+
+    with pytest.raises(UploadError) as error:
+        upload.write_chunk(io.BytesIO(b'456789'), 4)
+
+    assert error.value.status == 413
+    assert upload.offset == 4
+    assert upload.part_path.read_bytes() == b'0123'
+
+
+def test_bytes_received_before_a_dropped_connection_are_kept(workspace):
+    upload = ChunkedUpload.create(workspace, 'video.mp4', 10)
+
+    with pytest.raises(ConnectionError):
+        upload.write_chunk(BrokenStream(b'0123'), 0)
+
+    assert upload.offset == 4
+    assert upload.write_chunk(io.BytesIO(b'456789'), 4) == 10
+
+
+def test_empty_upload_is_complete_at_once(workspace):
+    upload = ChunkedUpload.create(workspace, 'empty.mp4', 0)
+
+    assert upload.is_complete
+    with pytest.raises(UploadError) as error:
+        upload.write_chunk(io.BytesIO(b'x'), 0)
+    assert error.value.status == 409
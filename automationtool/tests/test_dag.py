@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from modules.dag import DagScheduler
+
+
+def test_disabled_node_passes_its_first_dependency_through():
+    dag = DagScheduler(cpu_budget=2)
+    dag.add('transcribe', lambda results: 'transcript')
+    dag.add('trim', lambda results: 'trimmed video', deps=['transcribe'], enabled=False)
+    dag.add('shorts', lambda results: f"shorts from {results['trim']}", deps=['trim'])
+
+    results, errors = dag.run()
+
+    assert errors == {}
+    assert results['trim'] == 'transcript'
+    assert results['shorts'] == 'shorts from transcript'
+
+
+def test_failed_node_blocks_only_its_dependents():
+    def fail(results):
+        raise RuntimeError("encode failed")
+
+    dag = DagScheduler(cpu_budget=2)
+    dag.add('transcribe', lambda results: 'transcript')
+    dag.add('shorts', fail, deps=['transcribe'])
+    dag.add('upload', lambda results: 'uploaded', deps=['shorts'])
+    dag.add('titles', lambda results: 'titles', deps=['transcribe'])
+
+    results, errors = dag.run()
+
+    assert set(errors) == {'shorts'}
+    assert 'upload' not in results
+    assert results['titles'] == 'titles'
+
+
+def test_independent_nodes_overlap():
+    both_running = threading.Barrier(2, timeout=5)
+
+    def meet(results):
+        both_running.wait()
+        return True
+
+    dag = DagScheduler(cpu_budget=2)
+    dag.add('titles', meet)
+    dag.add('shorts', meet)
+
+    results, errors = dag.run()
+
+    assert errors == {}
+    assert results == {'titles': True, 'shorts': True}
+
+
+def test_cycle_is_rejected():
+    dag = DagScheduler()
+    dag.add('a', lambda results: None, deps=['b'])
+    dag.add('b', lambda results: None, deps=['a'])
+
+    with pytest.raises(ValueError, match='cycle'):
+        dag.order()
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+import modules.job_queue as job_queue
+from modules.job_queue import JobQueue
+from modules.queue_state import FileQueueState, MemoryQueueState, queue_entry
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(job_queue, 'POLL_INTERVAL', 0.02)
+    monkeypatch.setattr(job_queue, 'LEASE_INTERVAL', 0.05)
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class Recorder:
+    """Job handler that records what it ran and can hold a job until released"""
+
+    def __init__(self, block=()):
+        self.ran = []
+        self.block = set(block)
+        self.release = threading.Event()
+
+    def __call__(self, job_id, payload):
+        self.ran.append((job_id, payload))
+        if job_id in self.block:
+            self.release.wait(5)
+
+
+def test_jobs_run_in_fifo_order_with_positions():
+    handler = Recorder(block={'first'})
+    queue = JobQueue(handler, max_workers=1, state=MemoryQueueState())
+    queue.start()
+    try:
+        assert queue.submit('first', {}) == 1
+        assert wait_for(lambda: queue.position('first') == 0)
+        assert queue.submit('second', {}) == 1
+        assert queue.submit('third', {}) == 2
+        assert queue.cancel('third')
+        assert not queue.cancel('third')
+
+        handler.release.set()
+        assert wait_for(lambda: len(handler.ran) == 2)
+        assert [job_id for job_id, _ in handler.ran] == ['first', 'second']
+    finally:
+        handler.release.set()
+        queue.shutdown(timeout=5)
+
+
+def test_any_process_can_queue_for_the_owner(tmp_path):
+    state_file = tmp_path / 'job_queue.json'
+    owner_handler, other_handler = Recorder(), Recorder()
+    owner = JobQueue(owner_handler, state=FileQueueState(state_file))
+    other = JobQueue(other_handler, state=FileQueueState(state_file))
+    owner.start()
+    other.start()
+    try:
+        assert owner.is_owner and not other.is_owner
+
+        assert other.submit('job', {'filename': 'a.mp4'}) == 1
+        assert wait_for(lambda: owner_handler.ran == [('job', {'filename': 'a.mp4'})])
+        assert other_handler.ran == []
+    finally:
+        owner.shutdown(timeout=5)
+        other.shutdown(timeout=5)
+
+
+def test_next_owner_resumes_interrupted_jobs(tmp_path):
+    state_file = tmp_path / 'job_queue.json'
+    # A previous owner died while running 'interrupted'
+    crashed = FileQueueState(state_file)
+    crashed.push(queue_entry('interrupted', {'filename': 'a.mp4'}))
+    crashed.push(queue_entry('waiting', {'filename': 'b.mp4'}))
+    crashed.pop()
+
+    restored = []
+    handler = Recorder()
+    queue = JobQueue(handler, state=FileQueueState(state_file),
+                     on_restore=lambda job_id, payload: restored.append(job_id))
+    queue.start()
+    try:
+        assert wait_for(lambda: len(handler.ran) == 2)
+        assert handler.ran[0] == ('interrupted', {'filename': 'a.mp4', 'resume': True})
+        assert handler.ran[1] == ('waiting', {'filename': 'b.mp4'})
+        assert restored == ['interrupted', 'waiting']
+    finally:
+        queue.shutdown(timeout=5)
+
+
+def test_shutdown_hands_the_queue_over(tmp_path):
+    state_file = tmp_path / 'job_queue.json'
+    first_handler, second_handler = Recorder(), Recorder()
+    first = JobQueue(first_handler, state=FileQueueState(state_file))
+    second = JobQueue(second_handler, state=FileQueueState(state_file))
+    first.start()
+    second.start()
+    try:
+        first.shutdown(timeout=5)
+        with pytest.raises(RuntimeError):
+            first.submit('late', {})
+
+        second.submit('job', {})
+        assert wait_for(lambda: second.is_owner and second_handler.ran == [('job', {})])
+    finally:
+        second.shutdown(timeout=5)
@@ -0,0 +1,41 @@
+import os
+import time
+
+import pytest
+
+from modules.metrics import run_measured
+from modules.process_control import DeadlineExceeded, StageDeadline, stage_deadline
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason="uses the sleep command")
+
+
+def test_overrunning_stage_fails_and_its_children_are_killed():
+    started = time.time()
+    expired = []
+
+    with pytest.raises(DeadlineExceeded, match='Encode'):
+        with StageDeadline("Encode", 0.5, on_expire=lambda: expired.append(True)):
+            result = run_measured(['sleep', '30'], 'sleep')
+            # The child was killed; the stage notices once it runs Python code again
+            assert result.returncode != 0
+            while True:
+                time.sleep(0.05)
+
+    # This process is still running, and did not wait for the child to finish
+    assert expired == [True]
+    assert time.time() - started < 10
+
+
+def test_stage_within_its_deadline_is_left_alone():
+    with StageDeadline("Titles", 0.2) as deadline:
+        pass
+    time.sleep(0.4)
+
+    assert not deadline.expired
+
+
+def test_deadline_scales_with_media_duration():
+    config = {'stage_deadlines': {'create_shorts': {'base': 100, 'per_media_second': 2}}}
+
+    assert stage_deadline(config, 'create_shorts', 60) == 220
+    assert stage_deadline(config, 'create_shorts', None) == 100 + 2 * 600
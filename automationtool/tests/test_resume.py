@@ -0,0 +1,105 @@
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import app as server
+from modules.job_queue import JobQueue
+from modules.journal import JobJournal
+from modules.queue_state import MemoryQueueState
+from modules.task_store import MemoryTaskStore
+
+
+@dataclass(frozen=True)
+class Encoded:
+    path: Path
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client with in-memory task state and a queue whose jobs stay queued"""
+    monkeypatch.setattr(server, 'get_config_paths', lambda: (str(tmp_path / 'input'), str(tmp_path / 'output')))
+    monkeypatch.setattr(server, 'task_store', MemoryTaskStore())
+    monkeypatch.setattr(server, 'job_queue', JobQueue(lambda job_id, payload: None, state=MemoryQueueState()))
+    monkeypatch.setattr(server, 'probe_media', lambda path: {'duration': 10})
+    monkeypatch.setattr(server, 'predict_job', lambda media: None)
+    monkeypatch.setattr(server, 'admit_job', lambda media, prediction=None: SimpleNamespace(
+        admitted=True, estimated_seconds=10, eta_seconds=10))
+    monkeypatch.setattr(server, 'log_backend_event', lambda *args: None)
+    return server.app.test_client()
+
+
+def uploaded_task(task_id, status):
+    workspace = server.get_job_workspace(task_id)
+    (workspace.input_dir / 'video.mp4').write_bytes(b'video')
+    server.get_task_store().set(task_id, {'status': status, 'filename': 'video.mp4'})
+    return workspace
+
+
+def test_resume_requeues_a_failed_task(client):
+    uploaded_task('job', 'FAILURE')
+
+    response = client.post('/api/task/job/resume', json={})
+
+    assert response.status_code == 202
+    task = server.get_task_store().get('job')
+    assert task['status'] == 'QUEUED' and task['cancel_requested'] is False
+    [queued] = server.job_queue.snapshot()['pending']
+    assert queued['job_id'] == 'job' and queued['payload']['resume'] is True
+
+
+@pytest.mark.parametrize('status', ['QUEUED', 'PROCESSING', 'SUCCESS'])
+def test_resume_refuses_a_running_or_finished_task(client, status):
+    uploaded_task('job', status)
+
+    assert client.post('/api/task/job/resume', json={}).status_code == 409
+    assert server.job_queue.snapshot()['pending'] == []
+
+
+def test_concurrent_resumes_queue_the_task_once(client):
+    uploaded_task('job', 'CANCELLED')
+    start = threading.Barrier(4)
+    codes = []
+
+    def resume():
+        start.wait()
+        codes.append(server.app.test_client().post('/api/task/job/resume', json={}).status_code)
+
+    threads = [threading.Thread(target=resume) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(codes) == [202, 409, 409, 409]
+    assert len(server.job_queue.snapshot()['pending']) == 1
+
+
+def test_a_cancelled_job_does_not_start(client, monkeypatch):
+    uploaded_task('job', 'QUEUED')
+    server.get_task_store().update('job', cancel_requested=True)
+    started = []
+    monkeypatch.setattr(server, 'process_video_direct', lambda *args: started.append(args))
+
+    server.process_video_background('job', 'video.mp4')
+
+    assert started == []
+    assert server.get_task_store().get('job')['status'] == 'QUEUED'
+
+
+def test_journal_keeps_stages_whose_output_still_exists(tmp_path):
+    journal = JobJournal(tmp_path, 'video')
+    kept, lost = tmp_path / 'kept.mp4', tmp_path / 'lost.mp4'
+    kept.write_bytes(b'clip')
+    lost.write_bytes(b'clip')
+    journal.record('encode_1', Encoded(kept))
+    journal.record('encode_2', Encoded(lost))
+    lost.unlink()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"stage": "encode_3", "artif')  # Crash mid-write
+
+    completed = JobJournal(tmp_path, 'video').completed({'Encoded': Encoded})
+
+    assert completed == {'encode_1': Encoded(kept.resolve())}
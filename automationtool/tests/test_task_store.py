@@ -0,0 +1,60 @@
+import threading
+import time
+
+from modules.task_store import MemoryTaskStore, create_task_store
+
+
+def test_create_refuses_an_existing_task():
+    store = MemoryTaskStore()
+
+    assert store.create('job', {'status': 'QUEUED'})
+    assert not store.create('job', {'status': 'QUEUED', 'filename': 'other.mp4'})
+    assert store.get('job') == {'status': 'QUEUED'}
+
+
+def test_update_merges_fields_only_when_the_condition_holds():
+    store = MemoryTaskStore()
+    store.create('job', {'status': 'QUEUED', 'cancel_requested': True, 'filename': 'a.mp4'})
+    not_cancelled = lambda current: not current.get('cancel_requested')
+
+    assert store.update('job', condition=not_cancelled, status='PROCESSING') is None
+    assert store.get('job')['status'] == 'QUEUED'
+
+    store.update('job', cancel_requested=False)
+    assert store.update('job', condition=not_cancelled, status='PROCESSING') == {
+        'status': 'PROCESSING', 'cancel_requested': False, 'filename': 'a.mp4'}
+    assert store.update('missing', status='PROCESSING') is None
+
+
+def test_only_one_concurrent_claim_wins():
+    store = MemoryTaskStore()
+    store.create('job', {'status': 'FAILURE'})
+    start = threading.Barrier(8)
+    claims = []
+
+    def claim():
+        start.wait()
+        claims.append(store.update('job', condition=lambda current: current['status'] == 'FAILURE',
+                                   status='QUEUED') is not None)
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert claims.count(True) == 1
+
+
+def test_finished_tasks_expire_after_their_ttl():
+    store = MemoryTaskStore(finished_ttl=0, active_ttl=60)
+    store.set('done', {'status': 'SUCCESS'})
+    store.set('running', {'status': 'PROCESSING'})
+    time.sleep(0.01)
+
+    assert store.get('done') is None
+    assert store.get('running') == {'status': 'PROCESSING'}
+
+
+def test_memory_backend_without_redis():
+    assert isinstance(create_task_store({'backend': 'memory'}), MemoryTaskStore)
@@ -0,0 +1,59 @@
+from modules.timeline import Timeline, clip_segments, write_srt
+
+
+def word(text, start, end):
+    return {'word': text, 'punctuated_word': text, 'start': start, 'end': end}
+
+
+def test_from_silences_keeps_the_speech_between_them():
+    timeline = Timeline.from_silences([{'start': 2.0, 'end': 5.0}, {'start': 8.0, 'end': 9.0}], duration=12.0)
+
+    assert timeline.spans == [(0.0, 2.0), (5.0, 8.0), (9.0, 12.0)]
+    assert timeline.duration == 8.0
+
+
+def test_source_and_trimmed_times_map_both_ways():
+    timeline = Timeline([(0.0, 2.0), (5.0, 8.0)])
+
+    assert timeline.to_trimmed(1.0) == 1.0
+    assert timeline.to_trimmed(6.0) == 3.0
+    # Inside a cut, a time snaps to where the cut is in the trimmed video
+    assert timeline.to_trimmed(3.5) == 2.0
+    assert timeline.to_source(3.0) == 6.0
+
+
+def test_words_cut_out_are_dropped_and_segment_text_follows():
+    timeline = Timeline([(0.0, 2.0), (5.0, 8.0)])
+    segment = {'start': 0.5, 'end': 6.0, 'text': 'keep drop also',
+               'words': [word('keep', 0.5, 1.5), word('drop', 2.5, 4.5), word('also', 5.0, 6.0)]}
+
+    [mapped] = timeline.map_segments([segment])
+
+    assert [w['word'] for w in mapped['words']] == ['keep', 'also']
+    assert mapped['text'] == 'keep also'
+    assert (mapped['start'], mapped['end']) == (0.5, 3.0)
+
+
+def test_clip_segments_moves_words_onto_the_clip_timeline():
+    segments = [{'start': 9.0, 'end': 13.0, 'text': 'before inside',
+                 'words': [word('before', 9.0, 10.0), word('inside', 11.0, 13.0)]}]
+
+    [clipped] = clip_segments(segments, start=10.5, end=12.0)
+
+    assert clipped['text'] == 'inside'
+    assert clipped['words'][0]['start'] == 0.5
+    # Cut at the clip's end
+    assert clipped['end'] == 1.5
+
+
+def test_timeline_round_trips_through_its_file(tmp_path):
+    path = Timeline([(0.0, 2.0), (5.0, 8.0)]).save(tmp_path / 'video.timeline.json')
+
+    assert Timeline.load(path).spans == [(0.0, 2.0), (5.0, 8.0)]
+    assert Timeline.load(tmp_path / 'missing.json') is None
+
+
+def test_write_srt(tmp_path):
+    path = write_srt([{'start': 0.0, 'end': 61.25, 'text': ' Hello '}], tmp_path / 'clip.srt')
+
+    assert path.read_text(encoding='utf-8') == "1\n00:00:00,000 --> 00:01:01,250\nHello\n\n"
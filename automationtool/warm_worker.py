@@ -0,0 +1,35 @@
+"""
+Warm pipeline worker started by the web app's worker pool.
+
+Imports the media and ML libraries once, then runs one job after another in
+this process (see modules/warm_pool.py for the protocol).
+"""
+
+import os
+import signal
+import logging
+
+from modules.process_control import kill_active_process_groups
+from modules.warm_pool import serve
+from run_pipeline import run_workspace_job, setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def run_job(job):
+    """Run one job of the pool in its workspace"""
+    return run_workspace_job(job['workspace'], job.get('video'), resume=job.get('resume', False))
+
+
+def handle_termination(signum, frame):
+    """Stop the running stage's process group, then exit without unwinding the job"""
+    logger.error("Warm worker stopped, terminating the running stage")
+    kill_active_process_groups()
+    os._exit(128 + signum)
+
+
+if __name__ == "__main__":
+    # Console only: each job adds its own log file while it runs
+    setup_logging(None)
+    signal.signal(signal.SIGTERM, handle_termination)
+    serve(run_job)
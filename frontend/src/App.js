@@ -17,7 +17,8 @@ function App() {
   const [downloadingFiles, setDownloadingFiles] = useState(new Set());
   const [uploadedVideo, setUploadedVideo] = useState(null);
   const [showPhoneInput, setShowPhoneInput] = useState(false);
-  const [dummyProgress, setDummyProgress] = useState(0);
+  const [processingProgress, setProcessingProgress] = useState(0);
+  const [processingMessage, setProcessingMessage] = useState('');
   const fileInputRef = useRef(null);
 
   // Phone number validation function
@@ -43,25 +44,6 @@ function App() {
     return { isValid: true, message: '' };
   };
 
-  // Dummy progress bar that runs for 6 minutes and stops at 99%
-  const startDummyProgress = () => {
-    setDummyProgress(0);
-    const startTime = Date.now();
-    const duration = 6 * 60 * 1000; // 6 minutes in milliseconds
-    
-    const updateProgress = () => {
-      const elapsed = Date.now() - startTime;
-      const progress = Math.min((elapsed / duration) * 99, 99); // Cap at 99%
-      setDummyProgress(progress);
-      
-      if (progress < 99) {
-        setTimeout(updateProgress, 100); // Update every 100ms
-      }
-    };
-    
-    updateProgress();
-  };
-
   const handleJoinBeta = async (e) => {
     e.preventDefault();
     
@@ -133,7 +115,7 @@ function App() {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ phone_number: phoneNumber }),
+        body: JSON.stringify({ phone_number: phoneNumber, task_id: uploadedVideo.task_id }),
       });
       
       if (response.ok) {
@@ -146,15 +128,19 @@ function App() {
         setProcessingStatus('PROCESSING');
         setShowPhoneInput(false);
          setPhoneNumber('');
-         // Start dummy progress bar
-         startDummyProgress();
-         // Start polling for processing status
+         setProcessingProgress(0);
+         // Follow processing progress pushed by the server
          startStatusPolling(result.task_id);
       } else {
         const errorData = await response.json();
+        let message = errorData.message || errorData.error || 'Failed to start processing. Please try again.';
+        if (response.status === 429 && errorData.retry_after) {
+          // Server is at capacity: tell the user when a retry is likely to be accepted
+          message = `We're processing a lot of videos right now. Please try again in about ${Math.ceil(errorData.retry_after / 60)} minute(s).`;
+        }
         setUploadStatus({
           type: 'error',
-          message: errorData.message || 'Failed to start processing. Please try again.'
+          message: message
         });
       }
     } catch (error) {
@@ -170,7 +156,7 @@ function App() {
     if (file) {
       // Clear any previous status
       setUploadStatus(null);
-      setDummyProgress(0); // Reset progress bar
+      setProcessingProgress(0); // Reset progress bar
       setProcessingStatus(null); // Reset processing status
       
       // Validate file type - check both MIME type and file extension
@@ -188,16 +174,6 @@ function App() {
         return;
       }
       
-      // Validate file size (max 100MB)
-      const maxSize = 100 * 1024 * 1024; // 100MB
-      if (file.size > maxSize) {
-        setUploadStatus({
-          type: 'error',
-          message: 'File size must be less than 100MB'
-        });
-        return;
-      }
-      
       setSelectedFile(file);
       setUploadStatus(null);
     } else {
@@ -206,6 +182,35 @@ function App() {
     }
   };
 
+  // Resumable uploads are remembered per file so an interrupted upload continues where it stopped
+  const uploadStorageKey = (file) => `makereels-upload:${file.name}:${file.size}:${file.lastModified}`;
+
+  const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+  const getUploadOffset = async (uploadUrl) => {
+    const response = await fetch(uploadUrl, { method: 'HEAD', headers: { 'Tus-Resumable': '1.0.0' } });
+    if (!response.ok) {
+      return null;
+    }
+    return parseInt(response.headers.get('Upload-Offset'), 10);
+  };
+
+  const createUpload = async (file) => {
+    const response = await fetch('/api/uploads', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Tus-Resumable': '1.0.0',
+      },
+      body: JSON.stringify({ filename: file.name, size: file.size }),
+    });
+    const data = await response.json();
+    if (!response.ok) {
+      throw new Error(data.error || 'Upload failed');
+    }
+    return data;
+  };
+
   const handleVideoUpload = async () => {
     if (!selectedFile) {
       setUploadStatus({
@@ -219,68 +224,84 @@ function App() {
     setUploadProgress(0);
     setUploadStatus(null);
     
-    const formData = new FormData();
-    formData.append('video', selectedFile);
+    const file = selectedFile;
+    const storageKey = uploadStorageKey(file);
+    const maxRetries = 5;
     
     try {
-      const xhr = new XMLHttpRequest();
-      
-      // Track upload progress
-      xhr.upload.addEventListener('progress', (e) => {
-        if (e.lengthComputable) {
-          const progress = Math.round((e.loaded / e.total) * 100);
-          setUploadProgress(progress);
-        }
-      });
+      // Resume a previous upload of the same file if the server still has it
+      let upload = JSON.parse(localStorage.getItem(storageKey) || 'null');
+      let offset = upload ? await getUploadOffset(upload.upload_url) : null;
+      if (offset === null || Number.isNaN(offset)) {
+        upload = await createUpload(file);
+        localStorage.setItem(storageKey, JSON.stringify(upload));
+        offset = upload.offset;
+      }
       
-      // Handle response
-      xhr.addEventListener('load', () => {
-        if (xhr.status === 200) {
-          const response = JSON.parse(xhr.responseText);
-          setUploadStatus({
-            type: 'success',
-            message: 'Video uploaded successfully!'
+      let retries = 0;
+      while (offset < file.size) {
+        const chunk = file.slice(offset, offset + upload.chunk_size);
+        try {
+          const response = await fetch(upload.upload_url, {
+            method: 'PATCH',
+            headers: {
+              'Content-Type': 'application/offset+octet-stream',
+              'Upload-Offset': String(offset),
+              'Tus-Resumable': '1.0.0',
+            },
+            body: chunk,
           });
-          setUploadedVideo({
-            task_id: response.task_id,
-            filename: response.filename,
-            file: selectedFile
-          });
-          setShowPhoneInput(true);
-          setSelectedFile(null);
-          setUploadProgress(0);
-          if (fileInputRef.current) {
-            fileInputRef.current.value = '';
+          if (response.status === 204) {
+            offset = parseInt(response.headers.get('Upload-Offset'), 10);
+            retries = 0;
+            setUploadProgress(Math.round((offset / file.size) * 100));
+            continue;
+          }
+          if (response.status !== 409 && response.status < 500) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.error || 'Upload failed');
+          }
+        } catch (error) {
+          if (!(error instanceof TypeError)) {
+            throw error;
           }
-        } else {
-          setUploadStatus({
-            type: 'error',
-            message: 'Upload failed. Please try again.'
-          });
         }
-        setIsUploading(false);
-      });
+        
+        // Network error, offset conflict or server error: resync the offset and retry
+        retries += 1;
+        if (retries > maxRetries) {
+          throw new Error('Upload interrupted. Please check your connection and try again - it will resume where it stopped.');
+        }
+        await sleep(1000 * 2 ** (retries - 1));
+        const serverOffset = await getUploadOffset(upload.upload_url).catch(() => null);
+        if (serverOffset !== null && !Number.isNaN(serverOffset)) {
+          offset = serverOffset;
+        }
+      }
       
-      // Handle errors
-      xhr.addEventListener('error', () => {
-        setUploadStatus({
-          type: 'error',
-          message: 'Upload failed. Please check your connection and try again.'
-        });
-        setIsUploading(false);
+      localStorage.removeItem(storageKey);
+      setUploadStatus({
+        type: 'success',
+        message: 'Video uploaded successfully!'
       });
-      
-      // Send request
-      xhr.open('POST', '/upload', true);
-      xhr.send(formData);
-      
+      setUploadedVideo({
+        task_id: upload.task_id,
+        filename: upload.filename,
+        file: file
+      });
+      setShowPhoneInput(true);
+      setSelectedFile(null);
+      setUploadProgress(0);
+      if (fileInputRef.current) {
+        fileInputRef.current.value = '';
+      }
     } catch (error) {
       setUploadStatus({
         type: 'error',
-        message: 'Upload failed. Please try again.'
+        message: error.message || 'Upload failed. Please try again.'
       });
-      setIsUploading(false);
     }
+    setIsUploading(false);
   };
 
   const removeSelectedFile = () => {
@@ -291,48 +312,97 @@ function App() {
     }
   };
 
+  // Apply a task status update (from the event stream or a poll); returns true once the task is finished
+  const handleTaskUpdate = (data) => {
+    if (data.status === 'QUEUED') {
+      setProcessingStatus('PROCESSING');
+      setProcessingMessage(data.message || 'Waiting for a free worker...');
+    } else if (data.status === 'PROCESSING') {
+      setProcessingStatus('PROCESSING');
+      if (data.message) {
+        setProcessingMessage(data.message);
+      }
+      if (typeof data.progress === 'number') {
+        setProcessingProgress((previous) => Math.max(previous, data.progress));
+      }
+    } else if (data.status === 'SUCCESS' && data.result?.status === 'SUCCESS') {
+      // Transform the short clips to match expected format
+      const shortClips = data.result?.short_clips || [];
+      const transformedClips = shortClips.map(clip => ({
+        filename: clip.filename,
+        size: clip.size * 1024 * 1024, // Convert MB to bytes
+        download_url: clip.url // Use the URL directly from backend
+      }));
+      
+      // If no short clips but processed video exists, include it
+      if (transformedClips.length === 0 && data.result?.processed_video) {
+        const processedVideo = data.result.processed_video;
+        transformedClips.push({
+          filename: processedVideo.filename,
+          size: processedVideo.size * 1024 * 1024, // Convert MB to bytes
+          download_url: processedVideo.url,
+          isProcessedVideo: true // Flag to identify processed video
+        });
+      }
+      
+      setResultFiles(transformedClips);
+      setProcessingStatus('completed');
+      setProcessingProgress(100); // Complete the progress bar
+      setUploadStatus(null); // Clear the "Processing started" message
+      return true;
+    } else if (data.status === 'CANCELLED') {
+      setUploadStatus({
+        type: 'error',
+        message: 'Processing was cancelled.'
+      });
+      setProcessingStatus('failed');
+      return true;
+    } else if (data.status === 'FAILURE' || data.status === 'SUCCESS') {
+      setUploadStatus({
+        type: 'error',
+        message: `Processing failed: ${data.error || data.message || 'Unknown error'}`
+      });
+      setProcessingStatus('failed');
+      return true;
+    }
+    return false;
+  };
+
+  const handleCancelProcessing = async () => {
+    if (!currentTask) {
+      return;
+    }
+    try {
+      await fetch(`/api/task/${currentTask}`, { method: 'DELETE' });
+      setProcessingMessage('Cancelling...');
+    } catch (error) {
+      console.error('Cancel error:', error);
+    }
+  };
+
   const startStatusPolling = (taskId) => {
+    // Prefer the server-sent event stream; it reconnects on its own and resumes from the last event
+    if (window.EventSource) {
+      const events = new EventSource(`/api/task/${taskId}/events`);
+      events.addEventListener('status', (e) => handleTaskUpdate(JSON.parse(e.data)));
+      events.addEventListener('stage', (e) => {
+        const event = JSON.parse(e.data);
+        handleTaskUpdate({ status: 'PROCESSING', progress: event.progress, message: event.message });
+      });
+      events.addEventListener('done', (e) => {
+        events.close();
+        handleTaskUpdate(JSON.parse(e.data));
+      });
+      return;
+    }
+    
     const pollInterval = setInterval(async () => {
       try {
         const response = await fetch(`/task/${taskId}`);
         const data = await response.json();
         
-        if (response.ok) {
-          if (data.status === 'PROCESSING') {
-            setProcessingStatus('PROCESSING');
-          } else if (data.status === 'SUCCESS' && data.result?.status === 'SUCCESS') {
-            // Transform the short clips to match expected format
-            const shortClips = data.result?.short_clips || [];
-            const transformedClips = shortClips.map(clip => ({
-              filename: clip.filename,
-              size: clip.size * 1024 * 1024, // Convert MB to bytes
-              download_url: clip.url // Use the URL directly from backend
-            }));
-            
-            // If no short clips but processed video exists, include it
-            if (transformedClips.length === 0 && data.result?.processed_video) {
-              const processedVideo = data.result.processed_video;
-              transformedClips.push({
-                filename: processedVideo.filename,
-                size: processedVideo.size * 1024 * 1024, // Convert MB to bytes
-                download_url: processedVideo.url,
-                isProcessedVideo: true // Flag to identify processed video
-              });
-            }
-            
-            setResultFiles(transformedClips);
-            setProcessingStatus('completed');
-            setDummyProgress(100); // Complete the progress bar
-            setUploadStatus(null); // Clear the "Processing started" message
-            clearInterval(pollInterval);
-          } else if (data.status === 'FAILURE') {
-            setUploadStatus({
-              type: 'error',
-              message: `Processing failed: ${data.error || data.message || 'Unknown error'}`
-            });
-            setProcessingStatus('failed');
-            clearInterval(pollInterval);
-          }
+        if (response.ok && handleTaskUpdate(data)) {
+          clearInterval(pollInterval);
         }
       } catch (error) {
         console.error('Status polling error:', error);
@@ -539,13 +609,24 @@ function App() {
                     <div className="progress-bar">
                       <div 
                         className="progress-fill" 
-                        style={{ width: `${dummyProgress}%` }}
+                        style={{ width: `${processingProgress}%` }}
                       ></div>
                     </div>
                     <div className="progress-text">
-                      {dummyProgress < 99 ? `${Math.round(dummyProgress)}%` : 'Almost done...'}
+                      {processingProgress < 99 ? `${Math.round(processingProgress)}%` : 'Almost done...'}
                     </div>
+                    {processingMessage && (
+                      <div className="progress-text">{processingMessage}</div>
+                    )}
                   </div>
+                  
+                  <button
+                    onClick={handleCancelProcessing}
+                    className="remove-file-btn"
+                    style={{ marginTop: '20px' }}
+                  >
+                    Cancel Processing
+                  </button>
                 </div>
               </div>
             </div>